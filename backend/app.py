@@ -1,15 +1,38 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
+import click
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
-import joblib
+import atexit
+import hmac
+import multiprocessing
 import os
+import threading
+import time
 import warnings
+from concurrent.futures.process import BrokenProcessPool
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import and_, inspect, or_, select
+from sqlalchemy.orm import load_only
 import json
 from datetime import datetime
 from bot.bot import bot_bp
+from bot.bot_backend import chat_metrics, conversation_store, history_journal, ollama_client, response_cache, translator
+from auth import HasherBusy, PasswordHasher, issue_token, verify_token
+from database import configure_engine, database_uri, engine_options
+from inference_server import InferenceServer, InferenceServerClosed
+from metrics import (
+    RequestProfiler, finish_request, registry, request_count, request_latency, stage, stage_latency, start_request,
+)
+from migrations import compact_quiz_results, upgrade_schema
+from model_registry import ModelRegistry, build_canary_answers, resolve_model_dir
+from persistence import TTLCache, WriteBehindQueue
+from predictor import (
+    QUESTION_MAPPING, ORDINAL_MAPPINGS, BINARY_MAPPINGS, MODEL_DIR, MODEL_FILES,
+    SleepScorePredictor, map_frontend_answers, calculate_effectiveness,
+)
+from questions import QUESTIONS, pack_answers, unpack_answers
+from result_import import import_quiz_results
+from summaries import rebuild_summaries, record_result, summary_response
+from recommendations import get_sleep_recommendations, recommendation_template, render_recommendations
 
 warnings.filterwarnings('ignore')
 
@@ -19,72 +42,21 @@ CORS(app)  # Enable CORS for all routes
 app.register_blueprint(bot_bp)
 
 # --- Database Configuration ---
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(os.path.dirname(__file__), 'database.db')
+# SQLALCHEMY_DATABASE_URI (or DATABASE_URL) switches to another database or backend;
+# DB_PROFILE=tuned (default) runs SQLite in WAL mode, DB_PROFILE=default leaves its settings alone
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
+with app.app_context():
+    configure_engine(db.engine, os.environ.get('DB_PROFILE', 'tuned'))
 
-# --- Mappings (from model training notebook) ---
-# This ensures data is encoded exactly as the model expects, even if .pkl files are corrupt.
-
-QUESTION_MAPPING = {
-    "What is your age group?": "what is your age group?",
-    "On average, how many hours do you sleep at night?": "on average, how many hours do you sleep at night?",
-    "How often do you have trouble falling asleep?": "how often do you have trouble falling asleep?",
-    "Do you wake up feeling well-rested?": "do you wake up feeling well-rested?",
-    "How often do you feel tired or drowsy during the day?": "how often do you feel tired or drowsy during the day?",
-    "Do you face difficulty concentrating or staying focused during the day?": "do you face difficulty concentrating or staying focused during the day?",
-    "How often do you feel anxious or nervous?": "how often do you feel anxious or nervous?",
-    "How would you describe your current emotional state?": "how would you describe your current emotional state?",
-    "Have you experienced trauma that continues to disturb your sleep?": "have you experienced trauma that continues to disturb your sleep?",
-    "Do you often worry excessively about the future or daily tasks before bed?": "do you often worry excessively about the future or daily tasks before bed?",
-    "Do you dwell on past events (rumination) before falling asleep?": "do you dwell on past events (rumination) before falling asleep?",
-    "Do you experience chronic worry that keeps your mind active at night?": "do you experience chronic worry that keeps your mind active at night?",
-    "How often do you use mobile or digital devices before sleeping?": "how often do you use mobile or digital devices before sleeping?",
-    "How often do you consume caffeinated drinks (tea/coffee/energy drinks) after evening?": "how often do you consume caffeinated drinks (tea/coffee/energy drinks) after evening?",
-    "Do you have someone to talk to when you feel mentally low or stressed?": "do you have someone to talk to when you feel mentally low or stressed?",
-    "How would you describe the environment at your home/school/work?": "how would you describe the environment at your home/school/work?",
-    "How often does bright lighting in your room affect your ability to sleep?": "do you have bright lighting in your sleeping environment?",
-    "How would you rate the noise level in your sleeping environment?": "how would you rate the noise level in your sleeping environment?",
-    "How often does your sleeping environment (room temperature, bedding, etc.) feel uncomfortable?": "how often does your sleeping environment (room temperature, bedding, etc.) feel uncomfortable?",
-    "Do you experience any physical pain or discomfort while trying to sleep?": "do you experience any physical pain or discomfort while trying to sleep?",
-    "How often do you exercise during the day?": "do you have any medical condition that interferes with your sleep?",
-    "How would you rate your stress levels before bedtime?": "are you currently taking any medications that may affect your sleep patterns?",
-    "How often do you take naps during the day?": "have you been diagnosed with any sleep disorders (e.g., insomnia, apnea)?",
-    "How would you describe your bedtime routine?": "have you experienced any hormonal changes (e.g., puberty, menstruation, menopause) affecting sleep?",
-    "How often do you feel refreshed after waking up?": "are you diagnosed with any neurological disorder (e.g., parkinson's, epilepsy) affecting sleep?"
-}
-
-ORDINAL_MAPPINGS = {
-    'what is your age group?': {'0–12 (children)': 0, '13–18 (adolescents)': 1, '19–30 (young adults)': 2, '31+ (adults & seniors)': 3},
-    'on average, how many hours do you sleep at night?': {'less than 4 hours': 0, '4–6 hours': 1, '6–8 hours': 2, 'more than 8 hours': 3},
-    'how often do you have trouble falling asleep?': {'never': 0, 'occasionally': 1, 'frequently': 2, 'always': 3},
-    'how often do you feel tired or drowsy during the day?': {'never': 0, 'rarely': 1, 'frequently': 2, 'every day': 3},
-    'how often do you feel anxious or nervous?': {'never': 0, 'sometimes': 1, 'often': 2, 'always': 3},
-    'how would you describe your current emotional state?': {'happy and content': 0, 'occasionally stressed': 1, 'often overwhelmed': 2, 'mentally distressed': 3},
-    'have you experienced trauma that continues to disturb your sleep?': {'no': 0, 'no trauma': 0, 'yes, but sleep unaffected': 1, 'yes, occasionally affects sleep': 2, 'yes, frequently affects sleep': 3},
-    'do you dwell on past events (rumination) before falling asleep?': {'never': 0, 'occasionally': 1, 'frequently': 2, 'always': 3},
-    'how often do you use mobile or digital devices before sleeping?': {'never': 0, 'sometimes': 1, 'most nights': 2, 'every night': 3},
-    'how often do you consume caffeinated drinks (tea/coffee/energy drinks) after evening?': {'never': 0, 'rarely': 1, 'frequently': 2, 'daily': 3},
-    'how would you describe the environment at your home/school/work?': {'very supportive': 0, 'somewhat supportive': 1, 'neutral': 2, 'stressful and unsupportive': 3},
-    'how would you rate the noise level in your sleeping environment?': {'very quiet': 0, 'mostly quiet': 1, 'occasionally noisy': 2, 'very noisy': 3},
-    'how often does your sleeping environment (room temperature, bedding, etc.) feel uncomfortable?': {'never': 0, 'sometimes': 1, 'often': 2, 'always': 3},
-    'do you have any medical condition that interferes with your sleep?': {'no medical condition': 0, 'mild condition': 1, 'moderate condition': 2, 'severe condition': 3},
-    'have you been diagnosed with any sleep disorders (e.g., insomnia, apnea)?': {'no': 0, 'diagnosed, under control': 1, 'diagnosed, affects sleep': 2},
-    'are you diagnosed with any neurological disorder (e.g., parkinson\'s, epilepsy) affecting sleep?': {'no': 0, 'mild condition': 1, 'moderate impact': 2, 'severe impact on sleep': 3}
-}
-
-BINARY_MAPPINGS = {
-    'do you wake up feeling well-rested?': {'yes': 1, 'no': 0, 'always': 1, 'often': 1, 'sometimes': 0, 'never': 0},
-    'do you face difficulty concentrating or staying focused during the day?': {'yes': 1, 'no': 0, 'never': 0, 'occasionally': 1, 'often': 1, 'always': 1},
-    'do you often worry excessively about the future or daily tasks before bed?': {'yes': 1, 'no': 0, 'never': 0, 'occasionally': 1, 'frequently': 1, 'always': 1},
-    'do you experience chronic worry that keeps your mind active at night?': {'yes': 1, 'no': 0, 'never': 0, 'occasionally': 1, 'frequently': 1, 'always': 1},
-    'do you have someone to talk to when you feel mentally low or stressed?': {'yes': 1, 'no': 0, 'always': 1, 'most of the time': 1, 'sometimes': 0, 'never': 0},
-    'do you have bright lighting in your sleeping environment?': {'yes': 1, 'no': 0, 'never': 0, 'sometimes': 1, 'often': 1, 'always': 1},
-    'do you experience any physical pain or discomfort while trying to sleep?': {'yes': 1, 'no': 0, 'never': 0, 'occasionally': 1, 'often': 1, 'always': 1},
-    'are you currently taking any medications that may affect your sleep patterns?': {'yes': 1, 'no': 0},
-    'have you experienced any hormonal changes (e.g., puberty, menstruation, menopause) affecting sleep?': {'yes': 1, 'no': 0}
-}
-
+# PASSWORD_HASH_WORKERS caps the cores spent on password hashing; requests beyond
+# PASSWORD_HASH_QUEUE waiting checks get a 503
+password_hasher = PasswordHasher(
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', '2')),
+    max_queue=int(os.environ.get('PASSWORD_HASH_QUEUE', '64')),
+)
 
 # --- Database Models ---
 class User(db.Model):
@@ -95,177 +67,365 @@ class User(db.Model):
     quiz_results = db.relationship('QuizResult', backref='user', lazy=True, cascade="all, delete-orphan")
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
 
 class QuizResult(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    answers = db.Column(db.Text, nullable=False)  # Store answers as a JSON string
+    answers = db.Column(db.Text, nullable=False, default='')  # JSON string, '' when answers_packed is set
     sleep_score = db.Column(db.Float, nullable=False)
     effectiveness_percentage = db.Column(db.Float, nullable=False)
-    recommendations = db.Column(db.Text, nullable=False)
+    recommendations = db.Column(db.Text, nullable=False, default='')  # '' when recommendation_template is set
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    model_version = db.Column(db.String(64), nullable=True)  # Model that produced the score
+    # Compact form: one option index per question and a recommendation template + effectiveness in tenths
+    answers_packed = db.Column(db.LargeBinary, nullable=True)
+    recommendation_template = db.Column(db.SmallInteger, nullable=True)
+    recommendation_effectiveness = db.Column(db.SmallInteger, nullable=True)
+
+    # Serves /api/results: one user's results, newest first (id breaks timestamp ties)
+    __table_args__ = (
+        db.Index('ix_quiz_result_user_timestamp', 'user_id', db.desc('timestamp'), db.desc('id')),
+    )
+
+    # Response field -> columns it is built from, for ?fields= projections
+    FIELD_COLUMNS = {
+        'id': ('id',),
+        'timestamp': ('timestamp',),
+        'answers': ('answers', 'answers_packed'),
+        'sleep_score': ('sleep_score',),
+        'effectiveness_percentage': ('effectiveness_percentage',),
+        'recommendations': ('recommendations', 'recommendation_template', 'recommendation_effectiveness'),
+        'model_version': ('model_version',),
+    }
 
-class SleepScorePredictor:
-    def __init__(self):
-        self.model = None
-        self.scaler = None
-        self.encoders = {}
-        self.feature_names = []
-        
-    def load_model(self):
-        """Load the trained model and related files"""
-        try:
-            model_path = os.path.join(os.path.dirname(__file__), 'models', 'sleep_model.pkl')
-            scaler_path = os.path.join(os.path.dirname(__file__), 'models', 'scaler.pkl')
-            feature_names_path = os.path.join(os.path.dirname(__file__), 'models', 'feature_names.pkl')
-            encoders_path = os.path.join(os.path.dirname(__file__), 'models', 'encoders.pkl')
-            
-            # Check if model file exists
-            if not os.path.exists(model_path):
-                raise FileNotFoundError("Model file not found. Please ensure the model is trained first.")
-            
-            # Load model (this should work)
-            self.model = joblib.load(model_path)
-            print("✅ Model loaded successfully")
-            
-            # Try to load feature names
-            if os.path.exists(feature_names_path):
-                try:
-                    self.feature_names = joblib.load(feature_names_path)
-                    print("✅ Feature names loaded successfully")
-                except Exception as e:
-                    print(f"⚠️ Warning: Could not load feature names: {e}")
-                    # Create default feature names based on the model
-                    if hasattr(self.model, 'feature_names_in_'):
-                        self.feature_names = list(self.model.feature_names_in_)
-                    else:
-                        # Fallback feature names based on the questions
-                        self.feature_names = [
-                            'what is your age group?',
-                            'on average, how many hours do you sleep at night?',
-                            'how often do you have trouble falling asleep?',
-                            'do you wake up feeling well-rested?',
-                            'how often do you feel tired or drowsy during the day?',
-                            'do you face difficulty concentrating or staying focused during the day?',
-                            'how often do you feel anxious or nervous?',
-                            'how would you describe your current emotional state?',
-                            'have you experienced trauma that continues to disturb your sleep?',
-                            'do you often worry excessively about the future or daily tasks before bed?',
-                            'do you dwell on past events (rumination) before falling asleep?',
-                            'do you experience chronic worry that keeps your mind active at night?',
-                            'how often do you use mobile or digital devices before sleeping?',
-                            'how often do you consume caffeinated drinks (tea/coffee/energy drinks) after evening?',
-                            'do you have someone to talk to when you feel mentally low or stressed?',
-                            'how would you describe the environment at your home/school/work?',
-                            'do you have bright lighting in your sleeping environment?',
-                            'how would you rate the noise level in your sleeping environment?',
-                            'how often does your sleeping environment (room temperature, bedding, etc.) feel uncomfortable?',
-                            'do you experience any physical pain or discomfort while trying to sleep?',
-                            'do you have any medical condition that interferes with your sleep?',
-                            'are you currently taking any medications that may affect your sleep patterns?',
-                            'have you been diagnosed with any sleep disorders (e.g., insomnia, apnea)?',
-                            'have you experienced any hormonal changes (e.g., puberty, menstruation, menopause) affecting sleep?',
-                            'are you diagnosed with any neurological disorder (e.g., parkinson\'s, epilepsy) affecting sleep?'
-                        ]
-            
-            # Try to load scaler
-            if os.path.exists(scaler_path):
-                try:
-                    self.scaler = joblib.load(scaler_path)
-                    print("✅ Scaler loaded successfully")
-                except Exception as e:
-                    print(f"⚠️ Warning: Could not load scaler: {e}")
-                    # Set scaler to None on failure
-                    self.scaler = None
-                    print("✅ Scaler set to None as fallback.")
-            
-            # Try to load encoders
-            if os.path.exists(encoders_path):
-                try:
-                    self.encoders = joblib.load(encoders_path)
-                    print("✅ Encoders loaded successfully")
-                except Exception as e:
-                    print(f"⚠️ Warning: Could not load encoders: {e}")
-                    # Create default encoders
-                    self.encoders = {}
-                    print("✅ Created fallback encoders")
-            
-            return True
-        except Exception as e:
-            print(f"❌ Error loading model: {e}")
-            return False
-
-    def normalize_text(self, text):
-        """Normalize text data"""
-        if isinstance(text, str):
-            return text.strip().lower()
-        return text
-
-    def encode_features(self, df_input):
-        """Encode categorical features using the trained encoders or fallback to manual encoding."""
-        df_encoded = df_input.copy()
-        
-        # Normalize text values to lowercase
-        for col in df_encoded.columns:
-            df_encoded[col] = df_encoded[col].apply(self.normalize_text)
-
-        # --- Manual Encoding ---
-        # This is now the primary method to ensure consistency.
-        
-        # Apply ordinal encoding
-        for column, mapping in ORDINAL_MAPPINGS.items():
-            if column in df_encoded.columns:
-                df_encoded[column] = df_encoded[column].map(mapping)
-
-        # Apply binary encoding
-        for column, mapping in BINARY_MAPPINGS.items():
-            if column in df_encoded.columns:
-                df_encoded[column] = df_encoded[column].map(mapping)
-        
-        # For any other columns that might be objects, encode them numerically
-        for column in df_encoded.columns:
-            if df_encoded[column].dtype == 'object':
-                df_encoded[column] = pd.Categorical(df_encoded[column]).codes
-        
-        df_encoded = df_encoded.fillna(0)
-        return df_encoded
-
-    def predict_sleep_score(self, input_data):
-        """Predict sleep score for new data"""
-        if self.model is None:
-            raise ValueError("Model not loaded. Please load the model first.")
-        
-        # Convert dict to single-row DataFrame
-        df_input = pd.DataFrame([input_data])
-        
-        # Encode features
-        df_encoded = self.encode_features(df_input)
-        
-        # Ensure all required features are present
-        for col in self.feature_names:
-            if col not in df_encoded.columns:
-                df_encoded[col] = 0
-        
-        # Reorder columns to match training features
-        X_input = df_encoded[self.feature_names]
-        
-        # Scale input
-        if self.scaler:
-            X_input_scaled = self.scaler.transform(X_input)
+    def set_answers(self, answers):
+        """Store answers packed when they are all known options, else as JSON"""
+        packed = pack_answers(answers)
+        if packed is None:
+            self.answers = json.dumps(answers)
         else:
-            # If scaler is not available, use the input as is
-            X_input_scaled = X_input
-        
-        # Predict
-        prediction = self.model.predict(X_input_scaled)
-        return prediction[0]
+            self.answers = ''
+        self.answers_packed = packed
+
+    def get_answers(self):
+        if self.answers_packed is not None:
+            return unpack_answers(self.answers_packed)
+        return json.loads(self.answers)
+
+    def set_recommendations(self, age_group, effectiveness):
+        self.recommendation_template, self.recommendation_effectiveness = \
+            recommendation_template(age_group, effectiveness)
+        self.recommendations = ''
+
+    def get_recommendations(self):
+        if self.recommendation_template is not None:
+            return render_recommendations(self.recommendation_template, self.recommendation_effectiveness)
+        return self.recommendations
+
+    def to_dict(self, fields=None):
+        """The result as /api/results returns it, whichever form it is stored in.
+
+        ``fields`` limits the output to those keys, skipping the decoding of the others.
+        """
+        getters = {
+            'id': lambda: self.id,
+            'timestamp': lambda: self.timestamp.isoformat(),
+            'answers': self.get_answers,
+            'sleep_score': lambda: self.sleep_score,
+            'effectiveness_percentage': lambda: self.effectiveness_percentage,
+            'recommendations': self.get_recommendations,
+            'model_version': lambda: self.model_version,
+        }
+        return {field: getters[field]() for field in (fields or self.FIELD_COLUMNS)}
+
+    def cursor(self):
+        """Opaque position of this result for /api/results?before="""
+        return f"{self.timestamp.isoformat()},{self.id}"
+
+class ResultSummary(db.Model):
+    """Running aggregates of one user's quiz results, maintained by summaries.record_result"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False)
+    latest_timestamp = db.Column(db.DateTime, nullable=False)
+    latest_sleep_score = db.Column(db.Float, nullable=False)
+    latest_effectiveness = db.Column(db.Float, nullable=False)
+    sleep_score_sum = db.Column(db.Float, nullable=False)
+    sleep_score_min = db.Column(db.Float, nullable=False)
+    sleep_score_max = db.Column(db.Float, nullable=False)
+    effectiveness_sum = db.Column(db.Float, nullable=False)
+    effectiveness_min = db.Column(db.Float, nullable=False)
+    effectiveness_max = db.Column(db.Float, nullable=False)
+
+class WeeklyResultSummary(db.Model):
+    """The same aggregates per user and week (week_start is a Monday)"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, autoincrement=False)
+    week_start = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
+    sleep_score_sum = db.Column(db.Float, nullable=False)
+    sleep_score_min = db.Column(db.Float, nullable=False)
+    sleep_score_max = db.Column(db.Float, nullable=False)
+    effectiveness_sum = db.Column(db.Float, nullable=False)
+    effectiveness_min = db.Column(db.Float, nullable=False)
+    effectiveness_max = db.Column(db.Float, nullable=False)
+
+def rebuild_result_summaries():
+    """Recompute every user's ResultSummary and WeeklyResultSummary rows from their quiz results"""
+    with db.engine.begin() as connection:
+        return rebuild_summaries(connection, QuizResult.__table__, ResultSummary.__table__,
+                                 WeeklyResultSummary.__table__)
+
+def migrate_database():
+    """upgrade_schema, plus a summary backfill when the summary tables are new"""
+    had_summaries = inspect(db.engine).has_table(ResultSummary.__tablename__)
+    upgrade_schema(db, [User, QuizResult, ResultSummary, WeeklyResultSummary])
+    if not had_summaries:
+        users, results = rebuild_result_summaries()
+        if results:
+            print(f"✅ Built result summaries for {users:,} users from {results:,} quiz results")
+
+def init_db():
+    """Create the database tables and add columns introduced since they were created"""
+    with app.app_context():
+        migrate_database()
+
+@app.cli.command('compact-results')
+@click.option('--batch-size', default=500, show_default=True, help='Rows converted per transaction')
+@click.option('--vacuum', is_flag=True, help='Rebuild the database file afterwards to reclaim the space')
+def compact_results_command(batch_size, vacuum):
+    """Convert stored quiz results to the compact answer/recommendation encoding"""
+    migrate_database()
+    converted, skipped = compact_quiz_results(db, QuizResult, batch_size=batch_size)
+    print(f"✅ Compacted {converted} quiz results ({skipped} left unchanged)")
+    if vacuum:
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql('VACUUM')
+        print("✅ Database vacuumed")
+
+@app.cli.command('import-results')
+@click.argument('path')
+@click.option('--batch-size', default=10000, show_default=True, help='Rows inserted per transaction')
+@click.option('--drop-indexes', is_flag=True,
+              help='Drop the quiz_result indexes during the load and rebuild them after')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint of an earlier, interrupted import of PATH')
+def import_results_command(path, batch_size, drop_indexes, restart):
+    """Bulk-load historical quiz results from a JSON-lines or CSV file"""
+    migrate_database()
+    stats = import_quiz_results(db, User, QuizResult, path, batch_size=batch_size, drop_indexes=drop_indexes,
+                                restart=restart)
+    print(f"✅ Imported {stats['inserted']:,} quiz results in {stats['seconds']}s "
+          f"({stats['rows_per_second']:,.0f} rows/s); skipped {stats['unknown_user']:,} with unknown emails "
+          f"and {stats['invalid']:,} invalid records")
+    # One pass over all results is much cheaper than an upsert per imported row. It runs
+    # even when nothing was inserted: a resumed import may find every batch already
+    # committed by a run that stopped before its rebuild
+    users, results = rebuild_result_summaries()
+    print(f"✅ Rebuilt result summaries for {users:,} users from {results:,} quiz results")
+
+@app.cli.command('rebuild-summaries')
+def rebuild_summaries_command():
+    """Recompute the per-user result summaries from the stored quiz results"""
+    migrate_database()
+    started = time.perf_counter()
+    users, results = rebuild_result_summaries()
+    print(f"✅ Rebuilt result summaries for {users:,} users from {results:,} quiz results "
+          f"in {time.perf_counter() - started:.1f}s")
+
+# RESULTS_DURABILITY picks how /api/predict saves results:
+#   sync    - commit in the request (default)
+#   batched - queue the result and wait until its batch is committed (group commit)
+#   async   - queue the result and respond at once; pending rows are written
+#             within RESULTS_FLUSH_INTERVAL_MS and on shutdown
+RESULTS_DURABILITY = os.environ.get('RESULTS_DURABILITY', 'sync')
+if RESULTS_DURABILITY not in ('sync', 'batched', 'async'):
+    raise ValueError(f"RESULTS_DURABILITY must be sync, batched or async, not {RESULTS_DURABILITY!r}")
+RESULTS_FLUSH_MAX_ROWS = int(os.environ.get('RESULTS_FLUSH_MAX_ROWS', '100'))
+# batched requests are waiting on the commit, so by default they don't wait for more rows
+RESULTS_FLUSH_INTERVAL = float(os.environ.get(
+    'RESULTS_FLUSH_INTERVAL_MS', '50' if RESULTS_DURABILITY == 'async' else '0')) / 1000
+
+def add_result_to_summaries(result):
+    """Fold a new QuizResult into its user's summaries, in the session's transaction"""
+    record_result(db.session.connection(), ResultSummary.__table__, WeeklyResultSummary.__table__, {
+        'user_id': result.user_id,
+        'timestamp': result.timestamp,
+        'sleep_score': result.sleep_score,
+        'effectiveness_percentage': result.effectiveness_percentage,
+    })
 
-# Initialize the predictor
-predictor = SleepScorePredictor()
+def write_quiz_results(results):
+    """Insert a batch of QuizResult rows, and their summary updates, in one transaction"""
+    with app.app_context():
+        db.session.add_all(results)
+        for result in results:
+            add_result_to_summaries(result)
+        db.session.commit()
+
+result_writer = None
+if RESULTS_DURABILITY != 'sync':
+    result_writer = WriteBehindQueue(write_quiz_results, max_batch=RESULTS_FLUSH_MAX_ROWS,
+                                     max_delay=RESULTS_FLUSH_INTERVAL, name='quiz-result-writer')
+    atexit.register(result_writer.close)
+
+def save_quiz_result(result):
+    """Persist a new QuizResult according to RESULTS_DURABILITY"""
+    if result_writer is None:
+        db.session.add(result)
+        add_result_to_summaries(result)
+        db.session.commit()
+        return
+    written = result_writer.submit(result)
+    if RESULTS_DURABILITY == 'batched':
+        written.result()
+
+# Email -> user id, so /api/predict skips the user SELECT for returning users
+user_id_cache = TTLCache(
+    max_entries=int(os.environ.get('USER_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('USER_CACHE_TTL', '300')),
+)
+
+def lookup_user_id(email):
+    """The id of the user with ``email``, or None if there is no such user"""
+    user_id = user_id_cache.get(email)
+    if user_id is None:
+        user_id = db.session.query(User.id).filter_by(email=email).scalar()
+        if user_id is not None:
+            user_id_cache.set(email, user_id)
+    return user_id
+
+# Tokens issued at login are signed with AUTH_SECRET; without it each process uses
+# a random key, so tokens from another worker or an earlier run don't verify and
+# those requests fall back to the email lookup
+AUTH_SECRET = os.environ.get('AUTH_SECRET', '').encode() or os.urandom(32)
+AUTH_TOKEN_TTL = float(os.environ.get('AUTH_TOKEN_TTL', str(7 * 24 * 3600)))
+# REQUIRE_AUTH_TOKEN=1 rejects /api/predict and /api/results calls without a token
+REQUIRE_AUTH_TOKEN = os.environ.get('REQUIRE_AUTH_TOKEN', '0') == '1'
+
+def token_response_fields(user):
+    token, expires_at = issue_token(AUTH_SECRET, user.id, user.email, AUTH_TOKEN_TTL)
+    return {'token': token, 'token_expires_at': expires_at}
+
+def authenticate_request(email):
+    """(user_id, None) for the user a request acts as, or (None, error response).
+
+    An ``Authorization: Bearer <token>`` header is checked by its signature alone.
+    Without a valid token the user is looked up by ``email``, unless
+    REQUIRE_AUTH_TOKEN is set: an invalid or expired token (e.g. signed with
+    another process's random key) then counts as a missing one.
+    """
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        identity = verify_token(AUTH_SECRET, header[len('Bearer '):].strip())
+        if identity is not None:
+            user_id, token_email = identity
+            if email is not None and email != token_email:
+                return None, (jsonify({'error': 'Token does not belong to this user'}), 403)
+            return user_id, None
+        if REQUIRE_AUTH_TOKEN:
+            return None, (jsonify({'error': 'Invalid or expired token'}), 401)
+    if REQUIRE_AUTH_TOKEN:
+        return None, (jsonify({'error': 'Missing auth token'}), 401)
+    if not email:
+        return None, (jsonify({'error': 'Missing answers or user email'}), 400)
+    user_id = lookup_user_id(email)
+    if user_id is None:
+        return None, (jsonify({'error': 'User not found'}), 404)
+    return user_id, None
+
+def hasher_busy_response(error):
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+# Initialize the predictor registry; SCORE_CACHE_SIZE > 0 memoizes that many scores
+SCORE_CACHE_SIZE = int(os.environ.get('SCORE_CACHE_SIZE', '0'))
+model_registry = ModelRegistry(
+    lambda model_dir: SleepScorePredictor(model_dir=model_dir, score_cache_size=SCORE_CACHE_SIZE),
+    canary_answers=build_canary_answers(ORDINAL_MAPPINGS, BINARY_MAPPINGS),
+    mmap_mode=os.environ.get('MODEL_MMAP_MODE', 'r') or None,
+)
+
+# Start loading the model as soon as the app is created, also under WSGI servers
+# (but not in inference worker processes, which re-import this module)
+MODEL_READY_TIMEOUT = float(os.environ.get('MODEL_READY_TIMEOUT', '5'))
+if os.environ.get('MODEL_BACKGROUND_LOAD', '1') == '1' and multiprocessing.parent_process() is None:
+    model_registry.start()
+
+# MODEL_WATCH_INTERVAL > 0 polls backend/models/ and hot-swaps changed model files
+if float(os.environ.get('MODEL_WATCH_INTERVAL', '0')) > 0:
+    model_registry.watch(float(os.environ['MODEL_WATCH_INTERVAL']))
+
+# INFERENCE_WORKERS > 0 scores /api/predict in a pool of worker processes,
+# micro-batching requests that arrive within INFERENCE_MAX_WAIT_MS
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', '0'))
+INFERENCE_MAX_BATCH = int(os.environ.get('INFERENCE_MAX_BATCH', '32'))
+INFERENCE_MAX_WAIT = float(os.environ.get('INFERENCE_MAX_WAIT_MS', '2')) / 1000
+INFERENCE_TIMEOUT = float(os.environ.get('INFERENCE_TIMEOUT', '30'))
+_inference_server = None
+_inference_server_model = None
+_inference_server_lock = threading.Lock()
+
+def get_inference_server(predictor):
+    """The worker pool for the registry's active model, or None to score ``predictor`` in the request thread.
+
+    The pool only ever follows the active model: a hot swap gets a fresh pool and the
+    old one finishes its queue and exits, while requests still holding the previous
+    predictor score in-thread instead of rebuilding a pool for it.
+    """
+    global _inference_server, _inference_server_model
+    if not INFERENCE_WORKERS:
+        return None
+    active = model_registry.predictor
+    if predictor is not active:
+        return None
+    model_key = (active.model_dir, active.model_version)
+    with _inference_server_lock:
+        if _inference_server is None or _inference_server_model != model_key:
+            previous = _inference_server
+            _inference_server = InferenceServer(
+                model_dir=active.model_dir,
+                workers=INFERENCE_WORKERS,
+                max_batch_size=INFERENCE_MAX_BATCH,
+                max_wait=INFERENCE_MAX_WAIT,
+                mmap_mode=model_registry.mmap_mode,
+            )
+            _inference_server_model = model_key
+            threading.Thread(
+                target=_inference_server.warm_up, args=(len(active.feature_names),), daemon=True
+            ).start()
+            if previous is not None:
+                threading.Thread(target=previous.close, daemon=True).start()
+        return _inference_server
+
+def score_answers(predictor, input_for_predictor):
+    """Predict one answer set in the worker pool if configured, else in this thread"""
+    server = get_inference_server(predictor)
+    if server is None:
+        return predictor.predict_sleep_score(input_for_predictor)
+    with stage('encode_features'):
+        X_input = predictor.encode_features(input_for_predictor)
+    with stage('model_predict'):
+        try:
+            return server.predict(X_input, timeout=INFERENCE_TIMEOUT)[0]
+        except (InferenceServerClosed, BrokenProcessPool):
+            # The pool was replaced by a hot swap after this request picked it up,
+            # or a worker died while scoring it (the server restarts its pool)
+            return predictor.predict_matrix(X_input)[0]
+
+def model_unavailable_response(predictor):
+    """Wait briefly for the model; return a 503 response if it still isn't ready"""
+    if predictor.wait_until_ready(MODEL_READY_TIMEOUT):
+        return None
+    if predictor.load_error and not predictor.is_loading:
+        message = f'Model unavailable: {predictor.load_error}'
+    else:
+        message = 'Model is still loading, please retry shortly'
+    response = jsonify({'error': message})
+    response.headers['Retry-After'] = '5'
+    return response, 503
 
 # --- Authentication Endpoints ---
 
@@ -283,14 +443,18 @@ def signup():
         return jsonify({'error': 'Email address already in use'}), 409
 
     new_user = User(name=name, email=email)
-    new_user.set_password(password)
+    try:
+        new_user.set_password(password)
+    except (HasherBusy, TimeoutError) as e:
+        return hasher_busy_response(e)
     db.session.add(new_user)
     db.session.commit()
 
     return jsonify({
         'success': True,
         'message': 'User created successfully',
-        'user': {'name': new_user.name, 'email': new_user.email}
+        'user': {'name': new_user.name, 'email': new_user.email},
+        **token_response_fields(new_user),
     }), 201
 
 @app.route('/api/login', methods=['POST'])
@@ -304,75 +468,180 @@ def login():
 
     user = User.query.filter_by(email=email).first()
 
-    if user and user.check_password(password):
+    try:
+        valid = user is not None and user.check_password(password)
+    except (HasherBusy, TimeoutError) as e:
+        return hasher_busy_response(e)
+
+    if valid:
         return jsonify({
             'success': True,
             'message': 'Login successful',
-            'user': {'name': user.name, 'email': user.email}
+            'user': {'name': user.name, 'email': user.email},
+            **token_response_fields(user),
         })
     
     return jsonify({'error': 'Invalid credentials'}), 401
 
+# --- Metrics ---
+# /metrics serves request latencies, /api/predict stage timings, Ollama timings and
+# token counts, and the counters behind /api/health in the Prometheus text format.
+# PROFILE_SAMPLE_RATE > 0 runs cProfile on that share of requests and prints the
+# hottest functions of those that take PROFILE_SLOW_MS or longer
+request_profiler = RequestProfiler(
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', '0')),
+    slow_seconds=float(os.environ.get('PROFILE_SLOW_MS', '1000')) / 1000,
+    top=int(os.environ.get('PROFILE_TOP', '20')),
+)
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    start_request()
+    g.profiler = request_profiler.start()
+
+@app.after_request
+def note_response_status(response):
+    g.response_status = response.status_code
+    return response
+
+@app.teardown_request
+def record_request_metrics(error=None):
+    """Record latency and stage timings; runs even when the view raised"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_latency.observe(duration, route, request.method)
+    request_count.inc(route, request.method, str(g.pop('response_status', 500)))
+    for name, seconds in finish_request():
+        stage_latency.observe(seconds, route, name)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        request_profiler.finish(profiler, f'{request.method} {request.path}', duration)
+
+def optional_stats(component):
+    """stats() of a component that may not exist yet, for registry.register_stats"""
+    return lambda: component().stats() if component() is not None else {}
+
+registry.register_stats('user_cache', user_id_cache.stats)
+registry.register_stats('password_hasher', password_hasher.stats)
+registry.register_stats('chat', chat_metrics.stats)
+registry.register_stats('chat_sessions', conversation_store.stats)
+registry.register_stats('chat_journal', history_journal.stats)
+registry.register_stats('chat_cache', response_cache.stats)
+registry.register_stats('ollama', ollama_client.stats)
+registry.register_stats('translation', translator.stats)
+registry.register_stats('profiler', request_profiler.stats)
+registry.register_stats('result_writer', optional_stats(lambda: result_writer))
+registry.register_stats('inference_server', optional_stats(lambda: _inference_server))
+registry.register_stats('score_cache', optional_stats(lambda: model_registry.predictor.score_cache))
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'message': 'Sleep Analysis API is running'
-    })
+    """Health check endpoint; 503 until the model is ready to serve predictions"""
+    predictor = model_registry.predictor
+    if predictor.is_ready:
+        status = 'healthy'
+    elif predictor.is_loading:
+        status = 'loading'
+    else:
+        status = 'unavailable'
+    health = {
+        'status': status,
+        'message': 'Sleep Analysis API is running',
+        'model': {
+            'ready': predictor.is_ready,
+            'loading': predictor.is_loading,
+            'error': predictor.load_error,
+            'version': predictor.model_version,
+        },
+    }
+    if predictor.score_cache is not None:
+        health['score_cache'] = predictor.score_cache.stats()
+    if _inference_server is not None:
+        health['inference_server'] = _inference_server.stats()
+    if result_writer is not None:
+        health['result_writer'] = result_writer.stats()
+    health['user_cache'] = user_id_cache.stats()
+    health['password_hasher'] = password_hasher.stats()
+    health['chat'] = chat_metrics.stats()
+    health['chat_sessions'] = conversation_store.stats()
+    health['chat_journal'] = history_journal.stats()
+    health['chat_cache'] = response_cache.stats()
+    health['ollama'] = ollama_client.stats()
+    health['translation'] = translator.stats()
+    return jsonify(health), 200 if predictor.is_ready else 503
 
 @app.route('/api/predict', methods=['POST'])
 def predict_sleep_score():
-    """Predict sleep score and save results to the database"""
+    """Predict sleep score and save results to the database.
+
+    ``?format=structured`` returns the recommendations as JSON (title,
+    priority, remedies) instead of one formatted text block. With a login
+    token in ``Authorization: Bearer``, ``email`` may be omitted.
+    """
     try:
-        data = request.get_json()
+        with stage('json_parse'):
+            data = request.get_json()
         
-        if not data or 'answers' not in data or 'email' not in data:
+        if not data or 'answers' not in data:
             return jsonify({'error': 'Missing answers or user email'}), 400
 
-        user = User.query.filter_by(email=data['email']).first()
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        predictor = model_registry.predictor
+        unavailable = model_unavailable_response(predictor)
+        if unavailable:
+            return unavailable
+
+        with stage('user_lookup'):
+            user_id, auth_error = authenticate_request(data.get('email'))
+        if auth_error:
+            return auth_error
             
         answers_data = data['answers']
         
         # Transform frontend question keys to backend feature names
-        input_for_predictor = {}
-        for frontend_question, answer in answers_data.items():
-            backend_question = QUESTION_MAPPING.get(frontend_question)
-            if backend_question:
-                input_for_predictor[backend_question] = answer
+        input_for_predictor = map_frontend_answers(answers_data)
         
         # Make prediction
-        predicted_score = predictor.predict_sleep_score(input_for_predictor)
+        predicted_score = score_answers(predictor, input_for_predictor)
 
         # Calculate sleep effectiveness
-        min_score, max_score = 25, 53
-        effectiveness = max(0, min(100, ((predicted_score - min_score) / (max_score - min_score)) * 100))
+        effectiveness = calculate_effectiveness(predicted_score)
         
         # Get age group for recommendations
         age_group_answer = input_for_predictor.get("what is your age group?", "19–30 (young adults)")
         age_group_key = age_group_answer.strip().lower()
         
-        # Generate recommendations
-        recommendations = get_sleep_recommendations(age_group_key, predicted_score, effectiveness)
-        
         # Save result to database
         new_result = QuizResult(
-            user_id=user.id,
-            answers=json.dumps(answers_data),
+            user_id=user_id,
+            timestamp=datetime.utcnow(),
             sleep_score=round(predicted_score, 2),
             effectiveness_percentage=round(effectiveness, 2),
-            recommendations=recommendations
+            model_version=predictor.model_version
         )
-        db.session.add(new_result)
-        db.session.commit()
+        new_result.set_answers(answers_data)
+        new_result.set_recommendations(age_group_key, effectiveness)
+        with stage('db_commit'):
+            save_quiz_result(new_result)
+
+        # Generate recommendations, only in the format that was asked for
+        with stage('recommendations'):
+            recommendations = get_sleep_recommendations(age_group_key, predicted_score, effectiveness,
+                                                        structured=request.args.get('format') == 'structured')
 
         return jsonify({
             'success': True,
             'sleep_score': round(predicted_score, 2),
             'effectiveness_percentage': round(effectiveness, 2),
             'recommendations': recommendations,
+            'model_version': predictor.model_version,
         })
         
     except Exception as e:
@@ -381,258 +650,226 @@ def predict_sleep_score():
             'error': f'Prediction failed: {str(e)}'
         }), 500
 
+# PREDICT_BATCH_MAX_ROWS caps the answer sets one /api/predict/batch call may send
+PREDICT_BATCH_MAX_ROWS = int(os.environ.get('PREDICT_BATCH_MAX_ROWS', '10000'))
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_sleep_score_batch():
+    """Score many answer sets in one call without saving them"""
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('answers'), list):
+            return jsonify({'error': 'Missing answers list'}), 400
+        if len(data['answers']) > PREDICT_BATCH_MAX_ROWS:
+            return jsonify({'error': f'At most {PREDICT_BATCH_MAX_ROWS} answer sets per batch'}), 400
+
+        predictor = model_registry.predictor
+        unavailable = model_unavailable_response(predictor)
+        if unavailable:
+            return unavailable
+
+        answers_list = data['answers']
+        records = [
+            map_frontend_answers(answers) if isinstance(answers, dict) else answers
+            for answers in answers_list
+        ]
+
+        results = []
+        for index, row in enumerate(predictor.predict_batch(records)):
+            if row['error']:
+                results.append({
+                    'index': index,
+                    'sleep_score': None,
+                    'effectiveness_percentage': None,
+                    'error': row['error'],
+                })
+                continue
+            predicted_score = row['sleep_score']
+            results.append({
+                'index': index,
+                'sleep_score': round(predicted_score, 2),
+                'effectiveness_percentage': round(calculate_effectiveness(predicted_score), 2),
+                'error': None,
+            })
+
+        return jsonify({'success': True, 'model_version': predictor.model_version, 'results': results})
+
+    except Exception as e:
+        print(f"Error in batch prediction: {e}")
+        return jsonify({
+            'error': f'Batch prediction failed: {str(e)}'
+        }), 500
+
+RESULTS_MAX_PAGE_SIZE = 100
+
+def parse_results_cursor(before):
+    """(timestamp, id or None) from a ``before`` cursor or plain ISO timestamp; ValueError if malformed"""
+    timestamp, _, result_id = before.partition(',')
+    return datetime.fromisoformat(timestamp), int(result_id) if result_id else None
+
 @app.route('/api/results/<email>', methods=['GET'])
 def get_results(email):
-    """Get all quiz results for a user"""
-    user = User.query.filter_by(email=email).first()
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-
-    results = []
-    for result in user.quiz_results:
-        results.append({
-            'id': result.id,
-            'timestamp': result.timestamp.isoformat(),
-            'answers': json.loads(result.answers),
-            'sleep_score': result.sleep_score,
-            'effectiveness_percentage': result.effectiveness_percentage,
-            'recommendations': result.recommendations,
-        })
-    
-    # Sort results by timestamp, newest first
-    results.sort(key=lambda r: r['timestamp'], reverse=True)
+    """Get a user's quiz results, newest first.
+
+    ``?limit=`` (clamped to 1..RESULTS_MAX_PAGE_SIZE) pages the results and
+    returns ``next_before``, the cursor to pass as ``?before=`` for the next
+    page. ``?fields=id,timestamp,...`` returns only those fields.
+    """
+    user_id, auth_error = authenticate_request(email)
+    if auth_error:
+        return auth_error
+
+    if result_writer is not None:
+        # Read your own writes: results still queued are written first
+        result_writer.flush()
+
+    query = QuizResult.query.filter_by(user_id=user_id)
+
+    fields = None
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in QuizResult.FIELD_COLUMNS]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+        # id and timestamp are always loaded for the cursor
+        columns = {'id', 'timestamp'}
+        for field in fields:
+            columns.update(QuizResult.FIELD_COLUMNS[field])
+        query = query.options(load_only(*(getattr(QuizResult, column) for column in columns)))
+
+    if request.args.get('before'):
+        try:
+            before_timestamp, before_id = parse_results_cursor(request.args['before'])
+        except ValueError:
+            return jsonify({'error': 'Invalid before cursor'}), 400
+        if before_id is None:
+            query = query.filter(QuizResult.timestamp < before_timestamp)
+        else:
+            query = query.filter(or_(
+                QuizResult.timestamp < before_timestamp,
+                and_(QuizResult.timestamp == before_timestamp, QuizResult.id < before_id),
+            ))
+
+    limit = None
+    if request.args.get('limit'):
+        try:
+            limit = int(request.args['limit'])
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        limit = min(max(limit, 1), RESULTS_MAX_PAGE_SIZE)
+
+    query = query.order_by(QuizResult.timestamp.desc(), QuizResult.id.desc())
+    if limit is not None:
+        # One extra row tells whether there is a next page
+        query = query.limit(limit + 1)
+    rows = query.all()
+
+    response = {'success': True, 'results': [result.to_dict(fields) for result in rows[:limit]]}
+    if limit is not None:
+        # Unpaged responses keep the shape they had before paging existed
+        response['next_before'] = rows[limit - 1].cursor() if len(rows) > limit else None
+    return jsonify(response)
+
+# SUMMARY_WEEKS weekly buckets are listed by /api/results/<email>/summary; its
+# rolling window covers the last SUMMARY_ROLLING_WEEKS weeks up to the latest result
+SUMMARY_WEEKS = int(os.environ.get('SUMMARY_WEEKS', '12'))
+SUMMARY_ROLLING_WEEKS = int(os.environ.get('SUMMARY_ROLLING_WEEKS', '4'))
+
+@app.route('/api/results/<email>/summary', methods=['GET'])
+def get_results_summary(email):
+    """A user's result count, latest result, all-time and rolling statistics and weekly buckets.
+
+    Served from the per-user summary tables, so the cost does not grow with
+    the number of stored results.
+    """
+    user_id, auth_error = authenticate_request(email)
+    if auth_error:
+        return auth_error
+
+    if result_writer is not None:
+        result_writer.flush()
+
+    summary_table, weekly_table = ResultSummary.__table__, WeeklyResultSummary.__table__
+    summary = db.session.execute(
+        select(summary_table).where(summary_table.c.user_id == user_id)).mappings().first()
+    weekly = db.session.execute(
+        select(weekly_table).where(weekly_table.c.user_id == user_id)
+        .order_by(weekly_table.c.week_start.desc()).limit(max(SUMMARY_WEEKS, SUMMARY_ROLLING_WEEKS))
+    ).mappings().all()
+    response = summary_response(summary, weekly, SUMMARY_WEEKS, SUMMARY_ROLLING_WEEKS)
+    return jsonify({'success': True, **response})
+
+# --- Model Administration Endpoints ---
+
+def admin_forbidden_response():
+    """403 unless the request carries the ADMIN_TOKEN configured for this server"""
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        return jsonify({'error': 'Admin endpoints are disabled'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), admin_token):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    return None
+
+@app.route('/api/admin/models', methods=['GET'])
+def model_status():
+    """Active model version and the history of hot swaps"""
+    forbidden = admin_forbidden_response()
+    if forbidden:
+        return forbidden
+    return jsonify({'success': True, **model_registry.status()})
+
+@app.route('/api/admin/models/reload', methods=['POST'])
+def reload_model():
+    """Load, validate and swap in a model bundle from backend/models/ or one of its subdirectories"""
+    forbidden = admin_forbidden_response()
+    if forbidden:
+        return forbidden
+
+    data = request.get_json(silent=True) or {}
+    model_dir = None
+    if data.get('model_dir'):
+        try:
+            model_dir = resolve_model_dir(MODEL_DIR, data['model_dir'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-    return jsonify({'success': True, 'results': results})
+    if not model_registry.reload_async(model_dir):
+        return jsonify({'error': 'A model reload is already in progress'}), 409
+    return jsonify({'success': True, 'message': 'Model reload started'}), 202
 
 @app.route('/api/questions', methods=['GET'])
 def get_questions():
     """Get the list of questions for the frontend"""
-    questions = [
-        {
-            "question": "What is your age group?",
-            "options": ["0–12 (Children)", "13–18 (Adolescents)", "19–30 (Young Adults)", "31+ (Adults & Seniors)"]
-        },
-        {
-            "question": "On average, how many hours do you sleep at night?",
-            "options": ["Less than 4 hours", "4–6 hours", "6–8 hours", "More than 8 hours"]
-        },
-        {
-            "question": "How often do you have trouble falling asleep?",
-            "options": ["Never", "Occasionally", "Frequently", "Always"]
-        },
-        {
-            "question": "Do you wake up feeling well-rested?",
-            "options": ["Always", "Often", "Sometimes", "Never"]
-        },
-        {
-            "question": "How often do you feel tired or drowsy during the day?",
-            "options": ["Never", "Rarely", "Frequently", "Every day"]
-        },
-        {
-            "question": "Do you face difficulty concentrating or staying focused during the day?",
-            "options": ["Never", "Occasionally", "Often", "Always"]
-        },
-        {
-            "question": "How often do you feel anxious or nervous?",
-            "options": ["Never", "Sometimes", "Often", "Always"]
-        },
-        {
-            "question": "How would you describe your current emotional state?",
-            "options": ["Happy and content", "Occasionally stressed", "Often overwhelmed", "Mentally distressed"]
-        },
-        {
-            "question": "Have you experienced trauma that continues to disturb your sleep?",
-            "options": ["No trauma", "Yes, but sleep unaffected", "Yes, occasionally affects sleep", "Yes, frequently affects sleep"]
-        },
-        {
-            "question": "Do you often worry excessively about the future or daily tasks before bed?",
-            "options": ["Never", "Occasionally", "Frequently", "Always"]
-        },
-        {
-            "question": "Do you dwell on past events (rumination) before falling asleep?",
-            "options": ["Never", "Occasionally", "Frequently", "Always"]
-        },
-        {
-            "question": "Do you experience chronic worry that keeps your mind active at night?",
-            "options": ["Never", "Occasionally", "Frequently", "Always"]
-        },
-        {
-            "question": "How often do you use mobile or digital devices before sleeping?",
-            "options": ["Never", "Occasionally", "Most nights", "Every night"]
-        },
-        {
-            "question": "How often do you consume caffeinated drinks (tea/coffee/energy drinks) after evening?",
-            "options": ["Never", "Rarely", "Frequently", "Daily"]
-        },
-        {
-            "question": "Do you have someone to talk to when you feel mentally low or stressed?",
-            "options": ["Always", "Most of the time", "Sometimes", "Never"]
-        },
-        {
-            "question": "How would you describe the environment at your home/school/work?",
-            "options": ["Very supportive", "Somewhat supportive", "Neutral", "Stressful and unsupportive"]
-        },
-        {
-            "question": "How often does bright lighting in your room affect your ability to sleep?",
-            "options": ["Never", "Sometimes", "Often", "Always"]
-        },
-        {
-            "question": "How would you rate the noise level in your sleeping environment?",
-            "options": ["Very quiet", "Mostly quiet", "Occasionally noisy", "Very noisy"]
-        },
-        {
-            "question": "How often does your sleeping environment (room temperature, bedding, etc.) feel uncomfortable?",
-            "options": ["Never", "Sometimes", "Often", "Always"]
-        },
-        {
-            "question": "Do you experience any physical pain or discomfort while trying to sleep?",
-            "options": ["Never", "Occasionally", "Often", "Always"]
-        },
-        {
-            "question": "How often do you exercise during the day?",
-            "options": ["Never", "Occasionally", "Regularly", "Daily"]
-        },
-        {
-            "question": "How would you rate your stress levels before bedtime?",
-            "options": ["Very low", "Moderate", "High", "Extremely high"]
-        },
-        {
-            "question": "How often do you take naps during the day?",
-            "options": ["Never", "Rarely", "Sometimes", "Daily"]
-        },
-        {
-            "question": "How would you describe your bedtime routine?",
-            "options": ["Consistent and relaxing", "Somewhat consistent", "Inconsistent", "No routine"]
-        },
-        {
-            "question": "How often do you feel refreshed after waking up?",
-            "options": ["Always", "Often", "Sometimes", "Rarely"]
-        }
-    ]
-    
     return jsonify({
         'success': True,
-        'questions': questions
+        'questions': QUESTIONS
     })
 
-def get_sleep_recommendations(age_group, sleep_score, effectiveness):
-    """Generate age-specific sleep recommendations"""
-    
-    recommendations = {
-        '0–12 (children)': {
-            'title': '🧸 Sleep Recommendations for Children (0-12 years)',
-            'remedies': [
-                "🛏️ Consistent Bedtime Routine: Establish a calming 30-45 minute bedtime routine with activities like reading, gentle music, or quiet storytelling",
-                "📱 Screen Time Limits: No screens 1-2 hours before bedtime. Blue light can disrupt melatonin production in developing brains",
-                "🌙 Optimal Sleep Duration: Ensure 9-11 hours of sleep for school-age children (6-13 years) and 11-14 hours for preschoolers (3-5 years)",
-                "🍎 Healthy Sleep Environment: Keep bedroom cool (65-70°F), dark, and quiet. Consider blackout curtains and white noise machines",
-                "🏃 Physical Activity: Encourage regular outdoor play and physical activity during the day, but avoid vigorous exercise 3 hours before bedtime",
-                "🥛 Nutrition & Hydration: Avoid caffeine completely. Limit fluids 1 hour before bedtime. Consider a light snack if hungry",
-                "🧘 Relaxation Techniques: Teach simple breathing exercises or gentle stretching. Try progressive muscle relaxation for anxious children",
-                "🎵 Comfort Items: Allow comfort objects like stuffed animals or soft blankets that provide security and comfort"
-            ]
-        },
-        
-        '13–18 (adolescents)': {
-            'title': '🎓 Sleep Recommendations for Adolescents (13-18 years)',
-            'remedies': [
-                "⏰ Circadian Rhythm Support: Understand that teen brains naturally shift to later sleep times. Aim for 8-10 hours of sleep with consistent sleep-wake times",
-                "📚 Study Schedule Management: Create a study schedule that doesn't require late-night cramming. Use active study techniques during peak alertness hours",
-                "📱 Digital Wellness: Use blue light filters on devices after sunset. Create a charging station outside the bedroom for phones and tablets",
-                "🏋️ Exercise Timing: Regular exercise is crucial but avoid intense workouts 4 hours before bedtime. Morning or afternoon exercise is ideal",
-                "☕ Caffeine Awareness: Limit caffeine intake, especially after 2 PM. Be aware of hidden caffeine in sodas, energy drinks, and chocolate",
-                "🧠 Stress Management: Practice stress-reduction techniques like journaling, meditation apps, or talking with trusted adults about daily pressures",
-                "🛏️ Sleep Environment: Create a teen-friendly sleep sanctuary with comfortable bedding, appropriate temperature, and minimal light pollution",
-                "👥 Social Balance: Balance social activities with sleep needs. Educate about the importance of sleep for academic performance and emotional regulation"
-            ]
-        },
-        
-        '19–30 (young adults)': {
-            'title': '🌟 Sleep Recommendations for Young Adults (19-30 years)',
-            'remedies': [
-                "⚖️ Work-Life Balance: Establish clear boundaries between work/study and personal time. Avoid checking emails or work-related content before bed",
-                "🍷 Substance Awareness: Limit alcohol consumption, especially 3 hours before bedtime. Alcohol disrupts REM sleep and sleep quality",
-                "💪 Regular Exercise Routine: Aim for 150 minutes of moderate exercise weekly. Morning workouts can help regulate circadian rhythms",
-                "🧘 Mindfulness & Meditation: Practice mindfulness meditation, progressive muscle relaxation, or use guided sleep meditation apps",
-                "📅 Consistent Schedule: Maintain regular sleep-wake times even on weekends. Avoid 'social jet lag' from irregular weekend sleep patterns",
-                "🌡️ Sleep Environment Optimization: Invest in quality mattress and pillows. Keep bedroom temperature between 60-67°F for optimal sleep",
-                "🍽️ Nutrition Timing: Avoid large meals 3 hours before bedtime. If hungry, opt for light snacks with tryptophan (turkey, milk, bananas)",
-                "💼 Financial Stress Management: Address financial anxieties through budgeting, financial planning, or seeking counseling to reduce bedtime worry"
-            ]
-        },
-        
-        '31+ (adults & seniors)': {
-            'title': '🏡 Sleep Recommendations for Adults & Seniors (31+ years)',
-            'remedies': [
-                "🏥 Medical Evaluation: Regular check-ups to identify and treat sleep disorders, sleep apnea, or other medical conditions affecting sleep",
-                "💊 Medication Review: Consult healthcare providers about medications that might affect sleep. Some medications can cause insomnia or drowsiness",
-                "🧘 Relaxation Practices: Incorporate relaxation techniques like deep breathing, gentle yoga, or tai chi to manage stress and prepare for sleep",
-                "🌿 Natural Sleep Aids: Consider natural options like chamomile tea, valerian root, or melatonin supplements (consult healthcare provider first)",
-                "📖 Sleep Hygiene Education: Understand age-related sleep changes. Older adults may need less sleep (7-8 hours) but should maintain quality",
-                "🏃 Age-Appropriate Exercise: Regular, moderate exercise like walking, swimming, or gentle stretching. Avoid vigorous exercise close to bedtime",
-                "🍽️ Dietary Considerations: Limit spicy foods, large meals, and excessive fluids before bedtime. Consider foods rich in magnesium and calcium",
-                "🧠 Cognitive Health: Engage in mentally stimulating activities during the day. Address anxiety, depression, or chronic pain that may affect sleep",
-                "🛏️ Comfort Optimization: Ensure mattress and pillows provide adequate support for joints and spine. Consider memory foam or adjustable beds if needed"
-            ]
-        }
-    }
-    
-    if age_group not in recommendations:
-        return "No specific recommendations available for this age group."
-    
-    rec = recommendations[age_group]
-    
-    # Create formatted output
-    output = f"\n{'='*60}\n"
-    output += f"{rec['title']}\n"
-    output += f"{'='*60}\n"
-    
-    # Add effectiveness context
-    if effectiveness < 50:
-        output += f"🚨 Priority Level: HIGH - Your sleep effectiveness is {effectiveness:.1f}%\n"
-        output += "Focus on implementing 3-4 of these recommendations immediately:\n\n"
-    elif effectiveness < 75:
-        output += f"⚠️ Priority Level: MODERATE - Your sleep effectiveness is {effectiveness:.1f}%\n"
-        output += "Consider implementing 2-3 of these recommendations to improve your sleep:\n\n"
-    else:
-        output += f"✅ Priority Level: MAINTENANCE - Your sleep effectiveness is {effectiveness:.1f}%\n"
-        output += "Great job! Use these recommendations to maintain and optimize your sleep:\n\n"
-    
-    # Add all recommendations
-    for i, remedy in enumerate(rec['remedies'], 1):
-        output += f"{i}. {remedy}\n\n"
-    
-    # Add general tips
-    output += "💡 General Tips:\n"
-    output += "• Start with 1-2 recommendations and gradually incorporate more\n"
-    output += "• Track your sleep improvements over 2-3 weeks\n"
-    output += "• Consult healthcare providers for persistent sleep issues\n"
-    output += "• Remember that sleep improvement takes time and consistency\n"
-    output += f"{'='*60}\n"
-    
-    return output
-
-if __name__ == '__main__':
-    with app.app_context():
-        # Create the database tables if they don't exist
-        db.create_all()
+def main():
+    """Run the development server; started by run.py"""
+    # Create the database tables if they don't exist
+    init_db()
 
     print("🚀 Starting Sleep Analysis API...")
-    print("📊 Loading ML model...")
+    print("📊 Loading ML model in the background...")
     
-    # Try to load the model on startup
-    if predictor.load_model():
-        print("✅ Model loaded successfully")
-    else:
-        print("⚠️ Model not loaded. API will attempt to load on first request.")
+    # The model loads in the background; requests retry a failed load
+    model_registry.start()
     
     print("🌐 API is ready to receive requests")
     print("📍 API endpoints:")
     print("   - GET  /api/health - Health check")
     print("   - GET  /api/questions - Get quiz questions")
     print("   - POST /api/predict - Predict sleep score")
+    print("   - POST /api/predict/batch - Score many answer sets at once")
     print("   - POST /api/signup - User signup")
     print("   - POST /api/login - User login")
     print("   - GET  /api/results/<email> - Get user quiz results")
+    print("   - GET  /api/admin/models - Active model version and reload history")
+    print("   - POST /api/admin/models/reload - Hot-swap the model files")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
+
+if __name__ == '__main__':
+    main()
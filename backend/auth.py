@@ -0,0 +1,120 @@
+"""Password hashing off the request threads, and signed auth tokens.
+
+werkzeug's scrypt/PBKDF2 hashes cost tens to hundreds of milliseconds of CPU
+each. PasswordHasher runs them on a small dedicated pool so a burst of
+logins is capped at ``max_workers`` cores instead of every server thread.
+After login the client gets a token signed with HMAC-SHA256; checking it is
+a single hash of a short string, so later requests skip the password check
+and the user lookup.
+"""
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+class PasswordHasher:
+    """Bounded executor for password hashing with queue-depth metrics"""
+
+    def __init__(self, max_workers=2, max_queue=64, timeout=30.0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hasher')
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.max_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise HasherBusy('Too many password checks in progress, please retry shortly')
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+        queued_at = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.wait_seconds += started - queued_at
+                    self.hash_seconds += finished - started
+
+        # The slot is released when the hash finishes, not when the caller stops
+        # waiting, so timed-out hashes still queued keep counting against the limit
+        future = self._executor.submit(timed)
+        future.add_done_callback(self._finished)
+        return future.result(self.timeout)
+
+    def _finished(self, future):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': min(self.pending, self.max_workers),
+                'queued': max(self.pending - self.max_workers, 0),
+                'max_pending': self.max_pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'mean_wait_ms': round(self.wait_seconds / self.completed * 1000, 3) if self.completed else 0.0,
+                'mean_hash_ms': round(self.hash_seconds / self.completed * 1000, 3) if self.completed else 0.0,
+            }
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def issue_token(secret, user_id, email, ttl):
+    """Signed token for ``user_id``/``email`` valid for ``ttl`` seconds; returns (token, expires_at)"""
+    expires_at = int(time.time() + ttl)
+    payload = f"{user_id}:{expires_at}:{email}".encode()
+    signature = hmac.new(secret, payload, hashlib.sha256).digest()
+    return f"{_b64encode(payload)}.{_b64encode(signature)}", expires_at
+
+
+def verify_token(secret, token):
+    """(user_id, email) if ``token`` was signed with ``secret`` and hasn't expired, else None"""
+    try:
+        payload_text, signature_text = token.split('.')
+        payload = _b64decode(payload_text)
+        signature = _b64decode(signature_text)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(hmac.new(secret, payload, hashlib.sha256).digest(), signature):
+        return None
+    user_id, expires_at, email = payload.decode().split(':', 2)
+    if int(expires_at) < time.time():
+        return None
+    return int(user_id), email
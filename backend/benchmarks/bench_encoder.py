@@ -0,0 +1,66 @@
+"""Microbenchmark: AnswerEncoder vs the pandas encode_features path.
+
+Run from the backend directory:
+    python -m benchmarks.bench_encoder
+"""
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from app import SleepScorePredictor, QUESTION_MAPPING, ORDINAL_MAPPINGS, BINARY_MAPPINGS
+
+
+def random_answers(rng):
+    answers = {}
+    for column in QUESTION_MAPPING.values():
+        mapping = ORDINAL_MAPPINGS.get(column) or BINARY_MAPPINGS.get(column)
+        answers[column] = rng.choice(list(mapping)).title()
+    return answers
+
+
+def pandas_encode(predictor, input_data):
+    df_encoded = predictor.encode_features_pandas(pd.DataFrame([input_data]))
+    for col in predictor.feature_names:
+        if col not in df_encoded.columns:
+            df_encoded[col] = 0
+    return df_encoded[predictor.feature_names]
+
+
+def time_per_call(func, samples, repeat=5):
+    """Best-of-``repeat`` mean seconds per call over ``samples``"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for sample in samples:
+            func(sample)
+        best = min(best, (time.perf_counter() - start) / len(samples))
+    return best
+
+
+def main(n_samples=2000):
+    predictor = SleepScorePredictor()
+    if not predictor.load_model():
+        raise SystemExit("❌ Could not load model")
+
+    rng = random.Random(42)
+    samples = [random_answers(rng) for _ in range(n_samples)]
+
+    # Outputs must stay bit-identical before timing anything
+    for sample in samples[:200]:
+        np.testing.assert_array_equal(
+            predictor.encode_features(sample),
+            pandas_encode(predictor, sample).to_numpy(dtype=float),
+        )
+
+    pandas_time = time_per_call(lambda s: pandas_encode(predictor, s), samples[:200])
+    encoder_time = time_per_call(predictor.encode_features, samples)
+
+    print(f"pandas encode_features : {pandas_time * 1e6:10.1f} µs/call")
+    print(f"AnswerEncoder          : {encoder_time * 1e6:10.1f} µs/call")
+    print(f"speedup                : {pandas_time / encoder_time:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
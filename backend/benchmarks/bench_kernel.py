@@ -0,0 +1,42 @@
+"""Per-call latency of the compiled FlatForest kernel vs scaler.transform + model.predict.
+
+Run from the backend directory:
+    python -m benchmarks.bench_kernel
+"""
+import numpy as np
+
+from app import SleepScorePredictor
+from benchmarks.bench_encoder import time_per_call
+
+
+def main(n_samples=2000):
+    predictor = SleepScorePredictor()
+    if not predictor.load_model():
+        raise SystemExit("❌ Could not load model")
+    if predictor.kernel is None:
+        raise SystemExit("❌ Inference kernel was not compiled")
+
+    rng = np.random.default_rng(42)
+    possible_values = [sorted(values) for values in predictor.encoder.possible_values()]
+    X = np.array([[rng.choice(values) for values in possible_values] for _ in range(n_samples)])
+    rows = [X[i:i + 1] for i in range(n_samples)]
+
+    def sklearn_predict(row):
+        return predictor.model.predict(predictor.scaler.transform(row))
+
+    np.testing.assert_array_equal(predictor.kernel.predict(X), sklearn_predict(X))
+
+    sklearn_time = time_per_call(sklearn_predict, rows[:200])
+    kernel_time = time_per_call(predictor.kernel.predict, rows)
+    sklearn_batch = time_per_call(sklearn_predict, [X], repeat=3) / n_samples
+    kernel_batch = time_per_call(predictor.kernel.predict, [X], repeat=3) / n_samples
+
+    print(f"sklearn, one row per call   : {sklearn_time * 1e6:10.1f} µs/row")
+    print(f"kernel, one row per call    : {kernel_time * 1e6:10.1f} µs/row")
+    print(f"sklearn, {n_samples} rows per call : {sklearn_batch * 1e6:10.1f} µs/row")
+    print(f"kernel, {n_samples} rows per call  : {kernel_batch * 1e6:10.1f} µs/row")
+    print(f"single-call speedup         : {sklearn_time / kernel_time:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
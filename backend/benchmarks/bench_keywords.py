@@ -0,0 +1,70 @@
+"""Microbenchmark: word-set keyword matcher vs the old per-call substring scan.
+
+Run from the backend directory:
+    python -m benchmarks.bench_keywords
+"""
+import random
+import time
+
+from bot.keywords import SLEEP_KEYWORDS, sleep_matcher
+
+LEGACY_KEYWORDS = [
+    'sleep', 'bed', 'rest', 'tired', 'insomnia', 'wake', 'dream', 'nap',
+    'bedtime', 'night', 'morning', 'awake', 'drowsy', 'energy', 'fatigue',
+    'stress', 'anxiety', 'relax', 'calm', 'meditation', 'routine'
+]
+
+FILLER = ('the project deadline moved and my manager wants the report with every chart redone before friday '
+          'so I have been reading about spreadsheets databases and hardware').split()
+# Words that contain a keyword without being one
+LOOKALIKES = ['interest', 'embedded', 'forest', 'snapshot', 'knight', 'crested']
+
+
+def legacy_is_sleep_related(text):
+    sleep_keywords = list(LEGACY_KEYWORDS)  # rebuilt per call, as before
+    text = text.lower()
+    return any(keyword in text for keyword in sleep_keywords)
+
+
+def message(rng, words, keyword=None):
+    text = [rng.choice(FILLER) for _ in range(words)]
+    if keyword:
+        text[rng.randrange(words)] = keyword
+    return ' '.join(text)
+
+
+def sample_sets(rng, words, n_samples):
+    keywords = [k for _, group in SLEEP_KEYWORDS.values() for k in group]
+    return {
+        'keyword': [message(rng, words, rng.choice(keywords)) for _ in range(n_samples)],
+        'none': [message(rng, words) for _ in range(n_samples)],
+        'lookalike': [message(rng, words, rng.choice(LOOKALIKES)) for _ in range(n_samples)],
+    }
+
+
+def time_per_call(func, samples, repeat=5):
+    """Best-of-``repeat`` mean seconds per call over ``samples``"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for sample in samples:
+            func(sample)
+        best = min(best, (time.perf_counter() - start) / len(samples))
+    return best
+
+
+def main(n_samples=500):
+    rng = random.Random(42)
+    for words in (20, 200, 2000):
+        for kind, samples in sample_sets(rng, words, n_samples).items():
+            legacy = time_per_call(legacy_is_sleep_related, samples)
+            matcher = time_per_call(sleep_matcher.matches, samples)
+            scores = time_per_call(sleep_matcher.scores, samples)
+            flagged = sum(map(legacy_is_sleep_related, samples)), sum(map(sleep_matcher.matches, samples))
+            print(f"{words:5d} words, {kind:9s}: substring {legacy * 1e6:8.1f} µs  matcher {matcher * 1e6:8.1f} µs  "
+                  f"weighted scores {scores * 1e6:8.1f} µs  sleep-related {flagged[0]:3d} vs {flagged[1]:3d} "
+                  f"of {len(samples)}")
+
+
+if __name__ == '__main__':
+    main()
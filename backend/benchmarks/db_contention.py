@@ -0,0 +1,124 @@
+"""Concurrency benchmark: SQLite lock contention with and without the tuned profile.
+
+Runs a mix of quiz result inserts, signups and /api/results-style reads from
+``--concurrency`` threads against a temporary database, once with the
+engine the app used to create (driver defaults) and once per DB_PROFILE.
+Reports throughput, p99 latency and "database is locked" errors.
+
+Run from the backend directory:
+    python -m benchmarks.db_contention --concurrency 32 --operations 4000
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+os.environ.setdefault('MODEL_BACKGROUND_LOAD', '0')
+
+import numpy as np
+from sqlalchemy import create_engine, exc, insert, select
+
+from app import QuizResult, User, db
+from benchmarks.write_load import random_result_row
+from database import configure_engine, engine_options
+
+
+def make_engine(path, profile):
+    uri = f'sqlite:///{path}'
+    if profile == 'baseline':
+        # What app.py did before the profile existed
+        engine = create_engine(uri)
+    else:
+        engine = create_engine(uri, **engine_options(uri))
+        configure_engine(engine, profile)
+    db.metadata.create_all(engine)
+    return engine
+
+
+def run(engine, operations, concurrency, rng):
+    users, results = User.__table__, QuizResult.__table__
+    with engine.begin() as connection:
+        connection.execute(insert(users), [
+            {'name': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': '-'} for i in range(100)
+        ])
+
+    plan = [rng.choices(('insert', 'signup', 'read'), weights=(4, 1, 5))[0] for _ in range(operations)]
+    rows = [random_result_row(rng) for _ in range(operations)]
+    latencies, errors = [], []
+    next_index = iter(range(operations))
+    lock = threading.Lock()
+
+    def operation(i):
+        kind = plan[i]
+        if kind == 'insert':
+            with engine.begin() as connection:
+                connection.execute(insert(results), {**rows[i], 'user_id': i % 100 + 1, 'timestamp': datetime.utcnow()})
+        elif kind == 'signup':
+            email = f'new{i}@example.com'
+            with engine.begin() as connection:
+                if connection.execute(select(users.c.id).where(users.c.email == email)).first() is None:
+                    connection.execute(insert(users), {'name': 'new', 'email': email, 'password_hash': '-'})
+        else:
+            with engine.connect() as connection:
+                connection.execute(
+                    select(results.c.id, results.c.sleep_score)
+                    .where(results.c.user_id == i % 100 + 1)
+                    .order_by(results.c.timestamp.desc(), results.c.id.desc())
+                    .limit(20)
+                ).all()
+
+    def client():
+        while True:
+            with lock:
+                i = next(next_index, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            try:
+                operation(i)
+            except exc.OperationalError as e:
+                with lock:
+                    errors.append(str(e.orig))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies or [0.0]) * 1000
+    return {
+        'ops_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3),
+        'locked_errors': sum('locked' in error for error in errors),
+        'other_errors': sum('locked' not in error for error in errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=4000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--profiles', default='baseline,default,tuned')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in args.profiles.split(','):
+            engine = make_engine(os.path.join(directory, f'{profile}.db'), profile)
+            stats = run(engine, args.operations, args.concurrency, random.Random(42))
+            engine.dispose()
+            print(f"{profile:<10} {stats['ops_per_second']:10.1f} ops/s   p50 {stats['p50_ms']:8.3f} ms   "
+                  f"p99 {stats['p99_ms']:9.3f} ms   locked {stats['locked_errors']:4d}   other errors {stats['other_errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Load test: in-thread scoring vs the process-pool InferenceServer.
+
+Fires ``--requests`` single-answer-set predictions from ``--concurrency``
+threads and reports p50/p99 latency and throughput for each backend.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --concurrency 16 --workers 4
+    python -m benchmarks.load_test --sklearn        # without the compiled kernel
+    python -m benchmarks.load_test --url http://localhost:5000 --email you@example.com
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from inference_server import InferenceServer
+from predictor import QUESTION_MAPPING, ORDINAL_MAPPINGS, BINARY_MAPPINGS, SleepScorePredictor
+
+
+def random_frontend_answers(rng):
+    answers = {}
+    for frontend_question, column in QUESTION_MAPPING.items():
+        mapping = ORDINAL_MAPPINGS.get(column) or BINARY_MAPPINGS.get(column)
+        answers[frontend_question] = rng.choice(list(mapping)).title()
+    return answers
+
+
+def run_load(score, payloads, concurrency):
+    """Call ``score`` on every payload from ``concurrency`` threads; returns a stats dict"""
+    latencies = [0.0] * len(payloads)
+    next_index = iter(range(len(payloads)))
+    index_lock = threading.Lock()
+
+    def client():
+        while True:
+            with index_lock:
+                i = next(next_index, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            score(payloads[i])
+            latencies[i] = time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(payloads),
+        'concurrency': concurrency,
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3),
+        'throughput_rps': round(len(payloads) / elapsed, 1),
+    }
+
+
+def print_stats(label, stats):
+    print(f"{label:<28} p50 {stats['p50_ms']:8.3f} ms   p99 {stats['p99_ms']:8.3f} ms   "
+          f"{stats['throughput_rps']:10.1f} req/s")
+
+
+def http_scorer(url, email):
+    def score(answers):
+        body = json.dumps({'email': email, 'answers': answers}).encode()
+        request = urllib.request.Request(f"{url}/api/predict", data=body,
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request) as response:
+            response.read()
+    return score
+
+
+def main():
+    warnings.filterwarnings('ignore')
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=2)
+    parser.add_argument('--sklearn', action='store_true', help='score with scaler + model instead of the kernel')
+    parser.add_argument('--url', help='load-test a running server instead of in-process backends')
+    parser.add_argument('--email', help='existing user for --url mode')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    frontend_payloads = [random_frontend_answers(rng) for _ in range(args.requests)]
+
+    if args.url:
+        if not args.email:
+            parser.error('--url needs --email of an existing user')
+        print_stats('HTTP /api/predict', run_load(http_scorer(args.url, args.email), frontend_payloads,
+                                                    args.concurrency))
+        return
+
+    predictor = SleepScorePredictor()
+    if not predictor.load_model():
+        raise SystemExit("❌ Could not load model")
+    if args.sklearn:
+        predictor.kernel = None
+    payloads = [{QUESTION_MAPPING[q]: a for q, a in answers.items()} for answers in frontend_payloads]
+
+    print_stats('in-thread', run_load(predictor.predict_sleep_score, payloads, args.concurrency))
+
+    server = InferenceServer(model_dir=predictor.model_dir, workers=args.workers,
+                             max_batch_size=args.max_batch, max_wait=args.max_wait_ms / 1000,
+                             use_kernel=not args.sklearn)
+    try:
+        server.warm_up(len(predictor.feature_names))
+
+        def pooled(answers):
+            return server.predict(predictor.encode_features(answers))[0]
+
+        label = f'process pool ({args.workers} workers)'
+        print_stats(label, run_load(pooled, payloads, args.concurrency))
+        print(f"{'':<28} {server.stats()}")
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""Offline benchmark suite for the scoring, recommendation, database and chat paths.
+
+Every benchmark runs a fixed, seeded workload in several rounds and records
+the per-operation time of each round; the median round is the number that
+gets compared. Nothing needs the network: the database is a temporary SQLite
+file and the chatbot talks to stub_ollama.
+
+Run from the backend directory:
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --output current.json --compare baseline.json
+    python -m benchmarks.suite --only predictor,encode --quick
+
+With ``--compare`` the exit status is 1 when any benchmark's median is more
+than ``--threshold`` (default 20%) slower than in the baseline.
+"""
+import argparse
+import atexit
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from stub_ollama import StubOllamaServer
+
+# The app reads its configuration at import, so point it at throwaway state first
+_workdir = tempfile.mkdtemp(prefix='sleep-bench-')
+atexit.register(shutil.rmtree, _workdir, ignore_errors=True)
+_stub = StubOllamaServer().start()
+os.environ.update({
+    'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(_workdir, 'bench.db')}",
+    'RESULTS_DURABILITY': 'sync',
+    'CHAT_JOURNAL': os.path.join(_workdir, 'chat_history.jsonl'),
+    'CHAT_CACHE_SIZE': '0',
+    'TRANSLATION_CACHE_PATH': '',
+    'TRANSLATION_PREWARM_LANGS': '',
+    'OLLAMA_HOST': _stub.url,
+})
+
+from sqlalchemy import insert  # noqa: E402
+
+import app as app_module  # noqa: E402
+from benchmarks.bench_encoder import random_answers  # noqa: E402
+from benchmarks.load_test import random_frontend_answers  # noqa: E402
+from benchmarks.write_load import random_result_row  # noqa: E402
+from bot.bot_backend import chat  # noqa: E402
+from recommendations import RECOMMENDATIONS, get_sleep_recommendations  # noqa: E402
+
+DEFAULT_THRESHOLD = 0.20
+BATCH_SIZE = 256
+RESULT_COUNTS = (10, 100, 1000)
+
+
+def measure(func, iterations, rounds=5, items=1):
+    """Run ``func`` ``iterations`` times per round; summary of the per-call time of each round"""
+    iterations = max(1, int(iterations))
+    func()  # warm up caches and lazily built state
+    per_call = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        per_call.append((time.perf_counter() - start) / iterations)
+    median = statistics.median(per_call)
+    return {
+        'median_us': round(median * 1e6, 2),
+        'min_us': round(min(per_call) * 1e6, 2),
+        'max_us': round(max(per_call) * 1e6, 2),
+        'items_per_call': items,
+        'items_per_sec': round(items / median, 1),
+        'iterations': iterations,
+        'rounds': rounds,
+    }
+
+
+def predictor_benchmarks(predictor, rng, scale):
+    answers = [random_answers(rng) for _ in range(BATCH_SIZE)]
+    single = itertools.cycle(answers).__next__
+    yield 'predictor.single', measure(lambda: predictor.predict_sleep_score(single()), 500 * scale)
+    yield f'predictor.batch_{BATCH_SIZE}', measure(lambda: predictor.predict_batch(answers), 5 * scale,
+                                                   items=BATCH_SIZE)
+
+
+def encode_benchmarks(predictor, rng, scale):
+    answers = [random_answers(rng) for _ in range(1000)]
+    yield 'encode_features.single', measure(lambda: predictor.encode_features(answers[0]), 2000 * scale)
+    yield 'encode_features.batch_1000', measure(lambda: predictor.encode_features(answers), 5 * scale, items=1000)
+
+
+def recommendation_benchmarks(rng, scale):
+    cases = [(age_group, rng.uniform(20, 55), rng.uniform(0, 100))
+             for age_group in RECOMMENDATIONS for _ in range(25)]
+    next_case = itertools.cycle(cases).__next__
+    yield 'recommendations.text', measure(lambda: get_sleep_recommendations(*next_case()), 1000 * scale)
+    yield 'recommendations.structured', measure(
+        lambda: get_sleep_recommendations(*next_case(), structured=True), 1000 * scale)
+
+
+def create_user(connection, email):
+    result = connection.execute(insert(app_module.User.__table__),
+                                {'name': 'bench', 'email': email, 'password_hash': '-'})
+    return result.inserted_primary_key[0]
+
+
+def api_benchmarks(rng, scale):
+    db = app_module.db
+    client = app_module.app.test_client()
+    with app_module.app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            create_user(connection, 'predict@example.com')
+            for count in RESULT_COUNTS:
+                user_id = create_user(connection, f'results{count}@example.com')
+                rows = []
+                for i in range(count):
+                    row = random_result_row(rng)
+                    row.update(user_id=user_id, timestamp=datetime(2024, 1, 1, 0, i // 60 % 60, i % 60))
+                    rows.append(row)
+                connection.execute(insert(app_module.QuizResult.__table__), rows)
+
+    payloads = [{'email': 'predict@example.com', 'answers': random_frontend_answers(rng)} for _ in range(100)]
+    next_payload = itertools.cycle(payloads).__next__
+
+    def predict():
+        response = client.post('/api/predict', json=next_payload())
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    yield 'api.predict', measure(predict, 100 * scale)
+
+    for count in RESULT_COUNTS:
+        def results(count=count):
+            response = client.get(f'/api/results/results{count}@example.com')
+            assert len(response.get_json()['results']) == count
+
+        yield f'api.results_{count}', measure(results, max(2, 2000 * scale / count), items=count)
+
+
+def chat_benchmarks(rng, scale):
+    messages = ['How can I fall asleep faster?', 'Is a short nap in the afternoon okay?',
+                'What should I eat before bed?', 'Hello there']
+    next_message = itertools.cycle(messages).__next__
+    yield 'chat.reply', measure(lambda: chat(next_message(), 'benchmark'), 50 * scale)
+
+
+BENCHMARKS = ('predictor', 'encode', 'recommendations', 'api', 'chat')
+
+
+def run(only=None, quick=False):
+    scale = 0.1 if quick else 1
+    selected = set(only or BENCHMARKS)
+    rng = random.Random(42)
+
+    predictor = app_module.model_registry.predictor
+    if selected & {'predictor', 'encode', 'api'} and not predictor.wait_until_ready(60):
+        raise SystemExit(f"❌ Could not load model: {predictor.load_error}")
+
+    groups = {
+        'predictor': lambda: predictor_benchmarks(predictor, rng, scale),
+        'encode': lambda: encode_benchmarks(predictor, rng, scale),
+        'recommendations': lambda: recommendation_benchmarks(rng, scale),
+        'api': lambda: api_benchmarks(rng, scale),
+        'chat': lambda: chat_benchmarks(rng, scale),
+    }
+    results = {}
+    for group in BENCHMARKS:
+        if group not in selected:
+            continue
+        for name, result in groups[group]():
+            results[name] = result
+            print(f"{name:<30} {result['median_us']:12.1f} µs/call   {result['items_per_sec']:12.1f} items/s")
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """``(name, baseline µs, current µs, ratio, regressed)`` for benchmarks present in both runs"""
+    rows = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratio = result['median_us'] / before['median_us']
+        rows.append((name, before['median_us'], result['median_us'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON file from an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='slowdown ratio counted as a regression (default 0.2 = 20%%)')
+    parser.add_argument('--only', help=f"comma-separated groups out of {','.join(BENCHMARKS)}")
+    parser.add_argument('--quick', action='store_true', help='fewer iterations, for a smoke run')
+    args = parser.parse_args()
+
+    only = [group.strip() for group in args.only.split(',')] if args.only else None
+    unknown = set(only or ()) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark groups: {', '.join(sorted(unknown))}")
+
+    try:
+        results = run(only, args.quick)
+    finally:
+        _stub.stop()
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+        print(f"✅ Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)['results']
+        regressions = 0
+        for name, before, after, ratio, regressed in compare(results, baseline, args.threshold):
+            regressions += regressed
+            flag = '🚨 REGRESSION' if regressed else ('✅ faster' if ratio < 1 - args.threshold else '')
+            print(f"{name:<30} {before:12.1f} → {after:12.1f} µs   {ratio:6.2f}x  {flag}")
+        if regressions:
+            print(f"❌ {regressions} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == '__main__':
+    main()
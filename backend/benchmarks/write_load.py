@@ -0,0 +1,103 @@
+"""Load test: per-request commits vs the write-behind queue for saving quiz results.
+
+Inserts ``--requests`` quiz_result rows from ``--concurrency`` threads into a
+temporary SQLite database with each RESULTS_DURABILITY mode and reports
+p50/p99 latency and throughput. ``async`` latencies only cover queueing; the
+time to drain the queue afterwards is printed separately.
+
+Run from the backend directory:
+    python -m benchmarks.write_load --concurrency 16
+    python -m benchmarks.load_test --url http://localhost:5000 --email you@example.com
+        # the whole endpoint, against servers started with each RESULTS_DURABILITY
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault('MODEL_BACKGROUND_LOAD', '0')
+
+from sqlalchemy import create_engine, insert
+
+from app import QuizResult, User, db
+from benchmarks.load_test import print_stats, run_load
+from persistence import WriteBehindQueue
+from questions import QUESTIONS, pack_answers
+from recommendations import recommendation_template
+
+
+def random_result_row(rng):
+    answers = {q['question']: rng.choice(q['options']) for q in QUESTIONS}
+    effectiveness = rng.uniform(0, 100)
+    template_id, tenths = recommendation_template('19–30 (young adults)', effectiveness)
+    return {
+        'user_id': 1,
+        'answers': '',
+        'answers_packed': pack_answers(answers),
+        'sleep_score': round(rng.uniform(20, 55), 2),
+        'effectiveness_percentage': round(effectiveness, 2),
+        'recommendations': '',
+        'recommendation_template': template_id,
+        'recommendation_effectiveness': tenths,
+        'model_version': 'benchmark',
+    }
+
+
+def fresh_engine(directory, mode):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, mode + '.db')}")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__), {'name': 'bench', 'email': 'bench@example.com',
+                                                    'password_hash': '-'})
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--max-batch', type=int, default=100)
+    parser.add_argument('--max-wait-ms', type=float, default=50, help='flush interval for async mode')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rows = [random_result_row(rng) for _ in range(args.requests)]
+    table = QuizResult.__table__
+
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ('sync', 'batched', 'async'):
+            engine = fresh_engine(directory, mode)
+
+            def insert_rows(batch):
+                with engine.begin() as connection:
+                    connection.execute(insert(table), batch)
+
+            def with_timestamp(row):
+                return {**row, 'timestamp': datetime.utcnow()}
+
+            if mode == 'sync':
+                stats = run_load(lambda row: insert_rows([with_timestamp(row)]), rows, args.concurrency)
+                print_stats(mode, stats)
+            else:
+                max_delay = args.max_wait_ms / 1000 if mode == 'async' else 0
+                writer = WriteBehindQueue(insert_rows, max_batch=args.max_batch, max_delay=max_delay)
+                if mode == 'batched':
+                    save = lambda row: writer.submit(with_timestamp(row)).result()
+                else:
+                    save = lambda row: writer.submit(with_timestamp(row))
+                stats = run_load(save, rows, args.concurrency)
+                drain_started = time.perf_counter()
+                writer.close()
+                print_stats(mode, stats)
+                print(f"{'':<28} drained in {time.perf_counter() - drain_started:.3f} s   {writer.stats()}")
+
+            with engine.connect() as connection:
+                count = connection.exec_driver_sql('SELECT COUNT(*) FROM quiz_result').scalar()
+            assert count == len(rows), f"{mode}: {count} of {len(rows)} rows written"
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,100 @@
 # bot/bot.py
-from flask import Blueprint, request, jsonify
-from .bot_backend import chat
-from deep_translator import GoogleTranslator
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import itertools
+import json
+import secrets
+from . import bot_backend
+from .bot_backend import chat, chat_stream
+from .ollama_client import OllamaBusy
 
 bot_bp = Blueprint('bot', __name__)
 
+def sse_events(tokens, **done_fields):
+    """Server-Sent Events: one ``data`` event per token, then a ``done`` event with the full reply"""
+    parts = []
+    try:
+        for token in tokens:
+            parts.append(token)
+            yield f"data: {json.dumps({'token': token})}\n\n"
+        yield f"event: done\ndata: {json.dumps({'reply': ''.join(parts), **done_fields})}\n\n"
+    finally:
+        # Werkzeug closes the response when the client disconnects; pass that on to the reply generator
+        if hasattr(tokens, 'close'):
+            tokens.close()
+
+def prepend(first, tokens):
+    """``first`` then ``tokens``; closing it closes ``tokens``"""
+    try:
+        yield from first
+        yield from tokens
+    finally:
+        tokens.close()
+
+def chat_session_id():
+    """The ``session_id`` from the body or X-Chat-Session header, or a new one"""
+    session_id = request.json.get("session_id") or request.headers.get("X-Chat-Session")
+    if isinstance(session_id, str) and 0 < len(session_id) <= 128:
+        return session_id
+    return secrets.token_urlsafe(16)
+
 @bot_bp.route("/api/chat", methods=["POST"])
 def handle_message():
+    """Reply to a chat message; with ``"stream": true`` (or ``?stream=1``) stream it as Server-Sent Events.
+
+    The reply carries the ``session_id`` whose history was used; send it back
+    to continue the same conversation.
+    """
     user_input = request.json.get("message")
-    bot_response = chat(user_input)
-    return jsonify({"reply": bot_response})
+    session_id = chat_session_id()
+    try:
+        if request.json.get("stream") or request.args.get("stream") == "1":
+            tokens = chat_stream(user_input, session_id)
+            # Wait for the first token here so a full queue still gets a 429/503 status
+            first = list(itertools.islice(tokens, 1))
+            return Response(
+                stream_with_context(sse_events(prepend(first, tokens), session_id=session_id)),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Chat-Session": session_id},
+            )
+        bot_response = chat(user_input, session_id)
+    except OllamaBusy as e:
+        response = jsonify({"error": str(e)})
+        response.headers["Retry-After"] = "5"
+        return response, e.status
+    return jsonify({"reply": bot_response, "session_id": session_id})
+
+MAX_TRANSLATION_BATCH = 100
+
+def translation_failed(e):
+    return jsonify({"error": f"Translation failed: {e}"}), 502
 
 @bot_bp.route("/api/translate", methods=["POST"])
 def handle_translation():
     data = request.json
     text = data.get("message")
     lang = data.get("lang")
-    translator = GoogleTranslator(source='auto', target=lang)
-    translated = translator.translate(text)
+    if not isinstance(text, str) or not isinstance(lang, str) or not lang:
+        return jsonify({"error": "message and lang are required"}), 400
+    try:
+        translated = bot_backend.translator.translate(text, lang)
+    except Exception as e:
+        return translation_failed(e)
     return jsonify({'translated_text': translated})
+
+@bot_bp.route("/api/translate/batch", methods=["POST"])
+def handle_batch_translation():
+    """Translate a list of strings in one call: ``{"messages": [...], "lang": "hi"}``"""
+    data = request.json
+    texts = data.get("messages")
+    lang = data.get("lang")
+    if not isinstance(lang, str) or not lang:
+        return jsonify({"error": "lang is required"}), 400
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return jsonify({"error": "messages must be a list of strings"}), 400
+    if len(texts) > MAX_TRANSLATION_BATCH:
+        return jsonify({"error": f"At most {MAX_TRANSLATION_BATCH} messages per request"}), 400
+    try:
+        translated = bot_backend.translator.translate_many(texts, lang)
+    except Exception as e:
+        return translation_failed(e)
+    return jsonify({'translations': translated})
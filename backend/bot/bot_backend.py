@@ -1,91 +1,199 @@
-import ollama
+import atexit
+import hashlib
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 import threading
 import time
 
-# Global cache for conversation history
-_conversation_cache = []
-_cache_file = 'data.json'
-_last_save_time = 0
-_save_lock = threading.Lock()
+from .history import ConversationStore
+from .journal import HistoryJournal
+from .keywords import sleep_matcher
+from .ollama_client import OllamaBusy, OllamaClient
+from .response_cache import ResponseCache
+from .translation import Translator, static_texts
 
-def load_conversation_history():
-    """Load conversation history from file with error handling"""
-    global _conversation_cache
+OLLAMA_MODEL = 'gemma:2b'
+
+# Maximum speed settings for gemma:2b on your system
+OLLAMA_OPTIONS = {
+    'temperature': 0.5,
+    'top_p': 0.9,
+    'top_k': 40,
+    'num_predict': 150,  # Allow much longer responses
+    # No stop tokens!
+    'repeat_penalty': 1.1,
+    'seed': 42,
+    'num_ctx': 512,
+    'num_thread': 6,
+    'num_gpu': 0,
+    'num_batch': 16,
+    'num_keep': 0,
+    'tfs_z': 0.5,
+    'typical_p': 0.5,
+    'repeat_last_n': 10,
+    'mirostat': 0,
+    'mirostat_tau': 0.0,
+    'mirostat_eta': 0.0,
+}
+
+# One pooled client for every chat request. OLLAMA_MAX_CONCURRENT generations run
+# at once; up to OLLAMA_MAX_QUEUE more wait OLLAMA_QUEUE_TIMEOUT seconds for a turn
+ollama_client = OllamaClient(
+    host=os.environ.get('OLLAMA_HOST') or None,
+    max_concurrent=int(os.environ.get('OLLAMA_MAX_CONCURRENT', '1')),
+    max_queue=int(os.environ.get('OLLAMA_MAX_QUEUE', '16')),
+    queue_timeout=float(os.environ.get('OLLAMA_QUEUE_TIMEOUT', '60')),
+)
+
+ERROR_REPLY = "Sorry, I'm having trouble. Make sure, your model is running."
+
+class ChatMetrics:
+    """Time to first token and total generation time of streamed replies"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.completed = 0
+        self.failed = 0
+        self.aborted = 0
+        self.first_token_seconds = 0.0
+        self.max_first_token_seconds = 0.0
+        self.last_first_token_seconds = None
+        self.generation_seconds = 0.0
+
+    def record_first_token(self, seconds):
+        with self._lock:
+            self.streams += 1
+            self.first_token_seconds += seconds
+            self.max_first_token_seconds = max(self.max_first_token_seconds, seconds)
+            self.last_first_token_seconds = seconds
+
+    def record_completion(self, seconds, failed=False, aborted=False):
+        """Count a finished stream; ``aborted`` when the client went away before the end"""
+        with self._lock:
+            if failed:
+                self.failed += 1
+            elif aborted:
+                self.aborted += 1
+            else:
+                self.completed += 1
+                self.generation_seconds += seconds
+
+    def stats(self):
+        with self._lock:
+            return {
+                'streams': self.streams,
+                'completed': self.completed,
+                'failed': self.failed,
+                'aborted': self.aborted,
+                'mean_time_to_first_token_ms': round(self.first_token_seconds / self.streams * 1000, 1) if self.streams else None,
+                'max_time_to_first_token_ms': round(self.max_first_token_seconds * 1000, 1),
+                'last_time_to_first_token_ms': round(self.last_first_token_seconds * 1000, 1) if self.last_first_token_seconds is not None else None,
+                'mean_generation_ms': round(self.generation_seconds / self.completed * 1000, 1) if self.completed else None,
+            }
+
+chat_metrics = ChatMetrics()
+
+# Conversation history per chat session; the least recently active sessions
+# are dropped beyond CHAT_MAX_SESSIONS
+DEFAULT_SESSION = 'default'
+conversation_store = ConversationStore(
+    max_exchanges=int(os.environ.get('CHAT_HISTORY_EXCHANGES', '10')),
+    max_sessions=int(os.environ.get('CHAT_MAX_SESSIONS', '1000')),
+)
+# Replies to messages without history, by normalized message and prompt variant.
+# CHAT_CACHE_PATH keeps them in a SQLite file across restarts.
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('CHAT_CACHE_SIZE', '1000')),
+    ttl=float(os.environ.get('CHAT_CACHE_TTL', str(24 * 3600))),
+    path=os.environ.get('CHAT_CACHE_PATH') or None,
+    namespace=hashlib.sha256(json.dumps([OLLAMA_MODEL, OLLAMA_OPTIONS], sort_keys=True).encode()).hexdigest()[:16],
+)
+
+# Every exchange is appended to a JSON-lines journal by one writer thread;
+# data.json is only read, to import history saved by older versions
+CHAT_JOURNAL = os.environ.get('CHAT_JOURNAL', 'chat_history.jsonl')
+_legacy_file = 'data.json'
+history_journal = HistoryJournal(
+    CHAT_JOURNAL, conversation_store,
+    compact_after=int(os.environ.get('CHAT_JOURNAL_COMPACT_AFTER', '1000')),
+)
+atexit.register(history_journal.close)
+
+# Translations by (text, target language), kept in TRANSLATION_CACHE_PATH across restarts.
+# Quiz questions and recommendation texts are pre-translated into TRANSLATION_PREWARM_LANGS.
+translator = Translator(
+    path=os.environ.get('TRANSLATION_CACHE_PATH', 'translation_cache.sqlite') or None,
+    max_entries=int(os.environ.get('TRANSLATION_CACHE_SIZE', '20000')),
+)
+TRANSLATION_PREWARM_LANGS = [lang.strip() for lang in os.environ.get('TRANSLATION_PREWARM_LANGS', '').split(',')
+                             if lang.strip()]
+
+def load_legacy_history():
+    """Sessions from an old data.json, or {} if there is none"""
     try:
-        if os.path.exists(_cache_file):
-            with open(_cache_file, 'r') as file:
-                data = json.load(file)
-                _conversation_cache = data if isinstance(data, list) else []
-        else:
-            _conversation_cache = []
+        with open(_legacy_file, 'r') as file:
+            data = json.load(file)
     except (json.JSONDecodeError, FileNotFoundError):
-        _conversation_cache = []
+        return {}
+    if isinstance(data, list):
+        # Files from before sessions hold one shared history
+        data = {DEFAULT_SESSION: data}
+    return data if isinstance(data, dict) else {}
 
-def save_conversation_history_async():
-    """Save conversation history asynchronously without blocking"""
-    global _last_save_time, _conversation_cache
-    current_time = time.time()
-    
-    # Only save if 5 seconds have passed since last save
-    if current_time - _last_save_time > 5:
-        with _save_lock:
-            try:
-                with open(_cache_file, 'w') as file:
-                    json.dump(_conversation_cache, file, indent=2)
-                _last_save_time = current_time
-                print(f"Saved conversation history with {len(_conversation_cache)} exchanges")
-            except Exception as e:
-                print(f"Error saving conversation: {e}")
+def load_conversation_history():
+    """Load conversation history from the journal, importing data.json the first time"""
+    if os.path.exists(CHAT_JOURNAL):
+        exchanges = history_journal.load()
+        print(f"Loaded {exchanges} chat exchanges from {CHAT_JOURNAL}")
+        return
+    legacy = load_legacy_history()
+    for session_id, history in legacy.items():
+        for exchange in history:
+            conversation_store.append(session_id, exchange)
+            history_journal.append(session_id, exchange)
+    if legacy:
+        history_journal.flush()
 
 def is_sleep_related(user_input: str) -> bool:
-    """Check if the user input is sleep-related"""
-    sleep_keywords = [
-        'sleep', 'bed', 'rest', 'tired', 'insomnia', 'wake', 'dream', 'nap',
-        'bedtime', 'night', 'morning', 'awake', 'drowsy', 'energy', 'fatigue',
-        'stress', 'anxiety', 'relax', 'calm', 'meditation', 'routine'
-    ]
-    user_input_lower = user_input.lower()
-    return any(keyword in user_input_lower for keyword in sleep_keywords)
+    """Check if the user input mentions any sleep keyword as a whole word"""
+    return sleep_matcher.matches(user_input)
+
+SYSTEM_PROMPTS = {
+    'sleep': (
+        "You are a friendly sleep coach. Give helpful, detailed sleep advice. "
+        "Be concise but provide enough information to fully answer the user's question."
+    ),
+    # More neutral, general assistant prompt
+    'general': (
+        "You are a helpful, friendly AI assistant. "
+        "If the user greets you, greet them back. "
+        "If the user asks about sleep, provide sleep advice. "
+        "Otherwise, answer their question or respond appropriately, giving as much detail as needed."
+    ),
+}
+
+def prompt_variant(user_input: str) -> str:
+    """Key into SYSTEM_PROMPTS for the user input"""
+    return 'sleep' if is_sleep_related(user_input) else 'general'
 
 def get_system_prompt(user_input: str) -> str:
     """Get appropriate system prompt based on user input"""
-    if is_sleep_related(user_input):
-        return (
-            "You are a friendly sleep coach. Give helpful, detailed sleep advice. "
-            "Be concise but provide enough information to fully answer the user's question."
-        )
-    else:
-        # More neutral, general assistant prompt
-        return (
-            "You are a helpful, friendly AI assistant. "
-            "If the user greets you, greet them back. "
-            "If the user asks about sleep, provide sleep advice. "
-            "Otherwise, answer their question or respond appropriately, giving as much detail as needed."
-        )
-
-def chat(user_input: str) -> str:
-    """
-    Smart response generation that adapts to user input while maintaining speed
-    """
-    global _conversation_cache
-    
-    # Load conversation history once
-    if not _conversation_cache:
-        load_conversation_history()
-    
+    return SYSTEM_PROMPTS[prompt_variant(user_input)]
+
+def build_messages(user_input: str, session_id: str = DEFAULT_SESSION, variant: Optional[str] = None):
+    """The user message and the full prompt (system prompt, recent history, message) for Ollama"""
     user_msg = {
         "role": "user",
         "content": user_input
     }
 
     # Use last 3 exchanges for better context
-    recent_history = _conversation_cache[-3:] if len(_conversation_cache) > 3 else _conversation_cache
+    recent_history = conversation_store.recent(session_id, 3)
     
     # Get appropriate system prompt based on user input
-    system_prompt = get_system_prompt(user_input)
+    system_prompt = SYSTEM_PROMPTS[variant or prompt_variant(user_input)]
     
     # Build minimal messages array
     messages = [
@@ -101,51 +209,92 @@ def chat(user_input: str) -> str:
     
     # Add current message
     messages.append(user_msg)
+    return user_msg, messages
 
-    try:
-        # Maximum speed settings for gemma:2b on your system
-        response = ollama.chat(
-            model='gemma:2b',
-            messages=messages,
-            options={
-                'temperature': 0.5,
-                'top_p': 0.9,
-                'top_k': 40,
-                'num_predict': 150,  # Allow much longer responses
-                # No stop tokens!
-                'repeat_penalty': 1.1,
-                'seed': 42,
-                'num_ctx': 512,
-                'num_thread': 6,
-                'num_gpu': 0,
-                'num_batch': 16,
-                'num_keep': 0,
-                'tfs_z': 0.5,
-                'typical_p': 0.5,
-                'repeat_last_n': 10,
-                'mirostat': 0,
-                'mirostat_tau': 0.0,
-                'mirostat_eta': 0.0,
-            }
-        )
+def remember_exchange(session_id: str, user_msg: Dict[str, Any], reply: str):
+    """Append a finished exchange to the session's history (capped at its last CHAT_HISTORY_EXCHANGES)"""
+    exchange = [user_msg, {"role": "assistant", "content": reply}]
+    conversation_store.append(session_id, exchange)
+    history_journal.append(session_id, exchange)
 
-        assistant_msg = response['message']
-        
-        # Update cache
-        _conversation_cache.append([user_msg, assistant_msg])
-        
-        # Keep only last 10 conversations to maintain some context
-        if len(_conversation_cache) > 10:
-            _conversation_cache = _conversation_cache[-10:]
-        
-        # Save asynchronously without blocking
-        threading.Thread(target=save_conversation_history_async, daemon=True).start()
+def chat(user_input: str, session_id: str = DEFAULT_SESSION) -> str:
+    """
+    Smart response generation that adapts to user input while maintaining speed
+    """
+    variant = prompt_variant(user_input)
+    user_msg, messages = build_messages(user_input, session_id, variant)
+    # Without history the reply depends only on the message and the prompt
+    cacheable = len(messages) == 2
+
+    cached = response_cache.get(variant, user_input) if cacheable else None
+    if cached is not None:
+        remember_exchange(session_id, user_msg, cached)
+        return cached
 
-        return assistant_msg['content']
+    try:
+        response = ollama_client.chat(model=OLLAMA_MODEL, messages=messages, options=OLLAMA_OPTIONS)
+        reply = response['message']['content']
+        remember_exchange(session_id, user_msg, reply)
+        if cacheable:
+            response_cache.set(variant, user_input, reply)
+        return reply
         
+    except OllamaBusy:
+        raise
     except Exception as e:
         print(f"Error generating response: {e}")
-        return "Sorry, I'm having trouble. Make sure, your model is running."
+        return ERROR_REPLY
+
+def chat_stream(user_input: str, session_id: str = DEFAULT_SESSION) -> Iterator[str]:
+    """
+    Like chat(), but yields the reply piece by piece as Ollama generates it.
+    The exchange is added to the history once the reply is complete.
+    """
+    variant = prompt_variant(user_input)
+    user_msg, messages = build_messages(user_input, session_id, variant)
+    cacheable = len(messages) == 2
+
+    cached = response_cache.get(variant, user_input) if cacheable else None
+    if cached is not None:
+        remember_exchange(session_id, user_msg, cached)
+        yield cached
+        return
+
+    started = time.perf_counter()
+    parts = []
+    # Closing the generator (the client disconnected) leaves the outcome 'aborted'
+    outcome = 'aborted'
+
+    try:
+        for chunk in ollama_client.chat(model=OLLAMA_MODEL, messages=messages, options=OLLAMA_OPTIONS, stream=True):
+            token = chunk['message']['content']
+            if not token:
+                continue
+            if not parts:
+                chat_metrics.record_first_token(time.perf_counter() - started)
+            parts.append(token)
+            yield token
+        outcome = 'completed'
+    except OllamaBusy:
+        outcome = None
+        raise
+    except Exception as e:
+        print(f"Error generating response: {e}")
+        outcome = 'failed'
+        if not parts:
+            yield ERROR_REPLY
+        return
+    finally:
+        if outcome is not None:
+            chat_metrics.record_completion(time.perf_counter() - started,
+                                           failed=outcome == 'failed', aborted=outcome == 'aborted')
+
+    reply = ''.join(parts)
+    remember_exchange(session_id, user_msg, reply)
+    if cacheable:
+        response_cache.set(variant, user_input, reply)
 
 # Initialize conversation history on module load
 load_conversation_history()
+if TRANSLATION_PREWARM_LANGS:
+    translator.warm_async(static_texts(), TRANSLATION_PREWARM_LANGS)
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+Exchange = List[Dict[str, Any]]  # [user message, assistant message]
+
+
+class ConversationStore:
+    """Conversation history per chat session, bounded in both directions.
+
+    Each session keeps its last ``max_exchanges`` exchanges, and at most
+    ``max_sessions`` sessions are held: adding to a new session evicts the
+    one used least recently. All access goes through one lock, so concurrent
+    requests never see a half-updated history.
+    """
+
+    def __init__(self, max_exchanges=10, max_sessions=1000):
+        self.max_exchanges = max_exchanges
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, List[Exchange]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def recent(self, session_id: str, count: int) -> List[Exchange]:
+        """The last ``count`` exchanges of a session, oldest first"""
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if history is None:
+                return []
+            self._sessions.move_to_end(session_id)
+            return list(history[-count:]) if count > 0 else []
+
+    def append(self, session_id: str, exchange: Exchange):
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if history is None:
+                history = self._sessions[session_id] = []
+            self._sessions.move_to_end(session_id)
+            history.append(exchange)
+            del history[:-self.max_exchanges]
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def snapshot(self) -> Dict[str, List[Exchange]]:
+        """A copy of every session's history, least recently used first"""
+        with self._lock:
+            return {session_id: list(history) for session_id, history in self._sessions.items()}
+
+    def restore(self, sessions: Dict[str, List[Exchange]]):
+        """Replace the held sessions, e.g. with a snapshot loaded from disk"""
+        with self._lock:
+            self._sessions = OrderedDict(
+                (session_id, list(history)[-self.max_exchanges:]) for session_id, history in sessions.items()
+            )
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'max_exchanges': self.max_exchanges,
+                'evictions': self.evictions,
+            }
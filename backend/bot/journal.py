@@ -0,0 +1,109 @@
+import json
+import os
+
+from persistence import WriteBehindQueue
+
+from .history import ConversationStore
+
+_COMPACT = object()
+
+
+class HistoryJournal:
+    """Append-only JSON-lines journal of chat exchanges.
+
+    Each line is ``{"session": ..., "exchange": [user, assistant]}``. One
+    writer thread appends queued lines in batches, so a chat turn costs a
+    queue put instead of a thread spawn and a rewrite of the whole file.
+    After ``compact_after`` appended lines the writer replays the file into a
+    scratch store with the same limits, dropping trimmed and evicted history,
+    and writes the result to a temporary file that atomically replaces the
+    journal.
+    """
+
+    def __init__(self, path, store, compact_after=1000, max_batch=100, flush_interval=0.2):
+        self.path = path
+        self.store = store
+        self.compact_after = compact_after
+        self.appended_since_compaction = 0
+        self.compactions = 0
+        self._writer = WriteBehindQueue(self._write_lines, max_batch=max_batch, max_delay=flush_interval,
+                                        name='chat-journal')
+
+    def load(self):
+        """Replay the journal into the store; returns the number of exchanges read.
+
+        A line cut short by a crash is dropped and trimmed off the file so new
+        appends start on a clean line.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            print(f"⚠️ Dropping a partial line at the end of {self.path}")
+            with open(self.path, 'r+b') as file:
+                file.truncate(complete)
+
+        return self._replay(data[:complete], self.store)
+
+    @staticmethod
+    def _replay(data, store):
+        exchanges = 0
+        for line in data.splitlines():
+            try:
+                entry = json.loads(line)
+                store.append(entry['session'], entry['exchange'])
+            except (ValueError, KeyError, TypeError):
+                continue
+            exchanges += 1
+        return exchanges
+
+    def append(self, session_id, exchange):
+        """Queue an exchange for the writer thread"""
+        self._writer.submit(json.dumps({'session': session_id, 'exchange': exchange}))
+
+    def _write_lines(self, items):
+        lines = [item for item in items if item is not _COMPACT]
+        if lines:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write('\n'.join(lines) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+            self.appended_since_compaction += len(lines)
+        if len(lines) < len(items) or self.appended_since_compaction >= self.compact_after:
+            self._compact()
+
+    def _compact(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        scratch = ConversationStore(max_exchanges=self.store.max_exchanges, max_sessions=self.store.max_sessions)
+        self._replay(data, scratch)
+
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            for session_id, history in scratch.snapshot().items():
+                for exchange in history:
+                    file.write(json.dumps({'session': session_id, 'exchange': exchange}) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        self.appended_since_compaction = 0
+        self.compactions += 1
+
+    def compact(self):
+        """Compact the journal now, after any queued appends"""
+        self._writer.submit(_COMPACT).result()
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self):
+        """Write queued exchanges and stop the writer thread"""
+        self._writer.close()
+
+    def stats(self):
+        return {**self._writer.stats(), 'compactions': self.compactions,
+                'appended_since_compaction': self.appended_since_compaction}
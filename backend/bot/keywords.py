@@ -0,0 +1,107 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Endings that attach to any keyword ("naps", "restless", "sleeplessness")
+_CONSONANT_SUFFIXES = ('s', 'ly', 'less', 'lessly', 'lessness', 'ness', 'ful', 'fully', 'fulness')
+# Endings that drop a final "e" ("meditating") or double a short keyword's last consonant ("napped")
+_VOWEL_SUFFIXES = ('ing', 'ings', 'ed', 'er', 'ers', 'y', 'ily', 'iness', 'ation', 'ations', 'ion')
+_VOWELS = 'aeiou'
+
+# ASCII text is split on everything but letters by translating it to spaces, which is
+# much cheaper than a regex split; other text falls back to the regex
+_SEPARATORS = str.maketrans({chr(code): ' ' for code in range(128) if not chr(code).islower()})
+_NON_LETTERS = re.compile('[^a-z]+')
+
+
+def _word_forms(keyword: str) -> set:
+    """``keyword`` and its regular inflections, spelled out"""
+    forms = {keyword}
+    forms.update(keyword + suffix for suffix in _CONSONANT_SUFFIXES)
+    if keyword.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        forms.add(keyword + 'es')
+    if keyword.endswith('e'):
+        stem = keyword[:-1]
+    elif (len(keyword) <= 4 and keyword[-1] not in _VOWELS + 'wxy' and keyword[-2] in _VOWELS
+          and keyword[-3] not in _VOWELS):
+        stem = keyword + keyword[-1]
+    else:
+        stem = keyword
+    forms.update(stem + suffix for suffix in _VOWEL_SUFFIXES)
+    if keyword.endswith('y') and keyword[-2] not in _VOWELS:
+        # "drowsy" -> "drowsiness", "energy" -> "energies"
+        forms.update(keyword[:-1] + 'i' + suffix for suffix in ('es', 'ed', 'er', 'ly', 'ness'))
+    return forms
+
+
+def _words(text: str) -> List[str]:
+    """The lowercase runs of letters a-z in ``text``"""
+    text = text.lower()
+    if text.isascii():
+        return text.translate(_SEPARATORS).split()
+    return _NON_LETTERS.split(text)
+
+
+class KeywordMatcher:
+    """Whole-word keyword matching over weighted categories with set lookups.
+
+    ``categories`` maps a category name to ``(weight, keywords)``. Every
+    keyword is expanded into its word forms ("rest", "rests", "restless",
+    "rested", ...) once, so matching a text is one split into words and a
+    dictionary lookup per word: "rest" matches "restless" but not
+    "interest", and "nap" matches "napped" but not "napes". A keyword may
+    belong to one category only.
+    """
+
+    def __init__(self, categories: Dict[str, tuple]):
+        self.categories = categories
+        self.weights = {name: weight for name, (weight, _) in categories.items()}
+        self._category_of = {}
+        for name, (_, keywords) in categories.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword in self._category_of:
+                    raise ValueError(f"Keyword {keyword!r} is in both {self._category_of[keyword]!r} and {name!r}")
+                self._category_of[keyword] = name
+        # word form -> keyword; a form that is itself a keyword stays that keyword
+        self._keyword_of = {}
+        for keyword in self._category_of:
+            for form in _word_forms(keyword):
+                self._keyword_of.setdefault(form, keyword)
+        self._keyword_of.update((keyword, keyword) for keyword in self._category_of)
+
+    def matches(self, text: str) -> bool:
+        """Whether any keyword occurs as a whole word"""
+        return not self._keyword_of.keys().isdisjoint(_words(text))
+
+    def find(self, text: str) -> Iterable[tuple]:
+        """``(keyword, category)`` for every occurrence, in order"""
+        keyword_of = self._keyword_of
+        for word in _words(text):
+            keyword = keyword_of.get(word)
+            if keyword is not None:
+                yield keyword, self._category_of[keyword]
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Summed weight of the keyword occurrences per category, for categories that occur"""
+        scores: Dict[str, float] = {}
+        for _, category in self.find(text):
+            scores[category] = scores.get(category, 0.0) + self.weights[category]
+        return scores
+
+    def best_category(self, text: str) -> Optional[str]:
+        """The highest-scoring category, or None when no keyword occurs"""
+        scores = self.scores(text)
+        return max(scores, key=scores.get) if scores else None
+
+
+# Weights rank how strongly a word points at a sleep question; any match still
+# counts as sleep-related, the weights are there for finer prompt selection.
+SLEEP_KEYWORDS = {
+    'sleep': (1.0, ['sleep', 'asleep', 'slept', 'insomnia', 'bed', 'bedtime', 'bedroom', 'dream', 'nightmare',
+                    'nap', 'napping', 'snore', 'snoring', 'drowsy', 'melatonin']),
+    'fatigue': (0.6, ['tired', 'fatigue', 'exhausted', 'rest', 'wake', 'waking', 'woke', 'awake', 'energy']),
+    'wellbeing': (0.4, ['stress', 'anxiety', 'anxious', 'relax', 'calm', 'meditate', 'meditation', 'routine']),
+    'time_of_day': (0.3, ['night', 'nighttime', 'morning']),
+}
+
+sleep_matcher = KeywordMatcher(SLEEP_KEYWORDS)
@@ -0,0 +1,180 @@
+import collections
+import threading
+import time
+
+import httpx
+import ollama
+
+from metrics import registry
+
+generation_latency = registry.histogram('ollama_generation_duration_seconds',
+                                        'Time from getting a generation slot to the end of the reply')
+queue_wait_latency = registry.histogram('ollama_queue_wait_duration_seconds', 'Time spent waiting for a generation slot')
+token_count = registry.counter('ollama_tokens_total', 'Tokens evaluated by Ollama, from the prompt or generated',
+                               labels=('kind',))
+
+
+class OllamaBusy(Exception):
+    """The generation queue is saturated; ``status`` is the HTTP status to answer with"""
+    status = 503
+
+
+class QueueFull(OllamaBusy):
+    status = 429
+
+
+class QueueTimeout(OllamaBusy):
+    status = 503
+
+
+class FairLimiter:
+    """Counting semaphore that admits waiters in arrival order, with a bounded wait queue"""
+
+    def __init__(self, max_concurrent, max_queue, timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self._waiters = collections.deque()
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def acquire(self):
+        with self._lock:
+            if self.active < self.max_concurrent and not self._waiters:
+                self.active += 1
+                return
+            if len(self._waiters) >= self.max_queue:
+                raise QueueFull('Too many chat requests are waiting, please retry shortly')
+            granted = threading.Event()
+            self._waiters.append(granted)
+
+        if granted.wait(self.timeout):
+            return
+        with self._lock:
+            if granted in self._waiters:
+                self._waiters.remove(granted)
+                raise QueueTimeout('Timed out waiting for the chat model, please retry shortly')
+        # The slot was handed over just as the wait timed out
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # Hand the slot straight to the longest waiter
+                self._waiters.popleft().set()
+            else:
+                self.active -= 1
+
+
+class OllamaClient:
+    """Ollama client with one persistent connection pool and bounded, queued concurrency.
+
+    At most ``max_concurrent`` generations run on the Ollama server at once;
+    running more only splits its CPU threads between them. Further requests
+    wait in FIFO order, up to ``max_queue`` of them for at most
+    ``queue_timeout`` seconds, and are otherwise refused with QueueFull or
+    QueueTimeout.
+    """
+
+    def __init__(self, host=None, max_concurrent=1, max_queue=16, queue_timeout=60.0, timeout=300.0, client=None):
+        self.limiter = FairLimiter(max_concurrent, max_queue, queue_timeout)
+        self._client = client or ollama.Client(
+            host=host,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrent, max_keepalive_connections=max_concurrent),
+        )
+        self._stats_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+        self.generation_seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def _acquire(self):
+        started = time.perf_counter()
+        try:
+            self.limiter.acquire()
+        except QueueFull:
+            with self._stats_lock:
+                self.rejected += 1
+            raise
+        except QueueTimeout:
+            with self._stats_lock:
+                self.timed_out += 1
+            raise
+        waited = time.perf_counter() - started
+        queue_wait_latency.observe(waited)
+        with self._stats_lock:
+            self.queue_wait_seconds += waited
+            self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, waited)
+        return time.perf_counter()
+
+    def _finish(self, started, failed, final=None):
+        """Release the slot; ``final`` is the response (or last streamed chunk) carrying token counts"""
+        self.limiter.release()
+        elapsed = time.perf_counter() - started
+        prompt_tokens = (final.get('prompt_eval_count') or 0) if final is not None else 0
+        completion_tokens = (final.get('eval_count') or 0) if final is not None else 0
+        if not failed:
+            generation_latency.observe(elapsed)
+            token_count.inc('prompt', amount=prompt_tokens)
+            token_count.inc('completion', amount=completion_tokens)
+        with self._stats_lock:
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+                self.generation_seconds += elapsed
+                self.prompt_tokens += prompt_tokens
+                self.completion_tokens += completion_tokens
+
+    def chat(self, **kwargs):
+        """``ollama.chat`` through the queue; waits for a slot, raising OllamaBusy if none frees up"""
+        if kwargs.get('stream'):
+            return self._stream(kwargs)
+        started = self._acquire()
+        response = None
+        try:
+            response = self._client.chat(**kwargs)
+            return response
+        finally:
+            self._finish(started, response is None, response)
+
+    def _stream(self, kwargs):
+        # Waits for the slot on the first next(), so an unstarted stream holds nothing
+        started = self._acquire()
+        failed = True
+        chunk = None
+        try:
+            for chunk in self._client.chat(**kwargs):
+                yield chunk
+            failed = False
+        finally:
+            # Also runs when the consumer stops early (client disconnected)
+            self._finish(started, failed, chunk)
+
+    def stats(self):
+        with self._stats_lock:
+            admitted = self.completed + self.failed
+            return {
+                'max_concurrent': self.limiter.max_concurrent,
+                'active': self.limiter.active,
+                'queued': self.limiter.queued,
+                'max_queue': self.limiter.max_queue,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'mean_queue_wait_ms': round(self.queue_wait_seconds / admitted * 1000, 1) if admitted else 0.0,
+                'max_queue_wait_ms': round(self.max_queue_wait_seconds * 1000, 1),
+                'mean_generation_ms': round(self.generation_seconds / self.completed * 1000, 1) if self.completed else 0.0,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+            }
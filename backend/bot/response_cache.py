@@ -0,0 +1,113 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_message(text: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation, so trivial variants share a key"""
+    return _WHITESPACE.sub(' ', text.lower()).strip().rstrip('?!. ')
+
+
+class ResponseCache:
+    """LRU cache of chatbot replies with a TTL and an optional SQLite file behind it.
+
+    Only replies generated without conversation history are cached: with the
+    fixed seed and options, the same prompt gives the same reply. The
+    ``namespace`` (model and options) is part of every key, so a persisted
+    file never serves replies produced under different settings.
+    """
+
+    def __init__(self, max_entries=1000, ttl=24 * 3600, path=None, namespace='', clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.namespace = namespace
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (reply, created)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db = None
+        if path and max_entries > 0:
+            self._open(path)
+
+    def _open(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS replies (key TEXT PRIMARY KEY, reply TEXT NOT NULL, '
+                         'created REAL NOT NULL)')
+        with self._db:
+            self._db.execute('DELETE FROM replies WHERE created < ?', (self._clock() - self.ttl,))
+            self._db.execute('DELETE FROM replies WHERE key NOT IN '
+                             '(SELECT key FROM replies ORDER BY created DESC LIMIT ?)', (self.max_entries,))
+        rows = self._db.execute('SELECT key, reply, created FROM replies WHERE key LIKE ? ORDER BY created',
+                                (self._key_prefix() + '%',)).fetchall()
+        for key, reply, created in rows:
+            self._entries[key] = (reply, created)
+
+    def _key_prefix(self):
+        return f'{self.namespace}|'
+
+    def key(self, variant: str, message: str) -> str:
+        return f'{self._key_prefix()}{variant}|{normalize_message(message)}'
+
+    def get(self, variant: str, message: str) -> Optional[str]:
+        if self.max_entries <= 0:
+            return None
+        key = self.key(variant, message)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] + self.ttl > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, variant: str, message: str, reply: str):
+        if self.max_entries <= 0:
+            return
+        key = self.key(variant, message)
+        created = self._clock()
+        with self._lock:
+            self._entries[key] = (reply, created)
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+                self.evictions += 1
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('INSERT OR REPLACE INTO replies VALUES (?, ?, ?)', (key, reply, created))
+                    self._db.executemany('DELETE FROM replies WHERE key = ?', [(k,) for k in evicted])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'persistent': self._db is not None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
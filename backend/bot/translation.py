@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from deep_translator import GoogleTranslator
+
+
+class GoogleBackend:
+    """deep_translator's GoogleTranslator, one instance per target language.
+
+    ``translate_batch`` is the library's list call, but deep_translator still
+    sends one request per text; the saving comes from the cache and from
+    sending each distinct text once.
+    """
+
+    def __init__(self):
+        self._translators = {}
+
+    def __call__(self, texts: List[str], lang: str) -> List[str]:
+        translator = self._translators.get(lang)
+        if translator is None:
+            translator = self._translators[lang] = GoogleTranslator(source='auto', target=lang)
+        return translator.translate_batch(texts)
+
+
+class Translator:
+    """Cached translation of (text, target language) pairs.
+
+    ``backend(texts, lang)`` translates a list of strings; only texts missing
+    from the cache reach it, each distinct text once per call; a text it
+    returns None for is given back untranslated and not cached. With ``path``
+    the cache is also written to a SQLite file (opened on first use, trimmed
+    to the ``max_entries`` most recently stored rows) and survives restarts.
+    """
+
+    def __init__(self, backend: Optional[Callable[[List[str], str], List[str]]] = None,
+                 path: Optional[str] = None, max_entries: int = 20000):
+        self.backend = backend or GoogleBackend()
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.backend_calls = 0
+
+    def _load(self):
+        """Open the cache file on first use (called with the lock held)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS translations (text TEXT NOT NULL, lang TEXT NOT NULL, '
+                         'translated TEXT NOT NULL, PRIMARY KEY (text, lang))')
+        rows = self._db.execute('SELECT text, lang, translated FROM translations ORDER BY rowid DESC LIMIT ?',
+                                (self.max_entries,)).fetchall()
+        for text, lang, translated in reversed(rows):
+            self._entries[(text, lang)] = translated
+
+    def translate(self, text: str, lang: str) -> str:
+        return self.translate_many([text], lang)[0]
+
+    def translate_many(self, texts: List[str], lang: str) -> List[str]:
+        """Translations of ``texts`` in order, calling the backend once for all cache misses"""
+        with self._lock:
+            self._load()
+            found: Dict[str, str] = {}
+            for text in texts:
+                translated = self._entries.get((text, lang))
+                if translated is not None:
+                    self._entries.move_to_end((text, lang))
+                    found[text] = translated
+            missing = list(dict.fromkeys(text for text in texts if text not in found))
+            self.hits += len(texts) - sum(1 for text in texts if text not in found)
+            self.misses += len(missing)
+
+        if missing:
+            translated = self.backend(missing, lang)
+            if len(translated) != len(missing):
+                raise ValueError(f"Translator returned {len(translated)} results for {len(missing)} texts")
+            translations = {text: result for text, result in zip(missing, translated) if result is not None}
+            self._store(lang, translations)
+            found.update(translations)
+        return [found.get(text, text) for text in texts]
+
+    def _store(self, lang, translations):
+        with self._lock:
+            self.backend_calls += 1
+            for text, translated in translations.items():
+                self._entries[(text, lang)] = translated
+                self._entries.move_to_end((text, lang))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self._db is not None:
+                with self._db:
+                    self._db.executemany('INSERT OR REPLACE INTO translations VALUES (?, ?, ?)',
+                                         [(text, lang, translated) for text, translated in translations.items()])
+                    # Replaced rows get a new rowid, so rowid order is storage order
+                    self._db.execute('DELETE FROM translations WHERE rowid <= (SELECT rowid FROM translations '
+                                     'ORDER BY rowid DESC LIMIT 1 OFFSET ?)', (self.max_entries,))
+
+    def warm(self, texts: Iterable[str], langs: Iterable[str], batch_size: int = 50):
+        """Translate ``texts`` into every language ahead of time; returns the number translated"""
+        texts = list(dict.fromkeys(texts))
+        translated = 0
+        for lang in langs:
+            for start in range(0, len(texts), batch_size):
+                try:
+                    self.translate_many(texts[start:start + batch_size], lang)
+                except Exception as e:
+                    print(f"⚠️ Could not pre-translate into {lang}: {e}")
+                    break
+                translated += len(texts[start:start + batch_size])
+        return translated
+
+    def warm_async(self, texts: Iterable[str], langs: Iterable[str]):
+        thread = threading.Thread(target=self.warm, args=(list(texts), list(langs)),
+                                  name='translation-warm', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'persistent': bool(self.path),
+                'hits': self.hits,
+                'misses': self.misses,
+                'backend_calls': self.backend_calls,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._loaded = False
+
+
+def static_texts() -> List[str]:
+    """Every fixed string the app shows: quiz questions and options, and recommendation texts"""
+    from questions import QUESTIONS
+    from recommendations import GENERAL_TIPS, NO_RECOMMENDATIONS, PRIORITY_BANDS, RECOMMENDATIONS
+
+    texts = []
+    for question in QUESTIONS:
+        texts.append(question['question'])
+        texts.extend(question['options'])
+    for rec in RECOMMENDATIONS.values():
+        texts.append(rec['title'])
+        texts.extend(rec['remedies'])
+    texts.extend(message for _, _, _, message in PRIORITY_BANDS)
+    texts.extend(GENERAL_TIPS)
+    texts.append(NO_RECOMMENDATIONS)
+    return list(dict.fromkeys(texts))
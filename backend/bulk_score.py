@@ -0,0 +1,242 @@
+"""Score a questionnaire export offline, without going through /api/predict.
+
+Reads a CSV or Parquet file in chunks of ``--chunk-size`` rows, so memory
+stays bounded whatever the file size. Question columns may be named by the
+quiz question (as in QUESTION_MAPPING) or by the model's feature name; all
+other columns are copied to the output unchanged. Each row gets a
+``sleep_score``, ``effectiveness_percentage``, ``priority`` band and, for
+rows that could not be scored, an ``error``. Results are appended to the
+output file (CSV or Parquet, by extension) chunk by chunk, in input order.
+
+Run from the backend directory:
+    python bulk_score.py answers.csv scores.csv
+    python bulk_score.py answers.parquet scores.parquet --chunk-size 20000 --workers 4
+
+Parquet files need pyarrow.
+"""
+import argparse
+import collections
+import math
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from predictor import QUESTION_MAPPING, SleepScorePredictor, calculate_effectiveness
+from recommendations import PRIORITY_BANDS, priority_band
+
+RESULT_COLUMNS = ('sleep_score', 'effectiveness_percentage', 'priority', 'error')
+
+_worker_predictor = None
+
+
+def column_mapping(columns):
+    """Input column -> model feature name, for the columns that hold answers"""
+    features = set(QUESTION_MAPPING.values())
+    mapping = {}
+    for column in columns:
+        if column in QUESTION_MAPPING:
+            mapping[column] = QUESTION_MAPPING[column]
+        elif column in features:
+            mapping[column] = column
+    return mapping
+
+
+def read_chunks(path, chunk_size):
+    """DataFrames of at most ``chunk_size`` rows, all values as strings"""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("❌ Reading Parquet files needs pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas().astype(object)
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False, na_values=[''])
+
+
+def parquet_schema(path):
+    """Arrow schema of a Parquet file, or None for other files"""
+    if not path.endswith('.parquet'):
+        return None
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("❌ Reading Parquet files needs pyarrow (pip install pyarrow)")
+    return pq.ParquetFile(path).schema_arrow
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file.
+
+    Parquet files get one schema for every chunk, fixed up front: float64
+    scores, string priority and error columns, passthrough columns typed as
+    in ``input_schema`` (the input Parquet file's) and as strings otherwise.
+    Inferring it from the first chunk would type columns that happen to be
+    all null there as ``null`` and reject the first later chunk with a value.
+    """
+
+    FLOAT_COLUMNS = ('sleep_score', 'effectiveness_percentage')
+
+    def __init__(self, path, input_schema=None):
+        self.path = path
+        self.input_schema = input_schema
+        self._parquet = None
+        self._schema = None
+        self._header = True
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _build_schema(self, columns):
+        import pyarrow as pa
+
+        fields = []
+        for column in columns:
+            if column in self.FLOAT_COLUMNS:
+                fields.append(pa.field(column, pa.float64()))
+            elif column not in RESULT_COLUMNS and self.input_schema is not None \
+                    and column in self.input_schema.names:
+                fields.append(self.input_schema.field(column))
+            else:
+                fields.append(pa.field(column, pa.string()))
+        return pa.schema(fields)
+
+    def write(self, df):
+        if self.path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._schema is None:
+                self._schema = self._build_schema(df.columns)
+                self._parquet = pq.ParquetWriter(self.path, self._schema)
+            df = df.copy()
+            for field in self._schema:
+                if pa.types.is_string(field.type):
+                    df[field.name] = [None if pd.isna(value) else str(value)
+                                      for value in df[field.name]]
+            self._parquet.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+        else:
+            df.to_csv(self.path, mode='a', header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def score_records(predictor, records):
+    """(sleep_score, effectiveness, priority, error) per answer dict"""
+    rows = []
+    for result in predictor.predict_batch(records):
+        score = result['sleep_score']
+        if score is None:
+            rows.append((None, None, None, result['error']))
+            continue
+        effectiveness = calculate_effectiveness(score)
+        rows.append((round(float(score), 2), round(effectiveness, 2),
+                     PRIORITY_BANDS[priority_band(effectiveness)][1], None))
+    return rows
+
+
+def chunk_records(df, mapping):
+    """One answer dict per row, without blank answers"""
+    features = list(mapping.values())
+    columns = [df[column].tolist() for column in mapping]
+    return [{feature: value for feature, value in zip(features, values) if isinstance(value, str) and value}
+            for values in zip(*columns)]
+
+
+def _init_worker(model_dir):
+    global _worker_predictor
+    warnings.filterwarnings('ignore')
+    _worker_predictor = SleepScorePredictor(model_dir=model_dir)
+    if not _worker_predictor.load_model(mmap_mode='r'):
+        raise RuntimeError(f"Scoring worker could not load model: {_worker_predictor.load_error}")
+
+
+def _score_in_worker(records):
+    return score_records(_worker_predictor, records)
+
+
+def score_file(input_path, output_path, chunk_size=10000, workers=0, model_dir=None, progress=True):
+    """Score ``input_path`` into ``output_path``; returns (rows, seconds).
+
+    With ``workers`` > 1 chunks are scored in that many processes, with at
+    most two chunks per worker read ahead.
+    """
+    started = time.perf_counter()
+    writer = ChunkWriter(output_path, input_schema=parquet_schema(input_path))
+    pending = collections.deque()
+    rows_done = 0
+    mapping = None
+    executor = None
+    predictor = None
+
+    if workers > 1:
+        # spawn: each worker loads its own copy of the model, memory-mapped
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker, initargs=(model_dir,))
+    else:
+        predictor = SleepScorePredictor(model_dir=model_dir)
+        if not predictor.load_model():
+            raise SystemExit(f"❌ Could not load model: {predictor.load_error}")
+
+    def write_next():
+        nonlocal rows_done
+        df, scored = pending.popleft()
+        scored = scored.result() if executor is not None else scored
+        for column, values in zip(RESULT_COLUMNS, zip(*scored)):
+            df[column] = values
+        writer.write(df)
+        rows_done += len(df)
+        if progress:
+            elapsed = time.perf_counter() - started
+            print(f"📈 {rows_done:,} rows scored, {rows_done / elapsed:,.0f} rows/s", file=sys.stderr)
+
+    try:
+        for df in read_chunks(input_path, chunk_size):
+            if mapping is None:
+                mapping = column_mapping(df.columns)
+                if not mapping:
+                    raise SystemExit("❌ No column of the input file matches a quiz question")
+            passthrough = df.drop(columns=list(mapping))
+            records = chunk_records(df, mapping)
+            if executor is not None:
+                pending.append((passthrough, executor.submit(_score_in_worker, records)))
+                if len(pending) >= 2 * workers:
+                    write_next()
+            else:
+                pending.append((passthrough, score_records(predictor, records)))
+                write_next()
+        while pending:
+            write_next()
+    finally:
+        writer.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return rows_done, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV or Parquet file with one questionnaire per row')
+    parser.add_argument('output', help='CSV or Parquet file to write the scores to')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='rows read and scored at a time')
+    parser.add_argument('--workers', type=int, default=0, help='score chunks in this many processes')
+    parser.add_argument('--model-dir', help='model directory (default backend/models)')
+    parser.add_argument('--quiet', action='store_true', help='no per-chunk progress')
+    args = parser.parse_args()
+
+    rows, seconds = score_file(args.input, args.output, chunk_size=args.chunk_size, workers=args.workers,
+                               model_dir=args.model_dir, progress=not args.quiet)
+    rate = rows / seconds if seconds else math.inf
+    print(f"✅ Scored {rows:,} rows in {seconds:.1f}s ({rate:,.0f} rows/s) into {args.output}")
+
+
+if __name__ == '__main__':
+    main()
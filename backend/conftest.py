@@ -0,0 +1,39 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# app reads its configuration at import, so point it at throwaway state before any test imports it
+_workdir = tempfile.mkdtemp(prefix='sleep-tests-')
+os.environ.update({
+    'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(_workdir, 'test.db')}",
+    'RESULTS_DURABILITY': 'sync',
+    'CHAT_JOURNAL': os.path.join(_workdir, 'chat_history.jsonl'),
+    'TRANSLATION_CACHE_PATH': '',
+    'TRANSLATION_PREWARM_LANGS': '',
+    'AUTH_SECRET': 'test-secret',
+})
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_workdir, ignore_errors=True)
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    """The app module with empty tables, a fresh user id cache and the model loaded"""
+    import app as app_module
+    from persistence import TTLCache
+
+    with app_module.app.app_context():
+        app_module.db.drop_all()
+        app_module.init_db()
+    monkeypatch.setattr(app_module, 'user_id_cache', TTLCache())
+    assert app_module.model_registry.predictor.wait_until_ready(60)
+    return app_module
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
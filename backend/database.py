@@ -0,0 +1,78 @@
+"""Database URI and engine settings, including the SQLite tuning profile.
+
+SQLite's defaults (rollback journal, ``synchronous=FULL``, no busy wait
+beyond the driver's) make concurrent writers queue behind every fsync and
+readers block writers. The ``tuned`` profile switches to WAL, where readers
+never block the single writer, and sets the pragmas on every new
+connection through an engine ``connect`` event.
+"""
+import os
+
+from sqlalchemy import event
+
+DEFAULT_DATABASE_URI = 'sqlite:///' + os.path.join(os.path.dirname(__file__), 'database.db')
+
+SQLITE_PROFILES = {
+    'default': {},
+    'tuned': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 10000,
+    },
+}
+
+
+def database_uri():
+    """SQLALCHEMY_DATABASE_URI (or DATABASE_URL) from the environment, else backend/database.db"""
+    return (os.environ.get('SQLALCHEMY_DATABASE_URI')
+            or os.environ.get('DATABASE_URL')
+            or DEFAULT_DATABASE_URI)
+
+
+def _is_memory_sqlite(uri):
+    return uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri
+
+
+def engine_options(uri):
+    """Pool settings for ``create_engine``, overridable with DB_POOL_* env vars"""
+    if _is_memory_sqlite(uri):
+        # One shared in-process database; SQLAlchemy picks the right pool
+        return {}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', '3600')),
+        'pool_pre_ping': not uri.startswith('sqlite'),
+    }
+
+
+def sqlite_pragmas(profile):
+    """Pragmas of a SQLITE_PROFILES entry, each overridable as SQLITE_<NAME> (e.g. SQLITE_MMAP_SIZE)"""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown database profile {profile!r}; expected one of {', '.join(SQLITE_PROFILES)}")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PROFILES['tuned']:
+        override = os.environ.get(f'SQLITE_{name.upper()}')
+        if override:
+            pragmas[name] = override
+    return pragmas
+
+
+def configure_engine(engine, profile='tuned'):
+    """Apply the SQLite profile's pragmas to every connection ``engine`` opens; no-op for other backends"""
+    if engine.dialect.name != 'sqlite':
+        return {}
+    pragmas = sqlite_pragmas(profile)
+    if not pragmas:
+        return pragmas
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    return pragmas
@@ -0,0 +1,301 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor, ExtraTreeRegressor
+
+
+class AnswerEncoder:
+    """Precompiled encoder from answer dicts to model feature vectors.
+
+    Built once from the ordinal/binary mappings and the training feature
+    order, so encoding a request is a dict lookup per answer written straight
+    into a preallocated float array. Produces the same values as the pandas
+    path in ``SleepScorePredictor.encode_features_pandas`` followed by the
+    reindex to ``feature_names``.
+    """
+
+    def __init__(self, feature_names, ordinal_mappings, binary_mappings):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+
+        # column name -> (column index, {normalized answer: code} or None)
+        self.columns = {}
+        for index, column in enumerate(self.feature_names):
+            mapping = ordinal_mappings.get(column)
+            if mapping is None:
+                mapping = binary_mappings.get(column)
+            if mapping is not None:
+                mapping = {answer: float(code) for answer, code in mapping.items()}
+            self.columns[column] = (index, mapping)
+
+    @staticmethod
+    def _unmapped_code(value):
+        """Code for a column with no mapping, as pandas would encode a single row"""
+        if value is None:
+            # pd.Categorical([None]).codes
+            return -1.0
+        if isinstance(value, (bool, int, float, np.number)):
+            value = float(value)
+            return 0.0 if math.isnan(value) else value
+        # Any other object becomes the only category of its column
+        return 0.0
+
+    def possible_values(self):
+        """Every code each feature column can take, in feature order"""
+        values = []
+        for column in self.feature_names:
+            _, mapping = self.columns[column]
+            if mapping is None:
+                values.append({0.0, -1.0})
+            else:
+                values.append(set(mapping.values()) | {0.0})
+        return values
+
+    def knows_any(self, input_data):
+        """Whether an answer dict answers at least one model feature"""
+        return any(column in self.columns for column in input_data)
+
+    def encode_into(self, input_data, row):
+        """Write the encoded answers of one dict into ``row`` (zeroed by the caller)"""
+        columns = self.columns
+        for column, value in input_data.items():
+            entry = columns.get(column)
+            if entry is None:
+                continue
+            index, mapping = entry
+            if isinstance(value, str):
+                value = value.strip().lower()
+            if mapping is None:
+                row[index] = self._unmapped_code(value)
+                continue
+            try:
+                row[index] = mapping.get(value, 0.0)
+            except TypeError:
+                # Unhashable answers can't match any option
+                row[index] = 0.0
+        return row
+
+    def encode(self, input_data):
+        """Encode one answer dict into a (1, n_features) float matrix"""
+        X = np.zeros((1, self.n_features))
+        self.encode_into(input_data, X[0])
+        return X
+
+    def encode_many(self, records):
+        """Encode a sequence of answer dicts into a (len(records), n_features) matrix"""
+        X = np.zeros((len(records), self.n_features))
+        for row, input_data in zip(X, records):
+            self.encode_into(input_data, row)
+        return X
+
+
+class FlatForest:
+    """Array-backed regression forest with the StandardScaler folded in.
+
+    Every tree's nodes are concatenated into flat NumPy arrays. The scaler's
+    affine transform is moved onto the split thresholds
+    (``(x - mean) / scale <= t``  becomes  ``x <= t * scale + mean``), so raw
+    encoded answers are evaluated directly, without sklearn's transform,
+    predict dispatch or input validation.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        # children[2 * node + went_left]: one gather per level instead of two
+        self.children = np.empty(2 * len(feature), dtype=np.intp)
+        self.children[0::2] = right
+        self.children[1::2] = left
+        self.roots = roots
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_estimator(cls, model, scaler=None):
+        """Compile a fitted tree regressor (and optional scaler) into a FlatForest"""
+        if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+            trees = model.estimators_
+        elif isinstance(model, (DecisionTreeRegressor, ExtraTreeRegressor)):
+            trees = [model]
+        else:
+            raise ValueError(f"Cannot compile model of type {type(model).__name__}")
+
+        n_features = model.n_features_in_
+        mean = np.zeros(n_features)
+        scale = np.ones(n_features)
+        if scaler is not None:
+            if getattr(scaler, 'mean_', None) is not None:
+                mean = np.asarray(scaler.mean_, dtype=np.float64)
+            if getattr(scaler, 'scale_', None) is not None:
+                scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            tree_ = tree.tree_
+            if tree_.n_outputs != 1:
+                raise ValueError("Only single-output regressors can be compiled")
+
+            node_ids = np.arange(tree_.node_count)
+            is_leaf = tree_.children_left == -1
+            feature = np.where(is_leaf, 0, tree_.feature)
+            threshold = np.full(tree_.node_count, np.inf)
+            threshold[~is_leaf] = cls._fold_thresholds(
+                tree_.threshold[~is_leaf], mean[feature[~is_leaf]], scale[feature[~is_leaf]]
+            )
+
+            # Leaves point at themselves so every row can take max_depth steps
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(np.where(is_leaf, node_ids, tree_.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree_.children_right) + offset)
+            values.append(tree_.value[:, 0, 0])
+            roots.append(offset)
+
+            offset += tree_.node_count
+            max_depth = max(max_depth, tree_.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+        )
+
+    @staticmethod
+    def _fold_thresholds(threshold, mean, scale):
+        """Largest raw value per split that sklearn still sends left.
+
+        sklearn compares ``float32((x - mean) / scale) <= threshold``, so the
+        plain ``threshold * scale + mean`` can land a rounding step off (a
+        threshold equal to a scaled training value is common). The decision is
+        monotonic in ``x``, so bisect around the estimate down to adjacent
+        float64 values.
+        """
+        def goes_left(x):
+            return np.float32((x - mean) / scale).astype(np.float64) <= threshold
+
+        estimate = threshold * scale + mean
+        step = 4 * np.abs(np.spacing(np.float32(threshold)).astype(np.float64)) * scale + np.spacing(estimate)
+        lo, hi = estimate - step, estimate + step
+        while not (goes_left(lo).all() and not goes_left(hi).any()):
+            step *= 2
+            lo = np.where(goes_left(lo), lo, estimate - step)
+            hi = np.where(goes_left(hi), estimate + step, hi)
+
+        for _ in range(128):
+            mid = lo + (hi - lo) / 2
+            left = goes_left(mid)
+            lo = np.where(left, mid, lo)
+            hi = np.where(left, hi, mid)
+            if np.all(np.nextafter(lo, np.inf) >= hi):
+                break
+        return lo
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def predict(self, X):
+        """Predict raw (unscaled) encoded rows; returns one float64 score per row"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_left]
+
+        # Accumulate tree by tree in estimator order, exactly like sklearn's
+        # forest; np.sum would switch to pairwise summation for single rows
+        return self.value[nodes].cumsum(axis=1)[:, -1] / self.n_trees
+
+
+class ScoreCache:
+    """Bounded LRU cache of predicted scores keyed by packed feature vectors.
+
+    Every encoded answer is a small integer, so a row packs into one int64
+    with 2 bits per feature and the score can be served from a dict instead
+    of running the model. Rows holding anything outside 0-3 (e.g. the -1 of a
+    missing unmapped column) are simply not cached. Each entry costs roughly
+    150 bytes, so ``max_entries`` sets the memory budget.
+    """
+
+    BITS_PER_FEATURE = 2
+
+    def __init__(self, n_features, max_entries=100000):
+        if n_features * self.BITS_PER_FEATURE > 63:
+            raise ValueError(f"{n_features} features do not fit in a packed int64 key")
+        self.max_entries = max_entries
+        self.weights = (1 << (self.BITS_PER_FEATURE * np.arange(n_features))).astype(np.int64)
+        self.max_code = (1 << self.BITS_PER_FEATURE) - 1
+        self.signature = None
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def pack(self, X):
+        """Packed int64 key per row, or -1 for rows that can't be packed"""
+        codes = X.astype(np.int64)
+        packable = ((codes == X) & (codes >= 0) & (codes <= self.max_code)).all(axis=1)
+        return np.where(packable, codes @ self.weights, -1)
+
+    def bind(self, signature):
+        """Drop every entry if the scores were produced by a different model"""
+        with self._lock:
+            if signature != self.signature:
+                self._scores.clear()
+                self.signature = signature
+
+    def predict(self, X, predict_fn):
+        """Serve cached scores for ``X`` and call ``predict_fn`` only on the misses"""
+        keys = self.pack(X)
+        scores = np.empty(len(keys))
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys.tolist()):
+                score = self._scores.get(key) if key >= 0 else None
+                if score is None:
+                    missing.append(i)
+                else:
+                    self._scores.move_to_end(key)
+                    scores[i] = score
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            computed = predict_fn(X[missing])
+            scores[missing] = computed
+            with self._lock:
+                for i, score in zip(missing, computed):
+                    key = int(keys[i])
+                    if key < 0:
+                        continue
+                    self._scores[key] = score
+                    self._scores.move_to_end(key)
+                while len(self._scores) > self.max_entries:
+                    self._scores.popitem(last=False)
+                    self.evictions += 1
+        return scores
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._scores),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
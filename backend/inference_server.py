@@ -0,0 +1,184 @@
+"""Process-pool inference backend with micro-batching.
+
+Each worker process holds one loaded SleepScorePredictor. Requests hand
+already-encoded feature rows to a dispatcher thread, which gathers whatever
+arrives within ``max_wait`` seconds (up to ``max_batch_size`` rows) into one
+matrix and sends it to a worker for a single predict call. Scoring then runs
+outside the Flask process's GIL. A pool that loses a worker is replaced
+before the next batch.
+"""
+import multiprocessing
+import queue
+import threading
+import time
+import warnings
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+_worker_predictor = None
+_STOP = object()
+
+
+def _init_worker(model_dir, mmap_mode, use_kernel):
+    global _worker_predictor
+    warnings.filterwarnings('ignore')
+    from predictor import SleepScorePredictor
+
+    _worker_predictor = SleepScorePredictor(model_dir=model_dir)
+    if not _worker_predictor.load_model(mmap_mode=mmap_mode):
+        raise RuntimeError(f"Inference worker could not load model: {_worker_predictor.load_error}")
+    if not use_kernel:
+        _worker_predictor.kernel = None
+
+
+def _predict_in_worker(X):
+    return _worker_predictor.predict_matrix(X)
+
+
+class InferenceServerClosed(RuntimeError):
+    """Raised by ``submit`` once the server has been closed"""
+
+
+class InferenceServer:
+    """Dispatches encoded rows to a pool of predictor processes in micro-batches"""
+
+    def __init__(self, model_dir=None, workers=2, max_batch_size=32, max_wait=0.002, mmap_mode='r',
+                 use_kernel=True):
+        self.model_dir = model_dir
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._initargs = (model_dir, mmap_mode, use_kernel)
+        self._executor = self._new_executor()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.restarts = 0
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='inference-dispatch', daemon=True)
+        self._dispatcher.start()
+
+    def _new_executor(self):
+        # spawn: forking a threaded Flask process can copy held locks into the child
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=self._initargs,
+        )
+
+    def _restart_executor(self):
+        """Replace a pool that lost a worker; a broken pool refuses all further work"""
+        self._executor.shutdown(wait=False)
+        self._executor = self._new_executor()
+        with self._stats_lock:
+            self.restarts += 1
+        print("⚠️ An inference worker died; restarted the worker pool")
+
+    def warm_up(self, n_features, timeout=60):
+        """Start every worker and load its model before taking traffic"""
+        futures = [self._executor.submit(_predict_in_worker, np.zeros((1, n_features)))
+                   for _ in range(self.workers)]
+        for future in futures:
+            future.result(timeout)
+
+    def submit(self, X):
+        """Queue encoded rows for scoring; returns a Future of their scores.
+
+        Raises InferenceServerClosed after ``close``, as nothing would serve them.
+        """
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise InferenceServerClosed('Inference server is closed')
+            self._queue.put((np.asarray(X, dtype=np.float64), future))
+        return future
+
+    def predict(self, X, timeout=None):
+        return self.submit(X).result(timeout)
+
+    def _dispatch_loop(self):
+        carried = None
+        while True:
+            item = carried if carried is not None else self._queue.get()
+            carried = None
+            if item is _STOP:
+                return
+
+            batch = [item]
+            rows = len(item[0])
+            deadline = time.monotonic() + self.max_wait
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP or rows + len(item[0]) > self.max_batch_size:
+                    # Shutdown, or a request that would overflow, waits for the next round
+                    carried = item
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            self._submit_batch(batch, rows)
+
+    def _submit_batch(self, batch, rows):
+        with self._stats_lock:
+            self.batches += 1
+            self.rows += rows
+        matrix = np.vstack([X for X, _ in batch])
+        try:
+            try:
+                result = self._executor.submit(_predict_in_worker, matrix)
+            except BrokenProcessPool:
+                # Requests in flight when the worker died have already failed;
+                # later ones go to a fresh pool
+                self._restart_executor()
+                result = self._executor.submit(_predict_in_worker, matrix)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        result.add_done_callback(lambda done: self._distribute(done, batch))
+
+    @staticmethod
+    def _distribute(done, batch):
+        error = done.exception()
+        if error is not None:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        scores = done.result()
+        start = 0
+        for X, future in batch:
+            future.set_result(scores[start:start + len(X)])
+            start += len(X)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'workers': self.workers,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self.batches,
+                'rows': self.rows,
+                'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+                'restarts': self.restarts,
+            }
+
+    def close(self, wait=True):
+        """Finish queued requests, then stop the dispatcher and the worker processes"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._dispatcher.join()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,234 @@
+"""In-process metrics in the Prometheus text format, plus an opt-in request profiler.
+
+Histograms and counters are plain locked arrays, cheap enough to update on
+every request; ``/metrics`` renders them on demand. ``stage(name)`` times a
+step of the current request (see ``start_request``) and costs one
+thread-local lookup when no request is being timed, so library code such as
+the predictor can call it unconditionally.
+"""
+import bisect
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """Observations counted into fixed buckets, per combination of label values"""
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts (last is +Inf), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for label_values, counts, total in series:
+            cumulative = 0
+            for upper, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labels + ('le',), label_values + (_format_value(upper),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics, plus ``stats()`` callables whose numeric fields are exported as gauges"""
+
+    def __init__(self, namespace='sleep_analysis'):
+        self.namespace = namespace
+        self._metrics = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        name = f'{self.namespace}_{name}'
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, help, labels, buckets)
+
+    def register_stats(self, prefix, stats):
+        """Export every numeric value of ``stats()`` as gauge ``<prefix>_<key>`` at scrape time"""
+        with self._lock:
+            self._stats[prefix] = stats
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+            stats = sorted(self._stats.items())
+        for metric in metrics:
+            lines.extend(metric.render())
+        for prefix, stats_fn in stats:
+            try:
+                values = stats_fn()
+            except Exception as e:
+                print(f"⚠️ Could not collect {prefix} metrics: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f'{self.namespace}_{prefix}_{key}'
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+request_latency = registry.histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by route', labels=('route', 'method'))
+request_count = registry.counter('http_requests_total', 'Responses sent, by route and status',
+                                 labels=('route', 'method', 'status'))
+stage_latency = registry.histogram(
+    'request_stage_duration_seconds', 'Time spent in each stage of a request', labels=('route', 'stage'),
+    buckets=STAGE_BUCKETS)
+
+_local = threading.local()
+
+
+def start_request():
+    """Start collecting stage timings for the request handled by this thread"""
+    _local.stages = []
+
+
+def finish_request():
+    """Stop collecting and return the ``(stage, seconds)`` pairs of this thread's request"""
+    stages = getattr(_local, 'stages', None)
+    _local.stages = None
+    return stages or []
+
+
+@contextmanager
+def stage(name):
+    """Time a step of the current request; a no-op outside ``start_request``/``finish_request``"""
+    stages = getattr(_local, 'stages', None)
+    if stages is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages.append((name, time.perf_counter() - started))
+
+
+class RequestProfiler:
+    """Runs cProfile on a random ``sample_rate`` share of requests, one at a time.
+
+    When a profiled request takes at least ``slow_seconds``, its ``top``
+    hottest functions by cumulative time are printed.
+    """
+
+    def __init__(self, sample_rate=0.0, slow_seconds=1.0, top=20, rng=random.random):
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.top = top
+        self._rng = rng
+        self._busy = threading.Lock()
+        self.profiled = 0
+        self.reports = 0
+
+    def start(self):
+        """A running profiler for this request, or None if it isn't sampled"""
+        if self.sample_rate <= 0 or self._rng() >= self.sample_rate:
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def finish(self, profiler, label, duration):
+        """Stop ``profiler``; returns the report when the request was slow, else None"""
+        profiler.disable()
+        self._busy.release()
+        self.profiled += 1
+        if duration < self.slow_seconds:
+            return None
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(self.top)
+        self.reports += 1
+        report = output.getvalue()
+        print(f"🐢 Slow request {label} took {duration * 1000:.0f} ms, hottest functions:\n{report}")
+        return report
+
+    def stats(self):
+        return {'sample_rate': self.sample_rate, 'slow_seconds': self.slow_seconds,
+                'profiled': self.profiled, 'reports': self.reports}
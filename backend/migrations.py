@@ -0,0 +1,92 @@
+"""Schema upgrades for databases created by older versions of the app.
+
+``db.create_all()`` only creates missing tables, so columns and indexes
+added to an existing model are added here.
+"""
+import json
+
+from sqlalchemy import inspect, or_, text
+
+from questions import pack_answers
+from recommendations import parse_recommendations
+
+
+def add_missing_columns(db, model):
+    """Add columns declared on ``model`` but missing from its table; returns their names"""
+    table = model.__table__
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    added = []
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable and column.server_default is None:
+            raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} without a default")
+        column_type = column.type.compile(dialect=db.engine.dialect)
+        with db.engine.begin() as connection:
+            connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        added.append(column.name)
+    return added
+
+
+def add_missing_indexes(db, model):
+    """Create indexes declared on ``model`` but missing from its table; returns their names"""
+    table = model.__table__
+    existing = {index['name'] for index in inspect(db.engine).get_indexes(table.name)}
+    added = []
+    for index in table.indexes:
+        if index.name in existing:
+            continue
+        index.create(db.engine)
+        added.append(index.name)
+    return added
+
+
+def upgrade_schema(db, models):
+    """Create missing tables, then bring existing ones up to date"""
+    db.create_all()
+    for model in models:
+        for column in add_missing_columns(db, model):
+            print(f"✅ Added column {model.__table__.name}.{column}")
+        for index in add_missing_indexes(db, model):
+            print(f"✅ Added index {index}")
+
+
+def compact_quiz_results(db, model, batch_size=500):
+    """Move quiz results stored as JSON/text to the packed columns, one batch per transaction.
+
+    Rows whose answers or recommendations don't match the known questions or
+    templates keep that field as text. Returns (converted, skipped) row counts.
+    """
+    converted = skipped = 0
+    last_id = 0
+    while True:
+        rows = (model.query
+                .filter(model.id > last_id,
+                        or_(model.answers_packed.is_(None), model.recommendation_template.is_(None)))
+                .order_by(model.id)
+                .limit(batch_size)
+                .all())
+        if not rows:
+            return converted, skipped
+        for row in rows:
+            changed = False
+            if row.answers_packed is None:
+                try:
+                    packed = pack_answers(json.loads(row.answers))
+                except ValueError:
+                    packed = None
+                if packed is not None:
+                    row.answers_packed, row.answers = packed, ''
+                    changed = True
+            if row.recommendation_template is None:
+                parsed = parse_recommendations(row.recommendations)
+                if parsed is not None:
+                    row.recommendation_template, row.recommendation_effectiveness = parsed
+                    row.recommendations = ''
+                    changed = True
+            if changed:
+                converted += 1
+            else:
+                skipped += 1
+        last_id = rows[-1].id
+        db.session.commit()
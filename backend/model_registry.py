@@ -0,0 +1,183 @@
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+
+def build_canary_answers(ordinal_mappings, binary_mappings):
+    """One answer set per severity level, from the mildest to the most severe option"""
+    canaries = []
+    for level in range(4):
+        answers = {}
+        for mappings in (ordinal_mappings, binary_mappings):
+            for column, mapping in mappings.items():
+                by_code = {}
+                for answer, code in mapping.items():
+                    by_code.setdefault(code, answer)
+                answers[column] = by_code[min(level, max(by_code))]
+        canaries.append(answers)
+    return canaries
+
+
+class ModelRegistry:
+    """Holds the active SleepScorePredictor and hot-swaps it for new model files.
+
+    A replacement is loaded and validated against the canary answers off the
+    request path, then swapped in with a single attribute assignment. Requests
+    read ``registry.predictor`` once and keep that reference, so in-flight
+    predictions finish on the model they started with.
+    """
+
+    def __init__(self, predictor_factory, canary_answers=(), score_range=(0, 100), mmap_mode=None):
+        self._predictor_factory = predictor_factory
+        self.canary_answers = list(canary_answers)
+        self.score_range = score_range
+        self.mmap_mode = mmap_mode
+        self._predictor = predictor_factory(None)
+        self._reload_lock = threading.Lock()
+        # Guards _reloading: claiming a background reload is a check-and-set
+        self._state_lock = threading.Lock()
+        self._reloading = False
+        self._watch_thread = None
+        self.history = []
+        self.last_error = None
+        self._rejected_signature = None
+
+    @property
+    def predictor(self):
+        return self._predictor
+
+    @property
+    def is_reloading(self):
+        return self._reloading or self._reload_lock.locked()
+
+    def start(self):
+        """Begin loading the initial model in the background"""
+        self._predictor.start_background_load(mmap_mode=self.mmap_mode)
+
+    def validate(self, candidate):
+        """Score the canary answers with ``candidate``; raise ValueError if any score is implausible"""
+        low, high = self.score_range
+        scores = [float(candidate.predict_sleep_score(answers)) for answers in self.canary_answers]
+        for answers_index, score in enumerate(scores):
+            if not math.isfinite(score) or not low <= score <= high:
+                raise ValueError(f"Canary {answers_index} scored {score}, outside {low}-{high}")
+        return scores
+
+    def reload(self, model_dir=None):
+        """Load, validate and activate the model in ``model_dir`` (the active directory by default)"""
+        with self._reload_lock:
+            model_dir = model_dir or self._predictor.model_dir
+            started = time.time()
+            try:
+                candidate = self._predictor_factory(model_dir)
+                if not candidate.load_model(mmap_mode=self.mmap_mode):
+                    raise ValueError(candidate.load_error)
+                canary_scores = self.validate(candidate)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Model reload from {model_dir} rejected: {e}")
+                raise
+
+            previous = self._predictor
+            self._predictor = candidate
+            entry = {
+                'version': candidate.model_version,
+                'previous_version': previous.model_version,
+                'model_dir': model_dir,
+                'activated_at': datetime.utcnow().isoformat(),
+                'load_seconds': round(time.time() - started, 3),
+                'canary_scores': [round(score, 2) for score in canary_scores],
+            }
+            self.history.append(entry)
+            self.last_error = None
+            print(f"✅ Model {candidate.model_version} activated (was {previous.model_version})")
+            return entry
+
+    def _claim_reload(self):
+        """Mark a background reload as running; False if one already is"""
+        with self._state_lock:
+            if self._reloading:
+                return False
+            self._reloading = True
+            return True
+
+    def _release_reload(self):
+        with self._state_lock:
+            self._reloading = False
+
+    def reload_async(self, model_dir=None):
+        """Start a reload in a background thread; False if one is already running"""
+        if not self._claim_reload():
+            return False
+        threading.Thread(
+            target=self._reload_quietly, args=(model_dir,), name='model-reload', daemon=True
+        ).start()
+        return True
+
+    def _reload_quietly(self, model_dir):
+        try:
+            self.reload(model_dir)
+        except Exception:
+            # Already recorded in last_error; the active model keeps serving
+            pass
+        finally:
+            self._release_reload()
+
+    def watch(self, interval):
+        """Poll the active model directory and reload when its files change.
+
+        A change must look the same on two consecutive polls before it is
+        loaded, so a copy still in progress isn't picked up half-written.
+        """
+        if self._watch_thread is not None:
+            return
+        self._watch_thread = threading.Thread(
+            target=self._watch_loop, args=(interval,), name='model-watch', daemon=True
+        )
+        self._watch_thread.start()
+
+    def _watch_loop(self, interval):
+        pending = None
+        while True:
+            time.sleep(interval)
+            predictor = self._predictor
+            if not predictor.is_ready:
+                continue
+            signature = predictor.model_files_signature()
+            if signature == predictor.model_signature:
+                pending = None
+            elif signature != pending:
+                pending = signature
+            elif signature != self._rejected_signature and self._claim_reload():
+                try:
+                    self.reload(predictor.model_dir)
+                except Exception:
+                    # Don't retry the same broken files every poll
+                    self._rejected_signature = signature
+                finally:
+                    self._release_reload()
+                pending = None
+
+    def status(self):
+        predictor = self._predictor
+        return {
+            'active': {
+                'version': predictor.model_version,
+                'model_dir': predictor.model_dir,
+                'ready': predictor.is_ready,
+            },
+            'reloading': self.is_reloading,
+            'last_error': self.last_error,
+            'history': self.history,
+        }
+
+
+def resolve_model_dir(models_root, requested):
+    """Absolute path of ``requested`` inside ``models_root``; ValueError if it escapes"""
+    root = os.path.realpath(models_root)
+    path = os.path.realpath(os.path.join(root, requested))
+    if os.path.commonpath([root, path]) != root or not os.path.isdir(path):
+        raise ValueError(f"Unknown model directory: {requested}")
+    return path
@@ -0,0 +1,179 @@
+"""Write-behind persistence for quiz results and a small TTL cache for user lookups.
+
+SQLite serializes writers and each commit waits on an fsync, so committing
+every result in its own request caps /api/predict throughput. Results are
+queued instead and written by one thread, many rows per transaction.
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+_FLUSH = object()
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Buffers items in memory and hands them to ``write_fn`` in batches from one writer thread.
+
+    A batch is written once it holds ``max_batch`` items or its oldest item has
+    waited ``max_delay`` seconds; with ``max_delay=0`` each write simply takes
+    everything that queued up during the previous one (a group commit).
+    ``submit`` returns a Future that resolves once the item's batch has been
+    written, so callers choose whether to wait. A batch that fails is retried
+    one item at a time, so only the items that fail on their own are lost
+    (counted as ``failed``).
+    """
+
+    def __init__(self, write_fn, max_batch=100, max_delay=0.05, name='write-behind'):
+        self.write_fn = write_fn
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._close_lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.rows = 0
+        self.failed = 0
+        self._writer = threading.Thread(target=self._run, name=name, daemon=True)
+        self._writer.start()
+
+    def submit(self, item):
+        """Queue ``item`` for the next batch; returns a Future set when it is written"""
+        future = Future()
+        with self._close_lock:
+            # Checked and queued together, so nothing lands behind close()'s final flush
+            if self._closed:
+                raise RuntimeError('Write-behind queue is closed')
+            self._queue.put((item, future))
+        return future
+
+    def flush(self, timeout=None):
+        """Write everything queued so far and wait for it"""
+        future = Future()
+        self._queue.put((_FLUSH, future))
+        future.result(timeout)
+
+    def _run(self):
+        while True:
+            batch = []
+            control = None
+            item = self._queue.get()
+            deadline = time.monotonic() + self.max_delay
+            while True:
+                if item[0] is _FLUSH or item[0] is _STOP:
+                    control = item
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    # Take whatever is already waiting, then wait out the rest of max_delay
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+
+            if batch:
+                self._write(batch)
+            if control is not None:
+                control[1].set_result(None)
+                if control[0] is _STOP:
+                    return
+
+    def _write(self, batch):
+        try:
+            self.write_fn([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                # One bad row shouldn't take the rest of its batch down with it
+                for entry in batch:
+                    self._write([entry])
+                return
+            print(f"❌ Failed to write a queued row: {e}")
+            with self._stats_lock:
+                self.failed += 1
+            batch[0][1].set_exception(e)
+            return
+        with self._stats_lock:
+            self.batches += 1
+            self.rows += len(batch)
+        for _, future in batch:
+            future.set_result(None)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'pending': self._queue.qsize(),
+                'max_batch': self.max_batch,
+                'max_delay_ms': self.max_delay * 1000,
+                'batches': self.batches,
+                'rows': self.rows,
+                'failed': self.failed,
+                'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+            }
+
+    def close(self, timeout=None):
+        """Write whatever is still queued, then stop the writer thread"""
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put((_STOP, future))
+        future.result(timeout)
+        self._writer.join(timeout)
+
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries expire ``ttl`` seconds after they are set"""
+
+    def __init__(self, max_entries=10000, ttl=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """The cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, self._clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,396 @@
+import hashlib
+import os
+import threading
+
+import joblib
+import pandas as pd
+
+from inference import AnswerEncoder, FlatForest, ScoreCache
+from metrics import stage
+
+# --- Mappings (from model training notebook) ---
+# This ensures data is encoded exactly as the model expects, even if .pkl files are corrupt.
+
+QUESTION_MAPPING = {
+    "What is your age group?": "what is your age group?",
+    "On average, how many hours do you sleep at night?": "on average, how many hours do you sleep at night?",
+    "How often do you have trouble falling asleep?": "how often do you have trouble falling asleep?",
+    "Do you wake up feeling well-rested?": "do you wake up feeling well-rested?",
+    "How often do you feel tired or drowsy during the day?": "how often do you feel tired or drowsy during the day?",
+    "Do you face difficulty concentrating or staying focused during the day?": "do you face difficulty concentrating or staying focused during the day?",
+    "How often do you feel anxious or nervous?": "how often do you feel anxious or nervous?",
+    "How would you describe your current emotional state?": "how would you describe your current emotional state?",
+    "Have you experienced trauma that continues to disturb your sleep?": "have you experienced trauma that continues to disturb your sleep?",
+    "Do you often worry excessively about the future or daily tasks before bed?": "do you often worry excessively about the future or daily tasks before bed?",
+    "Do you dwell on past events (rumination) before falling asleep?": "do you dwell on past events (rumination) before falling asleep?",
+    "Do you experience chronic worry that keeps your mind active at night?": "do you experience chronic worry that keeps your mind active at night?",
+    "How often do you use mobile or digital devices before sleeping?": "how often do you use mobile or digital devices before sleeping?",
+    "How often do you consume caffeinated drinks (tea/coffee/energy drinks) after evening?": "how often do you consume caffeinated drinks (tea/coffee/energy drinks) after evening?",
+    "Do you have someone to talk to when you feel mentally low or stressed?": "do you have someone to talk to when you feel mentally low or stressed?",
+    "How would you describe the environment at your home/school/work?": "how would you describe the environment at your home/school/work?",
+    "How often does bright lighting in your room affect your ability to sleep?": "do you have bright lighting in your sleeping environment?",
+    "How would you rate the noise level in your sleeping environment?": "how would you rate the noise level in your sleeping environment?",
+    "How often does your sleeping environment (room temperature, bedding, etc.) feel uncomfortable?": "how often does your sleeping environment (room temperature, bedding, etc.) feel uncomfortable?",
+    "Do you experience any physical pain or discomfort while trying to sleep?": "do you experience any physical pain or discomfort while trying to sleep?",
+    "How often do you exercise during the day?": "do you have any medical condition that interferes with your sleep?",
+    "How would you rate your stress levels before bedtime?": "are you currently taking any medications that may affect your sleep patterns?",
+    "How often do you take naps during the day?": "have you been diagnosed with any sleep disorders (e.g., insomnia, apnea)?",
+    "How would you describe your bedtime routine?": "have you experienced any hormonal changes (e.g., puberty, menstruation, menopause) affecting sleep?",
+    "How often do you feel refreshed after waking up?": "are you diagnosed with any neurological disorder (e.g., parkinson's, epilepsy) affecting sleep?"
+}
+
+ORDINAL_MAPPINGS = {
+    'what is your age group?': {'0–12 (children)': 0, '13–18 (adolescents)': 1, '19–30 (young adults)': 2, '31+ (adults & seniors)': 3},
+    'on average, how many hours do you sleep at night?': {'less than 4 hours': 0, '4–6 hours': 1, '6–8 hours': 2, 'more than 8 hours': 3},
+    'how often do you have trouble falling asleep?': {'never': 0, 'occasionally': 1, 'frequently': 2, 'always': 3},
+    'how often do you feel tired or drowsy during the day?': {'never': 0, 'rarely': 1, 'frequently': 2, 'every day': 3},
+    'how often do you feel anxious or nervous?': {'never': 0, 'sometimes': 1, 'often': 2, 'always': 3},
+    'how would you describe your current emotional state?': {'happy and content': 0, 'occasionally stressed': 1, 'often overwhelmed': 2, 'mentally distressed': 3},
+    'have you experienced trauma that continues to disturb your sleep?': {'no': 0, 'no trauma': 0, 'yes, but sleep unaffected': 1, 'yes, occasionally affects sleep': 2, 'yes, frequently affects sleep': 3},
+    'do you dwell on past events (rumination) before falling asleep?': {'never': 0, 'occasionally': 1, 'frequently': 2, 'always': 3},
+    'how often do you use mobile or digital devices before sleeping?': {'never': 0, 'sometimes': 1, 'most nights': 2, 'every night': 3},
+    'how often do you consume caffeinated drinks (tea/coffee/energy drinks) after evening?': {'never': 0, 'rarely': 1, 'frequently': 2, 'daily': 3},
+    'how would you describe the environment at your home/school/work?': {'very supportive': 0, 'somewhat supportive': 1, 'neutral': 2, 'stressful and unsupportive': 3},
+    'how would you rate the noise level in your sleeping environment?': {'very quiet': 0, 'mostly quiet': 1, 'occasionally noisy': 2, 'very noisy': 3},
+    'how often does your sleeping environment (room temperature, bedding, etc.) feel uncomfortable?': {'never': 0, 'sometimes': 1, 'often': 2, 'always': 3},
+    'do you have any medical condition that interferes with your sleep?': {'no medical condition': 0, 'mild condition': 1, 'moderate condition': 2, 'severe condition': 3},
+    'have you been diagnosed with any sleep disorders (e.g., insomnia, apnea)?': {'no': 0, 'diagnosed, under control': 1, 'diagnosed, affects sleep': 2},
+    'are you diagnosed with any neurological disorder (e.g., parkinson\'s, epilepsy) affecting sleep?': {'no': 0, 'mild condition': 1, 'moderate impact': 2, 'severe impact on sleep': 3}
+}
+
+BINARY_MAPPINGS = {
+    'do you wake up feeling well-rested?': {'yes': 1, 'no': 0, 'always': 1, 'often': 1, 'sometimes': 0, 'never': 0},
+    'do you face difficulty concentrating or staying focused during the day?': {'yes': 1, 'no': 0, 'never': 0, 'occasionally': 1, 'often': 1, 'always': 1},
+    'do you often worry excessively about the future or daily tasks before bed?': {'yes': 1, 'no': 0, 'never': 0, 'occasionally': 1, 'frequently': 1, 'always': 1},
+    'do you experience chronic worry that keeps your mind active at night?': {'yes': 1, 'no': 0, 'never': 0, 'occasionally': 1, 'frequently': 1, 'always': 1},
+    'do you have someone to talk to when you feel mentally low or stressed?': {'yes': 1, 'no': 0, 'always': 1, 'most of the time': 1, 'sometimes': 0, 'never': 0},
+    'do you have bright lighting in your sleeping environment?': {'yes': 1, 'no': 0, 'never': 0, 'sometimes': 1, 'often': 1, 'always': 1},
+    'do you experience any physical pain or discomfort while trying to sleep?': {'yes': 1, 'no': 0, 'never': 0, 'occasionally': 1, 'often': 1, 'always': 1},
+    'are you currently taking any medications that may affect your sleep patterns?': {'yes': 1, 'no': 0},
+    'have you experienced any hormonal changes (e.g., puberty, menstruation, menopause) affecting sleep?': {'yes': 1, 'no': 0}
+}
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), 'models')
+MODEL_FILES = ('sleep_model.pkl', 'scaler.pkl', 'feature_names.pkl', 'encoders.pkl')
+
+class SleepScorePredictor:
+    def __init__(self, model_dir=None, score_cache_size=0):
+        self.model_dir = model_dir or MODEL_DIR
+        self.score_cache_size = score_cache_size
+        self.score_cache = None
+        self.model_signature = None
+        self.model_version = None
+        self.model = None
+        self.scaler = None
+        self.encoders = {}
+        self.feature_names = []
+        self.encoder = None
+        self.kernel = None
+        self.load_error = None
+        self._mmap_mode = None
+        self._ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._load_thread = None
+        
+    def load_model(self, mmap_mode=None):
+        """Load the trained model and related files.
+
+        With ``mmap_mode='r'`` joblib memory-maps the numpy arrays stored in
+        the pickles, so forked workers share those pages with the parent.
+        """
+        try:
+            model_path = os.path.join(self.model_dir, 'sleep_model.pkl')
+            scaler_path = os.path.join(self.model_dir, 'scaler.pkl')
+            feature_names_path = os.path.join(self.model_dir, 'feature_names.pkl')
+            encoders_path = os.path.join(self.model_dir, 'encoders.pkl')
+            self.model_signature = self.model_files_signature()
+            self.model_version = self.model_files_version()
+            
+            # Check if model file exists
+            if not os.path.exists(model_path):
+                raise FileNotFoundError("Model file not found. Please ensure the model is trained first.")
+            
+            # Load model (this should work)
+            self.model = joblib.load(model_path, mmap_mode=mmap_mode)
+            print("✅ Model loaded successfully")
+            
+            # Try to load feature names
+            if os.path.exists(feature_names_path):
+                try:
+                    self.feature_names = joblib.load(feature_names_path, mmap_mode=mmap_mode)
+                    print("✅ Feature names loaded successfully")
+                except Exception as e:
+                    print(f"⚠️ Warning: Could not load feature names: {e}")
+                    # Create default feature names based on the model
+                    if hasattr(self.model, 'feature_names_in_'):
+                        self.feature_names = list(self.model.feature_names_in_)
+                    else:
+                        # Fallback feature names based on the questions
+                        self.feature_names = [
+                            'what is your age group?',
+                            'on average, how many hours do you sleep at night?',
+                            'how often do you have trouble falling asleep?',
+                            'do you wake up feeling well-rested?',
+                            'how often do you feel tired or drowsy during the day?',
+                            'do you face difficulty concentrating or staying focused during the day?',
+                            'how often do you feel anxious or nervous?',
+                            'how would you describe your current emotional state?',
+                            'have you experienced trauma that continues to disturb your sleep?',
+                            'do you often worry excessively about the future or daily tasks before bed?',
+                            'do you dwell on past events (rumination) before falling asleep?',
+                            'do you experience chronic worry that keeps your mind active at night?',
+                            'how often do you use mobile or digital devices before sleeping?',
+                            'how often do you consume caffeinated drinks (tea/coffee/energy drinks) after evening?',
+                            'do you have someone to talk to when you feel mentally low or stressed?',
+                            'how would you describe the environment at your home/school/work?',
+                            'do you have bright lighting in your sleeping environment?',
+                            'how would you rate the noise level in your sleeping environment?',
+                            'how often does your sleeping environment (room temperature, bedding, etc.) feel uncomfortable?',
+                            'do you experience any physical pain or discomfort while trying to sleep?',
+                            'do you have any medical condition that interferes with your sleep?',
+                            'are you currently taking any medications that may affect your sleep patterns?',
+                            'have you been diagnosed with any sleep disorders (e.g., insomnia, apnea)?',
+                            'have you experienced any hormonal changes (e.g., puberty, menstruation, menopause) affecting sleep?',
+                            'are you diagnosed with any neurological disorder (e.g., parkinson\'s, epilepsy) affecting sleep?'
+                        ]
+            
+            # Try to load scaler
+            if os.path.exists(scaler_path):
+                try:
+                    self.scaler = joblib.load(scaler_path, mmap_mode=mmap_mode)
+                    print("✅ Scaler loaded successfully")
+                except Exception as e:
+                    print(f"⚠️ Warning: Could not load scaler: {e}")
+                    # Set scaler to None on failure
+                    self.scaler = None
+                    print("✅ Scaler set to None as fallback.")
+            
+            # Try to load encoders
+            if os.path.exists(encoders_path):
+                try:
+                    self.encoders = joblib.load(encoders_path, mmap_mode=mmap_mode)
+                    print("✅ Encoders loaded successfully")
+                except Exception as e:
+                    print(f"⚠️ Warning: Could not load encoders: {e}")
+                    # Create default encoders
+                    self.encoders = {}
+                    print("✅ Created fallback encoders")
+            
+            # Compile the answer encoder once for the loaded feature order
+            self.encoder = AnswerEncoder(self.feature_names, ORDINAL_MAPPINGS, BINARY_MAPPINGS)
+            
+            # Fold the scaler into the forest and flatten it for NumPy inference
+            try:
+                if len(self.feature_names) != self.model.n_features_in_:
+                    raise ValueError("feature names do not match the model")
+                self.kernel = FlatForest.from_estimator(self.model, self.scaler)
+                print("✅ Inference kernel compiled successfully")
+            except Exception as e:
+                print(f"⚠️ Warning: Could not compile inference kernel, using sklearn: {e}")
+                self.kernel = None
+            
+            # Cached scores are only valid for the model files they came from
+            if self.score_cache_size:
+                if self.score_cache is None or len(self.score_cache.weights) != len(self.feature_names):
+                    self.score_cache = ScoreCache(len(self.feature_names), self.score_cache_size)
+                self.score_cache.bind(self.model_signature)
+            
+            self.load_error = None
+            self._ready.set()
+            return True
+        except Exception as e:
+            print(f"❌ Error loading model: {e}")
+            self.load_error = str(e)
+            return False
+
+    @property
+    def is_ready(self):
+        return self._ready.is_set()
+
+    @property
+    def is_loading(self):
+        return self._load_thread is not None and self._load_thread.is_alive()
+
+    def start_background_load(self, mmap_mode='r'):
+        """Load the model in a daemon thread unless it is loaded or already loading"""
+        with self._load_lock:
+            self._mmap_mode = mmap_mode
+            if self.is_ready or self.is_loading:
+                return
+            self._load_thread = threading.Thread(
+                target=self.load_model, kwargs={'mmap_mode': mmap_mode}, name='model-loader', daemon=True
+            )
+            self._load_thread.start()
+
+    def wait_until_ready(self, timeout=None):
+        """Wait up to ``timeout`` seconds for the model, (re)starting a load if none is running.
+
+        Covers a failed earlier load and gunicorn workers forked before the
+        parent's loader thread finished (threads don't survive a fork).
+        """
+        if self.is_ready:
+            return True
+        self.start_background_load(self._mmap_mode)
+        return self._ready.wait(timeout)
+
+    def model_files_signature(self):
+        """Size and modification time of each model file, to detect a changed model"""
+        signature = []
+        for name in MODEL_FILES:
+            path = os.path.join(self.model_dir, name)
+            if os.path.exists(path):
+                stat = os.stat(path)
+                signature.append((name, stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
+    def model_files_version(self):
+        """Short content hash of the model files, recorded with every score"""
+        digest = hashlib.sha256()
+        for name in MODEL_FILES:
+            path = os.path.join(self.model_dir, name)
+            if os.path.exists(path):
+                digest.update(name.encode())
+                with open(path, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(block)
+        return digest.hexdigest()[:12]
+
+    def normalize_text(self, text):
+        """Normalize text data"""
+        if isinstance(text, str):
+            return text.strip().lower()
+        return text
+
+    def encode_features(self, input_data):
+        """Encode one answer dict, or a list of them, into a matrix in training feature order."""
+        encoder = self.answer_encoder()
+        if isinstance(input_data, dict):
+            return encoder.encode(input_data)
+        return encoder.encode_many(input_data)
+
+    def answer_encoder(self):
+        """The AnswerEncoder for this model's features, built on first use"""
+        if self.encoder is None:
+            self.encoder = AnswerEncoder(self.feature_names, ORDINAL_MAPPINGS, BINARY_MAPPINGS)
+        return self.encoder
+
+    def encode_features_pandas(self, df_input):
+        """Reference DataFrame encoder that AnswerEncoder reproduces; kept for parity checks and benchmarks."""
+        df_encoded = df_input.copy()
+        
+        # Normalize text values to lowercase
+        for col in df_encoded.columns:
+            df_encoded[col] = df_encoded[col].apply(self.normalize_text)
+
+        # --- Manual Encoding ---
+        # This is now the primary method to ensure consistency.
+        
+        # Apply ordinal encoding
+        for column, mapping in ORDINAL_MAPPINGS.items():
+            if column in df_encoded.columns:
+                df_encoded[column] = df_encoded[column].map(mapping)
+
+        # Apply binary encoding
+        for column, mapping in BINARY_MAPPINGS.items():
+            if column in df_encoded.columns:
+                df_encoded[column] = df_encoded[column].map(mapping)
+        
+        # For any other columns that might be objects, encode them numerically
+        for column in df_encoded.columns:
+            if df_encoded[column].dtype == 'object':
+                df_encoded[column] = pd.Categorical(df_encoded[column]).codes
+        
+        df_encoded = df_encoded.fillna(0)
+        return df_encoded
+
+    def predict_sleep_score(self, input_data):
+        """Predict sleep score for new data"""
+        if self.model is None:
+            raise ValueError("Model not loaded. Please load the model first.")
+        
+        # Encode features straight into training column order
+        with stage('encode_features'):
+            X_input = self.encode_features(input_data)
+        
+        # Predict
+        prediction = self.predict_matrix(X_input)
+        return prediction[0]
+
+    def predict_matrix(self, X_input):
+        """Predict encoded rows, serving repeats from the score cache when enabled"""
+        if self.score_cache is not None:
+            return self.score_cache.predict(X_input, self._predict_uncached)
+        return self._predict_uncached(X_input)
+
+    def _predict_uncached(self, X_input):
+        """Predict encoded rows with the compiled kernel, or scaler + model without one"""
+        if self.kernel is not None:
+            # The scaler is folded into the kernel, so there is no separate scaling stage
+            with stage('model_predict'):
+                return self.kernel.predict(X_input)
+        
+        # Scale input
+        if self.scaler:
+            with stage('scaler_transform'):
+                X_input_scaled = self.scaler.transform(X_input)
+        else:
+            # If scaler is not available, use the input as is
+            X_input_scaled = X_input
+        
+        with stage('model_predict'):
+            return self.model.predict(X_input_scaled)
+
+    def predict_batch(self, records, chunk_size=1024):
+        """Predict sleep scores for many answer sets at once.
+
+        Rows are encoded and predicted one chunk at a time so any per-call
+        overhead is paid once per chunk rather than once per row. Returns one
+        dict per input row holding either the score or the error that
+        prevented scoring it; a chunk that fails is retried row by row so the
+        error lands only on the rows that cause it.
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded. Please load the model first.")
+
+        encoder = self.answer_encoder()
+        results = [None] * len(records)
+        valid_rows = []
+        for i, record in enumerate(records):
+            if not isinstance(record, dict):
+                results[i] = {'sleep_score': None, 'error': 'Answers must be an object'}
+            elif not encoder.knows_any(record):
+                # Would otherwise be scored as if every answer were missing
+                results[i] = {'sleep_score': None, 'error': 'No recognized questions in answers'}
+            else:
+                valid_rows.append(i)
+
+        for start in range(0, len(valid_rows), chunk_size):
+            chunk_rows = valid_rows[start:start + chunk_size]
+            try:
+                # One matrix in training column order; missing features are 0
+                X_chunk = self.encode_features([records[i] for i in chunk_rows])
+                predictions = self.predict_matrix(X_chunk)
+                for i, prediction in zip(chunk_rows, predictions):
+                    results[i] = {'sleep_score': prediction, 'error': None}
+            except Exception:
+                for i in chunk_rows:
+                    try:
+                        results[i] = {'sleep_score': self.predict_sleep_score(records[i]), 'error': None}
+                    except Exception as e:
+                        results[i] = {'sleep_score': None, 'error': str(e)}
+
+        return results
+
+def map_frontend_answers(answers_data):
+    """Transform frontend question keys to backend feature names"""
+    input_for_predictor = {}
+    for frontend_question, answer in answers_data.items():
+        backend_question = QUESTION_MAPPING.get(frontend_question)
+        if backend_question:
+            input_for_predictor[backend_question] = answer
+    return input_for_predictor
+
+def calculate_effectiveness(predicted_score):
+    """Scale a predicted sleep score to a 0-100 effectiveness percentage"""
+    min_score, max_score = 25, 53
+    return max(0, min(100, ((predicted_score - min_score) / (max_score - min_score)) * 100))
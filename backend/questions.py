@@ -0,0 +1,139 @@
+"""The quiz questions shown by the frontend, and a compact codec for answer sets.
+
+Answers arrive keyed by full question text, with the option text as value.
+For storage they pack into one byte per question holding the option index.
+"""
+
+QUESTIONS = [
+    {
+        "question": "What is your age group?",
+        "options": ["0–12 (Children)", "13–18 (Adolescents)", "19–30 (Young Adults)", "31+ (Adults & Seniors)"]
+    },
+    {
+        "question": "On average, how many hours do you sleep at night?",
+        "options": ["Less than 4 hours", "4–6 hours", "6–8 hours", "More than 8 hours"]
+    },
+    {
+        "question": "How often do you have trouble falling asleep?",
+        "options": ["Never", "Occasionally", "Frequently", "Always"]
+    },
+    {
+        "question": "Do you wake up feeling well-rested?",
+        "options": ["Always", "Often", "Sometimes", "Never"]
+    },
+    {
+        "question": "How often do you feel tired or drowsy during the day?",
+        "options": ["Never", "Rarely", "Frequently", "Every day"]
+    },
+    {
+        "question": "Do you face difficulty concentrating or staying focused during the day?",
+        "options": ["Never", "Occasionally", "Often", "Always"]
+    },
+    {
+        "question": "How often do you feel anxious or nervous?",
+        "options": ["Never", "Sometimes", "Often", "Always"]
+    },
+    {
+        "question": "How would you describe your current emotional state?",
+        "options": ["Happy and content", "Occasionally stressed", "Often overwhelmed", "Mentally distressed"]
+    },
+    {
+        "question": "Have you experienced trauma that continues to disturb your sleep?",
+        "options": ["No trauma", "Yes, but sleep unaffected", "Yes, occasionally affects sleep", "Yes, frequently affects sleep"]
+    },
+    {
+        "question": "Do you often worry excessively about the future or daily tasks before bed?",
+        "options": ["Never", "Occasionally", "Frequently", "Always"]
+    },
+    {
+        "question": "Do you dwell on past events (rumination) before falling asleep?",
+        "options": ["Never", "Occasionally", "Frequently", "Always"]
+    },
+    {
+        "question": "Do you experience chronic worry that keeps your mind active at night?",
+        "options": ["Never", "Occasionally", "Frequently", "Always"]
+    },
+    {
+        "question": "How often do you use mobile or digital devices before sleeping?",
+        "options": ["Never", "Occasionally", "Most nights", "Every night"]
+    },
+    {
+        "question": "How often do you consume caffeinated drinks (tea/coffee/energy drinks) after evening?",
+        "options": ["Never", "Rarely", "Frequently", "Daily"]
+    },
+    {
+        "question": "Do you have someone to talk to when you feel mentally low or stressed?",
+        "options": ["Always", "Most of the time", "Sometimes", "Never"]
+    },
+    {
+        "question": "How would you describe the environment at your home/school/work?",
+        "options": ["Very supportive", "Somewhat supportive", "Neutral", "Stressful and unsupportive"]
+    },
+    {
+        "question": "How often does bright lighting in your room affect your ability to sleep?",
+        "options": ["Never", "Sometimes", "Often", "Always"]
+    },
+    {
+        "question": "How would you rate the noise level in your sleeping environment?",
+        "options": ["Very quiet", "Mostly quiet", "Occasionally noisy", "Very noisy"]
+    },
+    {
+        "question": "How often does your sleeping environment (room temperature, bedding, etc.) feel uncomfortable?",
+        "options": ["Never", "Sometimes", "Often", "Always"]
+    },
+    {
+        "question": "Do you experience any physical pain or discomfort while trying to sleep?",
+        "options": ["Never", "Occasionally", "Often", "Always"]
+    },
+    {
+        "question": "How often do you exercise during the day?",
+        "options": ["Never", "Occasionally", "Regularly", "Daily"]
+    },
+    {
+        "question": "How would you rate your stress levels before bedtime?",
+        "options": ["Very low", "Moderate", "High", "Extremely high"]
+    },
+    {
+        "question": "How often do you take naps during the day?",
+        "options": ["Never", "Rarely", "Sometimes", "Daily"]
+    },
+    {
+        "question": "How would you describe your bedtime routine?",
+        "options": ["Consistent and relaxing", "Somewhat consistent", "Inconsistent", "No routine"]
+    },
+    {
+        "question": "How often do you feel refreshed after waking up?",
+        "options": ["Always", "Often", "Sometimes", "Rarely"]
+    }
+]
+
+UNANSWERED = 0xFF
+
+# Stored blobs depend on this order: only ever append questions or options
+_QUESTION_INDEX = {q['question']: i for i, q in enumerate(QUESTIONS)}
+_OPTION_INDEX = [{option: i for i, option in enumerate(q['options'])} for q in QUESTIONS]
+
+
+def pack_answers(answers):
+    """One option-index byte per question, or None if the answers can't round-trip exactly"""
+    if not isinstance(answers, dict):
+        return None
+    codes = bytearray([UNANSWERED]) * len(QUESTIONS)
+    for question, answer in answers.items():
+        index = _QUESTION_INDEX.get(question)
+        if index is None or not isinstance(answer, str):
+            return None
+        option = _OPTION_INDEX[index].get(answer)
+        if option is None:
+            return None
+        codes[index] = option
+    return bytes(codes)
+
+
+def unpack_answers(packed):
+    """Rebuild the answers dict that pack_answers encoded"""
+    answers = {}
+    for question, code in zip(QUESTIONS, packed):
+        if code != UNANSWERED:
+            answers[question['question']] = question['options'][code]
+    return answers
@@ -0,0 +1,184 @@
+"""Age-specific sleep recommendations.
+
+The output only depends on the age group, the priority band and the
+effectiveness rounded to one decimal, so the text around the effectiveness
+number is rendered once per (age group, band) at import time. Saved quiz
+results store the template ID and the effectiveness in tenths instead of
+the rendered text.
+"""
+
+RECOMMENDATIONS = {
+    '0–12 (children)': {
+        'title': '🧸 Sleep Recommendations for Children (0-12 years)',
+        'remedies': [
+            "🛏️ Consistent Bedtime Routine: Establish a calming 30-45 minute bedtime routine with activities like reading, gentle music, or quiet storytelling",
+            "📱 Screen Time Limits: No screens 1-2 hours before bedtime. Blue light can disrupt melatonin production in developing brains",
+            "🌙 Optimal Sleep Duration: Ensure 9-11 hours of sleep for school-age children (6-13 years) and 11-14 hours for preschoolers (3-5 years)",
+            "🍎 Healthy Sleep Environment: Keep bedroom cool (65-70°F), dark, and quiet. Consider blackout curtains and white noise machines",
+            "🏃 Physical Activity: Encourage regular outdoor play and physical activity during the day, but avoid vigorous exercise 3 hours before bedtime",
+            "🥛 Nutrition & Hydration: Avoid caffeine completely. Limit fluids 1 hour before bedtime. Consider a light snack if hungry",
+            "🧘 Relaxation Techniques: Teach simple breathing exercises or gentle stretching. Try progressive muscle relaxation for anxious children",
+            "🎵 Comfort Items: Allow comfort objects like stuffed animals or soft blankets that provide security and comfort"
+        ]
+    },
+    
+    '13–18 (adolescents)': {
+        'title': '🎓 Sleep Recommendations for Adolescents (13-18 years)',
+        'remedies': [
+            "⏰ Circadian Rhythm Support: Understand that teen brains naturally shift to later sleep times. Aim for 8-10 hours of sleep with consistent sleep-wake times",
+            "📚 Study Schedule Management: Create a study schedule that doesn't require late-night cramming. Use active study techniques during peak alertness hours",
+            "📱 Digital Wellness: Use blue light filters on devices after sunset. Create a charging station outside the bedroom for phones and tablets",
+            "🏋️ Exercise Timing: Regular exercise is crucial but avoid intense workouts 4 hours before bedtime. Morning or afternoon exercise is ideal",
+            "☕ Caffeine Awareness: Limit caffeine intake, especially after 2 PM. Be aware of hidden caffeine in sodas, energy drinks, and chocolate",
+            "🧠 Stress Management: Practice stress-reduction techniques like journaling, meditation apps, or talking with trusted adults about daily pressures",
+            "🛏️ Sleep Environment: Create a teen-friendly sleep sanctuary with comfortable bedding, appropriate temperature, and minimal light pollution",
+            "👥 Social Balance: Balance social activities with sleep needs. Educate about the importance of sleep for academic performance and emotional regulation"
+        ]
+    },
+    
+    '19–30 (young adults)': {
+        'title': '🌟 Sleep Recommendations for Young Adults (19-30 years)',
+        'remedies': [
+            "⚖️ Work-Life Balance: Establish clear boundaries between work/study and personal time. Avoid checking emails or work-related content before bed",
+            "🍷 Substance Awareness: Limit alcohol consumption, especially 3 hours before bedtime. Alcohol disrupts REM sleep and sleep quality",
+            "💪 Regular Exercise Routine: Aim for 150 minutes of moderate exercise weekly. Morning workouts can help regulate circadian rhythms",
+            "🧘 Mindfulness & Meditation: Practice mindfulness meditation, progressive muscle relaxation, or use guided sleep meditation apps",
+            "📅 Consistent Schedule: Maintain regular sleep-wake times even on weekends. Avoid 'social jet lag' from irregular weekend sleep patterns",
+            "🌡️ Sleep Environment Optimization: Invest in quality mattress and pillows. Keep bedroom temperature between 60-67°F for optimal sleep",
+            "🍽️ Nutrition Timing: Avoid large meals 3 hours before bedtime. If hungry, opt for light snacks with tryptophan (turkey, milk, bananas)",
+            "💼 Financial Stress Management: Address financial anxieties through budgeting, financial planning, or seeking counseling to reduce bedtime worry"
+        ]
+    },
+    
+    '31+ (adults & seniors)': {
+        'title': '🏡 Sleep Recommendations for Adults & Seniors (31+ years)',
+        'remedies': [
+            "🏥 Medical Evaluation: Regular check-ups to identify and treat sleep disorders, sleep apnea, or other medical conditions affecting sleep",
+            "💊 Medication Review: Consult healthcare providers about medications that might affect sleep. Some medications can cause insomnia or drowsiness",
+            "🧘 Relaxation Practices: Incorporate relaxation techniques like deep breathing, gentle yoga, or tai chi to manage stress and prepare for sleep",
+            "🌿 Natural Sleep Aids: Consider natural options like chamomile tea, valerian root, or melatonin supplements (consult healthcare provider first)",
+            "📖 Sleep Hygiene Education: Understand age-related sleep changes. Older adults may need less sleep (7-8 hours) but should maintain quality",
+            "🏃 Age-Appropriate Exercise: Regular, moderate exercise like walking, swimming, or gentle stretching. Avoid vigorous exercise close to bedtime",
+            "🍽️ Dietary Considerations: Limit spicy foods, large meals, and excessive fluids before bedtime. Consider foods rich in magnesium and calcium",
+            "🧠 Cognitive Health: Engage in mentally stimulating activities during the day. Address anxiety, depression, or chronic pain that may affect sleep",
+            "🛏️ Comfort Optimization: Ensure mattress and pillows provide adequate support for joints and spine. Consider memory foam or adjustable beds if needed"
+        ]
+    }
+}
+
+NO_RECOMMENDATIONS = "No specific recommendations available for this age group."
+
+# (upper effectiveness bound, priority, icon, call to action), checked in order
+PRIORITY_BANDS = [
+    (50, 'HIGH', '🚨', "Focus on implementing 3-4 of these recommendations immediately:"),
+    (75, 'MODERATE', '⚠️', "Consider implementing 2-3 of these recommendations to improve your sleep:"),
+    (float('inf'), 'MAINTENANCE', '✅', "Great job! Use these recommendations to maintain and optimize your sleep:"),
+]
+
+GENERAL_TIPS = (
+    "Start with 1-2 recommendations and gradually incorporate more",
+    "Track your sleep improvements over 2-3 weeks",
+    "Consult healthcare providers for persistent sleep issues",
+    "Remember that sleep improvement takes time and consistency",
+)
+
+
+def priority_band(effectiveness):
+    """Index into PRIORITY_BANDS for an effectiveness percentage"""
+    for band, (upper, _, _, _) in enumerate(PRIORITY_BANDS):
+        if effectiveness < upper:
+            return band
+    return len(PRIORITY_BANDS) - 1
+
+
+def _render_template(rec, band):
+    """Text before and after the effectiveness number for one age group and band"""
+    _, priority, icon, call_to_action = PRIORITY_BANDS[band]
+    rule = '=' * 60
+    prefix = f"\n{rule}\n{rec['title']}\n{rule}\n{icon} Priority Level: {priority} - Your sleep effectiveness is "
+    parts = [f"%\n{call_to_action}\n\n"]
+    parts.extend(f"{i}. {remedy}\n\n" for i, remedy in enumerate(rec['remedies'], 1))
+    parts.append("💡 General Tips:\n")
+    parts.extend(f"• {tip}\n" for tip in GENERAL_TIPS)
+    parts.append(f"{rule}\n")
+    return prefix, ''.join(parts)
+
+
+TEXT_TEMPLATES = {
+    (age_group, band): _render_template(rec, band)
+    for age_group, rec in RECOMMENDATIONS.items()
+    for band in range(len(PRIORITY_BANDS))
+}
+
+STRUCTURED_TEMPLATES = {
+    (age_group, band): {
+        'age_group': age_group,
+        'title': rec['title'],
+        'priority': PRIORITY_BANDS[band][1],
+        'message': PRIORITY_BANDS[band][3],
+        'remedies': tuple(rec['remedies']),
+        'general_tips': GENERAL_TIPS,
+    }
+    for age_group, rec in RECOMMENDATIONS.items()
+    for band in range(len(PRIORITY_BANDS))
+}
+
+# Persisted in quiz_result.recommendation_template: only ever append entries.
+# 0 is NO_RECOMMENDATIONS; the rest follow RECOMMENDATIONS x PRIORITY_BANDS order.
+NO_RECOMMENDATIONS_ID = 0
+TEMPLATE_KEYS = [None] + list(TEXT_TEMPLATES)
+TEMPLATE_IDS = {key: template_id for template_id, key in enumerate(TEMPLATE_KEYS) if key is not None}
+
+
+def recommendation_template(age_group, effectiveness):
+    """(template ID, effectiveness in tenths) that render_recommendations turns back into the text"""
+    template_id = TEMPLATE_IDS.get((age_group, priority_band(effectiveness)))
+    if template_id is None:
+        return NO_RECOMMENDATIONS_ID, None
+    return template_id, int(f"{effectiveness:.1f}".replace('.', ''))
+
+
+def render_recommendations(template_id, effectiveness_tenths):
+    """The text get_sleep_recommendations produced for a stored template ID"""
+    if template_id == NO_RECOMMENDATIONS_ID:
+        return NO_RECOMMENDATIONS
+    prefix, suffix = TEXT_TEMPLATES[TEMPLATE_KEYS[template_id]]
+    return f"{prefix}{effectiveness_tenths / 10:.1f}{suffix}"
+
+
+def parse_recommendations(text):
+    """(template ID, effectiveness in tenths) for previously rendered text, or None if it matches no template"""
+    if text == NO_RECOMMENDATIONS:
+        return NO_RECOMMENDATIONS_ID, None
+    for key, (prefix, suffix) in TEXT_TEMPLATES.items():
+        if not (text.startswith(prefix) and text.endswith(suffix)):
+            continue
+        number = text[len(prefix):len(text) - len(suffix)]
+        try:
+            tenths = int(number.replace('.', '')) if number[-2:-1] == '.' else None
+        except ValueError:
+            tenths = None
+        template_id = TEMPLATE_IDS[key]
+        if tenths is not None and render_recommendations(template_id, tenths) == text:
+            return template_id, tenths
+    return None
+
+
+def get_sleep_recommendations(age_group, sleep_score, effectiveness, structured=False):
+    """Generate age-specific sleep recommendations.
+
+    Returns the formatted text, or with ``structured=True`` a dict with the
+    title, priority, remedies and general tips (None for an unknown age group).
+    """
+    band = priority_band(effectiveness)
+    if structured:
+        template = STRUCTURED_TEMPLATES.get((age_group, band))
+        if template is None:
+            return None
+        return {**template, 'effectiveness': round(effectiveness, 1)}
+
+    template = TEXT_TEMPLATES.get((age_group, band))
+    if template is None:
+        return NO_RECOMMENDATIONS
+    prefix, suffix = template
+    return f"{prefix}{effectiveness:.1f}{suffix}"
@@ -0,0 +1,181 @@
+"""Bulk import of historical quiz results from JSON-lines or CSV files.
+
+Each record needs ``email``, ``timestamp`` (ISO 8601), ``sleep_score`` and
+``effectiveness_percentage``; ``answers`` (an object, or a JSON string in
+CSV files), ``recommendations`` (the rendered text), ``age_group`` and
+``model_version`` are optional. Answers and recommendations are stored in
+the compact form /api/predict uses when they match the known questions and
+templates; without recommendation text they are derived from the age group.
+
+Users are resolved with one email -> id query before the load, and rows go
+in through Core ``executemany`` inserts, ``batch_size`` per transaction.
+Every transaction also records how many input records it covers in the
+``result_import_checkpoint`` table, so an interrupted import resumes after
+the last committed batch without duplicating or losing rows.
+"""
+import csv
+import json
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, insert, select
+
+from migrations import add_missing_indexes
+from questions import pack_answers
+from recommendations import parse_recommendations, recommendation_template
+
+AGE_GROUP_QUESTION = 'What is your age group?'
+
+checkpoint_metadata = MetaData()
+checkpoint_table = Table(
+    'result_import_checkpoint', checkpoint_metadata,
+    Column('source', String(512), primary_key=True),
+    Column('records', Integer, nullable=False),
+)
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def read_records(path):
+    """Records of a .csv file, or of a JSON-lines file otherwise, in file order"""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as file:
+            yield from csv.DictReader(file)
+        return
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None  # counted as invalid, keeps the record numbering stable
+
+
+def parse_timestamp(value):
+    """Naive UTC datetime, as the app stores them, from an ISO 8601 string with or without an offset"""
+    if isinstance(value, str) and value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def result_row(record, user_id):
+    """Column values for one input record"""
+    try:
+        effectiveness = float(record['effectiveness_percentage'])
+        row = {
+            'user_id': user_id,
+            'timestamp': parse_timestamp(record['timestamp']),
+            'sleep_score': float(record['sleep_score']),
+            'effectiveness_percentage': effectiveness,
+            'model_version': record.get('model_version') or None,
+        }
+    except (KeyError, TypeError, ValueError) as e:
+        raise InvalidRecord(f'{type(e).__name__}: {e}')
+
+    answers = record.get('answers') or {}
+    if isinstance(answers, str):
+        try:
+            answers = json.loads(answers)
+        except ValueError:
+            raise InvalidRecord('answers is not valid JSON')
+    packed = pack_answers(answers)
+    row['answers_packed'] = packed
+    row['answers'] = '' if packed is not None else json.dumps(answers)
+
+    text = record.get('recommendations')
+    parsed = parse_recommendations(text) if text else None
+    if parsed is None and not text:
+        age_group = record.get('age_group')
+        if not age_group and isinstance(answers, dict):
+            age_group = answers.get(AGE_GROUP_QUESTION)
+        parsed = recommendation_template(str(age_group or '').strip().lower(), effectiveness)
+    if parsed is not None:
+        row['recommendation_template'], row['recommendation_effectiveness'] = parsed
+        row['recommendations'] = ''
+    else:
+        row['recommendation_template'] = row['recommendation_effectiveness'] = None
+        row['recommendations'] = text
+    return row
+
+
+def import_quiz_results(db, user_model, result_model, path, batch_size=10000, drop_indexes=False,
+                        source=None, restart=False, progress=True):
+    """Load ``path`` into ``result_model``'s table; returns a dict of counts and rows/s"""
+    engine = db.engine
+    table = result_model.__table__
+    source = source or path
+    checkpoint_metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        if restart:
+            connection.execute(checkpoint_table.delete().where(checkpoint_table.c.source == source))
+        done = connection.execute(select(checkpoint_table.c.records)
+                                  .where(checkpoint_table.c.source == source)).scalar() or 0
+        user_ids = dict(connection.execute(select(user_model.email, user_model.id)).all())
+    if done and progress:
+        print(f"↪️ Resuming {source} after {done:,} records")
+
+    if drop_indexes:
+        for index in table.indexes:
+            index.drop(engine, checkfirst=True)
+
+    stats = {'records': done, 'inserted': 0, 'unknown_user': 0, 'invalid': 0}
+    started = time.perf_counter()
+
+    def commit(rows, records):
+        with engine.begin() as connection:
+            if rows:
+                connection.execute(insert(table), rows)
+            updated = connection.execute(checkpoint_table.update()
+                                         .where(checkpoint_table.c.source == source)
+                                         .values(records=records))
+            if updated.rowcount == 0:
+                connection.execute(insert(checkpoint_table).values(source=source, records=records))
+        stats['records'] = records
+        stats['inserted'] += len(rows)
+        if progress:
+            elapsed = time.perf_counter() - started
+            print(f"📥 {records:,} records read, {stats['inserted']:,} inserted, "
+                  f"{stats['inserted'] / elapsed:,.0f} rows/s")
+
+    try:
+        rows = []
+        position = 0
+        for position, record in enumerate(read_records(path), 1):
+            if position <= done:
+                continue
+            if not isinstance(record, dict):
+                stats['invalid'] += 1
+                continue
+            user_id = user_ids.get((record.get('email') or '').strip())
+            if user_id is None:
+                stats['unknown_user'] += 1
+                continue
+            try:
+                rows.append(result_row(record, user_id))
+            except InvalidRecord as e:
+                stats['invalid'] += 1
+                if stats['invalid'] <= 10:
+                    print(f"⚠️ Skipping record {position}: {e}")
+                continue
+            if len(rows) >= batch_size:
+                commit(rows, position)
+                rows = []
+        if rows or position > stats['records']:
+            commit(rows, position)
+    finally:
+        if drop_indexes:
+            for name in add_missing_indexes(db, result_model):
+                print(f"✅ Rebuilt index {name}")
+
+    elapsed = time.perf_counter() - started
+    stats['seconds'] = round(elapsed, 2)
+    stats['rows_per_second'] = round(stats['inserted'] / elapsed, 1) if elapsed else 0.0
+    return stats
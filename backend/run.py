@@ -0,0 +1,11 @@
+"""Start the Sleep Analysis API development server: ``python run.py``.
+
+Inference workers are spawned processes, which import the main script
+before they start; keeping it to this file means they never run app.py's
+database, chat and translation setup.
+"""
+
+if __name__ == '__main__':
+    import app
+
+    app.main()
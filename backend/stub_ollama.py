@@ -0,0 +1,137 @@
+"""A minimal stand-in for the Ollama HTTP API, for tests and benchmarks.
+
+Serves ``POST /api/chat`` (streamed or not) with a canned reply, generating
+one word every ``token_delay`` seconds after ``first_token_delay``, and
+records how many requests it handled at once.
+
+    python stub_ollama.py --port 11434 --token-delay 0.02
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "Keep a regular sleep schedule and avoid screens for an hour before bed."
+
+
+class StubOllamaServer:
+    def __init__(self, reply=DEFAULT_REPLY, first_token_delay=0.0, token_delay=0.0, host='127.0.0.1', port=0):
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def tokens(self):
+        words = self.reply.split(' ')
+        return [word + ' ' for word in words[:-1]] + words[-1:]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; don't let Nagle hold the body back
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self._send(200, 'text/plain', b'Ollama is running')
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if self.path != '/api/chat':
+                    self._send(404, 'application/json', b'{"error": "not found"}')
+                    return
+                with stub._lock:
+                    stub.requests.append(body)
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                try:
+                    if body.get('stream', True):
+                        self._stream(body)
+                    else:
+                        time.sleep(stub.first_token_delay + stub.token_delay * len(stub.tokens()))
+                        self._send(200, 'application/json', json.dumps(stub._chunk(body, stub.reply, True)).encode())
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                time.sleep(stub.first_token_delay)
+                for token in stub.tokens():
+                    self._write_chunk(json.dumps(stub._chunk(body, token, False)).encode() + b'\n')
+                    time.sleep(stub.token_delay)
+                self._write_chunk(json.dumps(stub._chunk(body, '', True)).encode() + b'\n')
+                self._write_chunk(b'')
+
+            def _write_chunk(self, data):
+                self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+                self.wfile.flush()
+
+            def _send(self, status, content_type, data):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _chunk(self, body, content, done):
+        chunk = {
+            'model': body.get('model', 'stub'),
+            'created_at': '2024-01-01T00:00:00Z',
+            'message': {'role': 'assistant', 'content': content},
+            'done': done,
+        }
+        if done:
+            chunk.update({'done_reason': 'stop', 'eval_count': len(self.tokens()), 'prompt_eval_count': 10})
+        return chunk
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-ollama', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--first-token-delay', type=float, default=0.2)
+    parser.add_argument('--token-delay', type=float, default=0.02)
+    args = parser.parse_args()
+    server = StubOllamaServer(first_token_delay=args.first_token_delay, token_delay=args.token_delay, port=args.port)
+    print(f"🧪 Stub Ollama listening on {server.url}")
+    server._server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""Per-user quiz result aggregates, kept up to date as results are saved.
+
+``result_summary`` holds one row per user: the result count, the latest
+result, and the sum, minimum and maximum of the sleep score and
+effectiveness. ``weekly_result_summary`` holds the same aggregates per user
+and week (weeks start on Monday, UTC). Saving a result upserts both rows in
+the transaction that inserts it, with the arithmetic done by the database so
+concurrent saves never lose an update. Reading a summary then costs one row
+plus a bounded number of weekly rows, however long the history is.
+"""
+import functools
+from datetime import timedelta
+
+from sqlalchemy import bindparam, case, delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+# (result column, summary column prefix)
+METRICS = (('sleep_score', 'sleep_score'), ('effectiveness_percentage', 'effectiveness'))
+AGGREGATE_COLUMNS = ('count',) + tuple(f'{prefix}_{kind}' for _, prefix in METRICS for kind in ('sum', 'min', 'max'))
+
+
+def week_start(timestamp):
+    """The Monday of the week ``timestamp`` falls in"""
+    day = timestamp.date()
+    return day - timedelta(days=day.weekday())
+
+
+def _aggregates(result):
+    values = {'count': 1}
+    for column, prefix in METRICS:
+        value = result[column]
+        values.update({f'{prefix}_sum': value, f'{prefix}_min': value, f'{prefix}_max': value})
+    return values
+
+
+def _add(values, other):
+    """Fold the aggregates of ``other`` into ``values`` in place"""
+    values['count'] += other['count']
+    for _, prefix in METRICS:
+        values[f'{prefix}_sum'] += other[f'{prefix}_sum']
+        values[f'{prefix}_min'] = min(values[f'{prefix}_min'], other[f'{prefix}_min'])
+        values[f'{prefix}_max'] = max(values[f'{prefix}_max'], other[f'{prefix}_max'])
+
+
+def _merged(table, new):
+    """SET clauses folding ``new`` (the conflicting insert's values) into the stored aggregates"""
+    merged = {'count': table.c['count'] + new['count']}
+    for _, prefix in METRICS:
+        stored_min, stored_max = table.c[f'{prefix}_min'], table.c[f'{prefix}_max']
+        merged[f'{prefix}_sum'] = table.c[f'{prefix}_sum'] + new[f'{prefix}_sum']
+        merged[f'{prefix}_min'] = case((new[f'{prefix}_min'] < stored_min, new[f'{prefix}_min']), else_=stored_min)
+        merged[f'{prefix}_max'] = case((new[f'{prefix}_max'] > stored_max, new[f'{prefix}_max']), else_=stored_max)
+    return merged
+
+
+def _merged_summary(table, new):
+    merged = _merged(table, new)
+    # Imports can add results older than the stored latest one
+    is_newer = new['latest_timestamp'] >= table.c['latest_timestamp']
+    for name in ('latest_timestamp', 'latest_sleep_score', 'latest_effectiveness'):
+        merged[name] = case((is_newer, new[name]), else_=table.c[name])
+    return merged
+
+
+@functools.lru_cache(maxsize=None)
+def _upsert_statements(dialect, table, key_columns, merged):
+    """(upsert, fallback insert) for one row passed as parameters.
+
+    INSERT ... ON CONFLICT DO UPDATE on SQLite and PostgreSQL; elsewhere an
+    UPDATE, followed by the INSERT when it matched no row. Built once per
+    table, since building the statements costs more than running them.
+    """
+    if dialect in ('sqlite', 'postgresql'):
+        statement = (sqlite if dialect == 'sqlite' else postgresql).insert(table)
+        return statement.on_conflict_do_update(index_elements=list(key_columns),
+                                               set_=merged(table, statement.excluded)), None
+    new = {column.name: bindparam(f'new_{column.name}', type_=column.type) for column in table.columns}
+    statement = (update(table)
+                 .where(*(table.c[name] == bindparam(f'key_{name}', type_=table.c[name].type) for name in key_columns))
+                 .values(**merged(table, new)))
+    return statement, insert(table)
+
+
+def _upsert(connection, table, key_columns, values, merged):
+    upsert, fallback_insert = _upsert_statements(connection.dialect.name, table, key_columns, merged)
+    if fallback_insert is None:
+        connection.execute(upsert, values)
+        return
+    params = {f'new_{name}': value for name, value in values.items()}
+    params.update({f'key_{name}': values[name] for name in key_columns})
+    if connection.execute(upsert, params).rowcount == 0:
+        connection.execute(fallback_insert, values)
+
+
+def record_result(connection, summary_table, weekly_table, result):
+    """Fold one new result (a mapping with user_id, timestamp and both metrics) into its user's aggregates"""
+    aggregates = _aggregates(result)
+    _upsert(connection, summary_table, ('user_id',), {
+        'user_id': result['user_id'],
+        'latest_timestamp': result['timestamp'],
+        'latest_sleep_score': result['sleep_score'],
+        'latest_effectiveness': result['effectiveness_percentage'],
+        **aggregates,
+    }, _merged_summary)
+    _upsert(connection, weekly_table, ('user_id', 'week_start'), {
+        'user_id': result['user_id'],
+        'week_start': week_start(result['timestamp']),
+        **aggregates,
+    }, _merged)
+
+
+def _user_rows(user_id, results):
+    """The summary row and weekly rows of one user, from their results newest first"""
+    summary = None
+    weeks = {}
+    for result in results:
+        aggregates = _aggregates(result)
+        if summary is None:
+            summary = {
+                'user_id': user_id,
+                'latest_timestamp': result['timestamp'],
+                'latest_sleep_score': result['sleep_score'],
+                'latest_effectiveness': result['effectiveness_percentage'],
+                **aggregates,
+            }
+        else:
+            _add(summary, aggregates)
+        week = week_start(result['timestamp'])
+        if week in weeks:
+            _add(weeks[week], aggregates)
+        else:
+            weeks[week] = {'user_id': user_id, 'week_start': week, **aggregates}
+    return summary, list(weeks.values())
+
+
+def rebuild_summaries(connection, result_table, summary_table, weekly_table, batch_size=1000):
+    """Recompute every user's aggregates from ``result_table``; returns (users, results).
+
+    Results are streamed in index order (user, newest first), so memory holds
+    one user's weeks and ``batch_size`` pending summary rows at a time.
+    """
+    connection.execute(delete(weekly_table))
+    connection.execute(delete(summary_table))
+    query = (select(result_table.c.user_id, result_table.c.timestamp, result_table.c.sleep_score,
+                    result_table.c.effectiveness_percentage)
+             .order_by(result_table.c.user_id, result_table.c.timestamp.desc(), result_table.c.id.desc()))
+    summaries, weekly = [], []
+    users = results = 0
+
+    def flush():
+        if summaries:
+            connection.execute(insert(summary_table), summaries)
+            connection.execute(insert(weekly_table), weekly)
+            summaries.clear()
+            weekly.clear()
+
+    current_user, current = None, []
+    rows = connection.execution_options(yield_per=batch_size).execute(query).mappings()
+    for row in rows:
+        results += 1
+        if row['user_id'] != current_user and current:
+            summary, weeks = _user_rows(current_user, current)
+            summaries.append(summary)
+            weekly.extend(weeks)
+            users += 1
+            current = []
+            if len(summaries) >= batch_size:
+                flush()
+        current_user = row['user_id']
+        current.append(row)
+    if current:
+        summary, weeks = _user_rows(current_user, current)
+        summaries.append(summary)
+        weekly.extend(weeks)
+        users += 1
+    flush()
+    return users, results
+
+
+def _stats(aggregates):
+    count = aggregates['count']
+    return {
+        column: {
+            'mean': round(aggregates[f'{prefix}_sum'] / count, 2),
+            'min': aggregates[f'{prefix}_min'],
+            'max': aggregates[f'{prefix}_max'],
+        }
+        for column, prefix in METRICS
+    }
+
+
+def summary_response(summary, weekly, weeks, rolling_weeks):
+    """Response fields for a summary row and its most recent weekly rows (newest first).
+
+    ``weekly`` must hold at least the newest ``max(weeks, rolling_weeks)``
+    rows; the response lists the newest ``weeks`` of them, oldest first. The
+    rolling window covers the ``rolling_weeks`` calendar weeks up to and
+    including the week of the latest result.
+    """
+    if summary is None:
+        return {'count': 0, 'latest': None, 'all_time': None, 'rolling': None, 'weekly': []}
+
+    window_start = week_start(summary['latest_timestamp']) - timedelta(weeks=rolling_weeks - 1)
+    window = None
+    for week in weekly:
+        if week['week_start'] < window_start:
+            continue
+        if window is None:
+            window = {name: week[name] for name in AGGREGATE_COLUMNS}
+        else:
+            _add(window, week)
+
+    return {
+        'count': summary['count'],
+        'latest': {
+            'timestamp': summary['latest_timestamp'].isoformat(),
+            'sleep_score': summary['latest_sleep_score'],
+            'effectiveness_percentage': summary['latest_effectiveness'],
+        },
+        'all_time': _stats(summary),
+        'rolling': {
+            'weeks': rolling_weeks,
+            'from': window_start.isoformat(),
+            'count': window['count'],
+            **_stats(window),
+        } if window else None,
+        'weekly': [{'week_start': week['week_start'].isoformat(), 'count': week['count'], **_stats(week)}
+                   for week in reversed(weekly[:weeks])],
+    }
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from auth import HasherBusy, PasswordHasher, issue_token, verify_token
+
+SECRET = b'test-secret'
+
+
+def test_token_round_trip():
+    token, expires_at = issue_token(SECRET, 7, 'a@example.com', ttl=60)
+
+    assert verify_token(SECRET, token) == (7, 'a@example.com')
+    assert expires_at > time.time()
+
+
+def test_tampered_expired_or_foreign_tokens_are_rejected():
+    token, _ = issue_token(SECRET, 7, 'a@example.com', ttl=60)
+    forged, _ = issue_token(b'other-secret', 8, 'a@example.com', ttl=60)
+    expired, _ = issue_token(SECRET, 7, 'a@example.com', ttl=-1)
+
+    assert verify_token(SECRET, forged.split('.')[0] + '.' + token.split('.')[1]) is None
+    assert verify_token(SECRET, forged) is None
+    assert verify_token(SECRET, expired) is None
+    assert verify_token(SECRET, 'garbage') is None
+    assert verify_token(SECRET, 'a.b.c') is None
+
+
+def test_hasher_hashes_and_verifies():
+    hasher = PasswordHasher(max_workers=1)
+    password_hash = hasher.hash('hunter2')
+
+    assert hasher.verify(password_hash, 'hunter2')
+    assert not hasher.verify(password_hash, 'hunter3')
+    assert hasher.stats()['completed'] == 3
+
+
+def test_hasher_rejects_when_queue_is_full():
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    release = threading.Event()
+    blocked = threading.Thread(target=hasher._run, args=(release.wait,))
+    blocked.start()
+    while hasher.stats()['in_flight'] == 0:
+        time.sleep(0.001)
+
+    with pytest.raises(HasherBusy):
+        hasher.hash('hunter2')
+    release.set()
+    blocked.join()
+    assert hasher.stats()['rejected'] == 1
+
+
+def test_timed_out_hashes_keep_their_slot_until_they_finish():
+    hasher = PasswordHasher(max_workers=1, max_queue=1, timeout=0.01)
+    release = threading.Event()
+    blocked = threading.Thread(target=lambda: pytest.raises(TimeoutError, hasher._run, release.wait))
+    blocked.start()
+    while hasher.stats()['in_flight'] == 0:
+        time.sleep(0.001)
+
+    # Gives up waiting, but the hash is still queued behind the blocked one
+    with pytest.raises(TimeoutError):
+        hasher._run(release.wait)
+    assert hasher.stats()['queued'] == 1
+    with pytest.raises(HasherBusy):
+        hasher.hash('hunter2')
+
+    release.set()
+    blocked.join()
+    while hasher.stats()['completed'] < 2:
+        time.sleep(0.001)
+    assert hasher.stats()['queued'] == 0 and hasher.stats()['in_flight'] == 0
+
+
+def _signup(client, email='a@example.com'):
+    response = client.post('/api/signup', json={'name': 'A', 'email': email, 'password': 'hunter22'})
+    assert response.status_code == 201
+    return response.get_json()['token']
+
+
+def test_token_from_another_key_falls_back_to_email(app_module, client, monkeypatch):
+    token = _signup(client)
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/results/a@example.com', headers=headers).status_code == 200
+
+    # A restart or another worker without AUTH_SECRET signs with a different random key
+    monkeypatch.setattr(app_module, 'AUTH_SECRET', b'another-key')
+    assert client.get('/api/results/a@example.com', headers=headers).status_code == 200
+    assert client.get('/api/results/nobody@example.com', headers=headers).status_code == 404
+
+    monkeypatch.setattr(app_module, 'REQUIRE_AUTH_TOKEN', True)
+    response = client.get('/api/results/a@example.com', headers=headers)
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Invalid or expired token'
+
+
+def test_valid_token_for_another_user_is_forbidden(client):
+    token = _signup(client)
+    _signup(client, 'b@example.com')
+
+    response = client.get('/api/results/b@example.com', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 403
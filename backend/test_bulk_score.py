@@ -0,0 +1,86 @@
+import random
+
+import pandas as pd
+import pytest
+
+import bulk_score
+from bulk_score import score_file
+from predictor import BINARY_MAPPINGS, ORDINAL_MAPPINGS, QUESTION_MAPPING, SleepScorePredictor, map_frontend_answers
+
+
+def _answers_file(path, rows=25):
+    rng = random.Random(7)
+    records = []
+    for i in range(rows):
+        record = {'patient_id': f'p{i}'}
+        for question, column in QUESTION_MAPPING.items():
+            mapping = ORDINAL_MAPPINGS.get(column) or BINARY_MAPPINGS.get(column)
+            record[question] = rng.choice(list(mapping)).title()
+        records.append(record)
+    pd.DataFrame(records).to_csv(path, index=False)
+    return records
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    predictor = SleepScorePredictor()
+    assert predictor.load_model()
+    return predictor
+
+
+def test_scores_match_single_predictions_across_chunks(tmp_path, predictor):
+    records = _answers_file(tmp_path / 'answers.csv')
+    rows, _ = score_file(str(tmp_path / 'answers.csv'), str(tmp_path / 'scores.csv'), chunk_size=4, progress=False)
+
+    scores = pd.read_csv(tmp_path / 'scores.csv')
+    assert rows == len(records) == len(scores)
+    assert list(scores['patient_id']) == [record['patient_id'] for record in records]
+    for record, score in zip(records, scores['sleep_score']):
+        expected = predictor.predict_sleep_score(map_frontend_answers(record))
+        assert score == pytest.approx(round(float(expected), 2))
+    assert set(scores['priority']) <= {'HIGH', 'MODERATE', 'MAINTENANCE'}
+    assert scores['error'].isna().all()
+
+
+def test_worker_processes_give_the_same_output(tmp_path):
+    _answers_file(tmp_path / 'answers.csv', rows=30)
+    score_file(str(tmp_path / 'answers.csv'), str(tmp_path / 'serial.csv'), chunk_size=7, progress=False)
+    score_file(str(tmp_path / 'answers.csv'), str(tmp_path / 'parallel.csv'), chunk_size=7, workers=2,
+               progress=False)
+
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'serial.csv'), pd.read_csv(tmp_path / 'parallel.csv'))
+
+
+def test_parquet_schema_holds_when_later_chunks_have_errors_and_values(tmp_path, monkeypatch):
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    records = _answers_file(tmp_path / 'answers.csv', rows=12)
+    df = pd.read_csv(tmp_path / 'answers.csv')
+    df['visit'] = range(len(df))
+    # Sparse passthrough column, all null in the first chunk
+    df['note'] = [None] * 8 + ['follow up'] * 4
+    df.to_parquet(tmp_path / 'answers.parquet', index=False)
+
+    score_records = bulk_score.score_records
+    calls = []
+
+    def fail_in_last_chunk(predictor, chunk):
+        rows = score_records(predictor, chunk)
+        calls.append(chunk)
+        if len(calls) == 3:
+            rows[-1] = (None, None, None, 'could not score')
+        return rows
+
+    monkeypatch.setattr(bulk_score, 'score_records', fail_in_last_chunk)
+    rows, _ = score_file(str(tmp_path / 'answers.parquet'), str(tmp_path / 'scores.parquet'), chunk_size=4,
+                         progress=False)
+
+    scores = pd.read_parquet(tmp_path / 'scores.parquet')
+    schema = pq.read_schema(tmp_path / 'scores.parquet')
+    assert rows == len(scores) == 12
+    assert schema.field('error').type == pa.string()
+    assert schema.field('sleep_score').type == pa.float64()
+    assert schema.field('visit').type == pa.int64()
+    assert scores['error'].tolist() == [None] * 11 + ['could not score']
+    assert scores['note'].tolist() == [None] * 8 + ['follow up'] * 4
+    assert list(scores['patient_id']) == [record['patient_id'] for record in records]
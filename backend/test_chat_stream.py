@@ -0,0 +1,113 @@
+import json
+from types import SimpleNamespace
+
+from flask import Flask
+
+from bot import bot_backend
+from bot.bot import bot_bp
+from bot.ollama_client import OllamaClient
+
+
+def _client(monkeypatch, tmp_path, chunks):
+    calls = []
+
+    def fake_chat(model, messages, options, stream=False):
+        calls.append({'messages': messages, 'stream': stream})
+        if stream:
+            return iter({'message': {'role': 'assistant', 'content': chunk}} for chunk in chunks)
+        return {'message': {'role': 'assistant', 'content': ''.join(chunks)}}
+
+    monkeypatch.setattr(bot_backend, 'ollama_client', OllamaClient(client=SimpleNamespace(chat=fake_chat)))
+    store = bot_backend.ConversationStore()
+    monkeypatch.setattr(bot_backend, 'conversation_store', store)
+    monkeypatch.setattr(bot_backend, 'response_cache', bot_backend.ResponseCache())
+    monkeypatch.setattr(bot_backend, 'history_journal', bot_backend.HistoryJournal(str(tmp_path / 'chat.jsonl'), store))
+    app = Flask(__name__)
+    app.register_blueprint(bot_bp)
+    return app.test_client(), calls
+
+
+def _events(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines.get('event', 'message'), json.loads(lines['data'])))
+    return events
+
+
+def test_stream_yields_tokens_then_full_reply(monkeypatch, tmp_path):
+    client, calls = _client(monkeypatch, tmp_path, ['Try ', '', 'a routine.'])
+    streams_before = bot_backend.chat_metrics.stats()['streams']
+
+    response = client.post('/api/chat', json={'message': 'how do I sleep better', 'stream': True,
+                                              'session_id': 's1'})
+
+    assert response.mimetype == 'text/event-stream'
+    assert _events(response.get_data(as_text=True)) == [
+        ('message', {'token': 'Try '}),
+        ('message', {'token': 'a routine.'}),
+        ('done', {'reply': 'Try a routine.', 'session_id': 's1'}),
+    ]
+    assert calls[0]['stream'] is True
+    assert bot_backend.conversation_store.recent('s1', 1)[0][1] == {'role': 'assistant', 'content': 'Try a routine.'}
+    assert bot_backend.chat_metrics.stats()['streams'] == streams_before + 1
+
+
+def test_non_streaming_reply_is_unchanged(monkeypatch, tmp_path):
+    client, calls = _client(monkeypatch, tmp_path, ['Hello', '!'])
+
+    response = client.post('/api/chat', json={'message': 'hi'})
+
+    assert response.get_json()['reply'] == 'Hello!'
+    assert calls[0]['stream'] is False
+
+
+def test_stream_error_before_first_token(monkeypatch, tmp_path):
+    client, _ = _client(monkeypatch, tmp_path, [])
+
+    def broken(*args, **kwargs):
+        raise ConnectionError('ollama is not running')
+
+    monkeypatch.setattr(bot_backend, 'ollama_client', OllamaClient(client=SimpleNamespace(chat=broken)))
+    response = client.post('/api/chat?stream=1', json={'message': 'hi'})
+
+    assert _events(response.get_data(as_text=True))[-1][1]['reply'] == bot_backend.ERROR_REPLY
+    assert bot_backend.conversation_store.stats()['sessions'] == 0
+
+
+def test_sessions_do_not_share_history(monkeypatch, tmp_path):
+    client, calls = _client(monkeypatch, tmp_path, ['Noted.'])
+
+    first = client.post('/api/chat', json={'message': 'my name is Sam'}).get_json()
+    client.post('/api/chat', json={'message': 'what is my name?', 'session_id': first['session_id']})
+    client.post('/api/chat', json={'message': 'what is my name?'})
+
+    assert [m['content'] for m in calls[1]['messages'][1:]] == ['my name is Sam', 'Noted.', 'what is my name?']
+    assert [m['content'] for m in calls[2]['messages'][1:]] == ['what is my name?']
+
+
+def test_context_free_questions_are_answered_from_cache(monkeypatch, tmp_path):
+    client, calls = _client(monkeypatch, tmp_path, ['Keep a ', 'schedule.'])
+
+    first = client.post('/api/chat', json={'message': 'How to fall asleep faster?'}).get_json()
+    second = client.post('/api/chat', json={'message': '  how to fall   asleep faster', 'stream': True})
+
+    assert len(calls) == 1
+    assert _events(second.get_data(as_text=True))[-1][1]['reply'] == first['reply'] == 'Keep a schedule.'
+    assert bot_backend.response_cache.stats()['hits'] == 1
+
+
+def test_client_disconnect_is_counted_as_aborted(monkeypatch, tmp_path):
+    client, _ = _client(monkeypatch, tmp_path, ['One ', 'two ', 'three.'])
+    before = bot_backend.chat_metrics.stats()
+
+    response = client.post('/api/chat', json={'message': 'count slowly', 'stream': True, 'session_id': 's1'},
+                           buffered=False)
+    body = iter(response.response)
+    assert json.loads(next(body).decode().split(': ', 1)[1]) == {'token': 'One '}
+    response.close()
+
+    after = bot_backend.chat_metrics.stats()
+    assert after['aborted'] == before['aborted'] + 1
+    assert after['completed'] == before['completed']
+    assert bot_backend.conversation_store.stats()['sessions'] == 0
@@ -0,0 +1,48 @@
+import threading
+
+from bot.history import ConversationStore
+
+
+def _exchange(i):
+    return [{'role': 'user', 'content': f'q{i}'}, {'role': 'assistant', 'content': f'a{i}'}]
+
+
+def test_each_session_keeps_its_last_exchanges():
+    store = ConversationStore(max_exchanges=3)
+    for i in range(5):
+        store.append('alice', _exchange(i))
+    store.append('bob', _exchange(99))
+
+    assert store.recent('alice', 10) == [_exchange(2), _exchange(3), _exchange(4)]
+    assert store.recent('alice', 1) == [_exchange(4)]
+    assert store.recent('bob', 3) == [_exchange(99)]
+    assert store.recent('carol', 3) == []
+
+
+def test_least_recently_used_session_is_evicted():
+    store = ConversationStore(max_sessions=2)
+    store.append('a', _exchange(1))
+    store.append('b', _exchange(2))
+    store.recent('a', 1)
+    store.append('c', _exchange(3))
+
+    assert set(store.snapshot()) == {'a', 'c'}
+    assert store.stats()['evictions'] == 1
+
+
+def test_concurrent_appends_stay_bounded():
+    store = ConversationStore(max_exchanges=5, max_sessions=50)
+
+    def chatter(worker):
+        for i in range(200):
+            store.append(f'session-{(worker * 200 + i) % 80}', _exchange(i))
+
+    threads = [threading.Thread(target=chatter, args=(w,)) for w in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    sessions = store.snapshot()
+    assert len(sessions) == 50
+    assert all(len(history) <= 5 for history in sessions.values())
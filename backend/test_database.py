@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import create_engine
+
+from database import configure_engine, engine_options, sqlite_pragmas
+
+
+def _pragma(engine, name):
+    with engine.connect() as connection:
+        return connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+
+
+def test_tuned_profile_sets_pragmas_on_every_connection(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(uri, **engine_options(uri))
+    configure_engine(engine, 'tuned')
+
+    assert _pragma(engine, 'journal_mode') == 'wal'
+    assert _pragma(engine, 'synchronous') == 1  # NORMAL
+    assert _pragma(engine, 'busy_timeout') == 10000
+    engine.dispose()
+
+
+def test_default_profile_leaves_sqlite_alone(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    configure_engine(engine, 'default')
+
+    assert _pragma(engine, 'journal_mode') == 'delete'
+    engine.dispose()
+
+
+def test_pragmas_can_be_overridden_from_env(monkeypatch):
+    monkeypatch.setenv('SQLITE_MMAP_SIZE', '0')
+
+    assert sqlite_pragmas('tuned')['mmap_size'] == '0'
+    with pytest.raises(ValueError):
+        sqlite_pragmas('fast')
+
+
+def test_in_memory_database_keeps_its_pool():
+    assert engine_options('sqlite://') == {}
+    assert engine_options('postgresql://db/sleep')['pool_pre_ping'] is True
@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+from app import SleepScorePredictor, QUESTION_MAPPING, ORDINAL_MAPPINGS, BINARY_MAPPINGS
+
+
+def _loaded_predictor():
+    predictor = SleepScorePredictor()
+    assert predictor.load_model()
+    return predictor
+
+
+def _pandas_encode(predictor, input_data):
+    """The DataFrame round trip predict_sleep_score used before AnswerEncoder"""
+    df_encoded = predictor.encode_features_pandas(pd.DataFrame([input_data]))
+    for col in predictor.feature_names:
+        if col not in df_encoded.columns:
+            df_encoded[col] = 0
+    return df_encoded[predictor.feature_names]
+
+
+def _random_answers(rng):
+    answers = {}
+    for column in QUESTION_MAPPING.values():
+        mapping = ORDINAL_MAPPINGS.get(column) or BINARY_MAPPINGS.get(column)
+        answer = rng.choice(list(mapping) + ['not an option'])
+        answers[column] = rng.choice([answer, answer.upper(), f'  {answer.title()} '])
+    return answers
+
+
+def test_encoder_matches_pandas_path():
+    predictor = _loaded_predictor()
+    rng = random.Random(0)
+
+    samples = [_random_answers(rng) for _ in range(500)]
+    samples += [
+        {},
+        {'what is your age group?': None},
+        {'what is your age group?': 3, 'unknown question': 'yes'},
+        {name: 'anything' for name in predictor.feature_names},
+        {name: None for name in predictor.feature_names},
+        {name: 2 for name in predictor.feature_names},
+    ]
+
+    for answers in samples:
+        expected = _pandas_encode(predictor, answers)
+        encoded = predictor.encode_features(answers)
+        np.testing.assert_array_equal(encoded, expected.to_numpy(dtype=float))
+
+        expected_score = predictor.model.predict(predictor.scaler.transform(expected))[0]
+        assert predictor.predict_sleep_score(answers) == expected_score
+
+
+def test_encode_many_matches_single_rows():
+    predictor = _loaded_predictor()
+    rng = random.Random(1)
+    samples = [_random_answers(rng) for _ in range(50)]
+
+    batch = predictor.encode_features(samples)
+    for row, answers in zip(batch, samples):
+        np.testing.assert_array_equal(row, predictor.encode_features(answers)[0])
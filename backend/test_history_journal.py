@@ -0,0 +1,53 @@
+import json
+
+from bot.history import ConversationStore
+from bot.journal import HistoryJournal
+
+
+def _exchange(i):
+    return [{'role': 'user', 'content': f'q{i}'}, {'role': 'assistant', 'content': f'a{i}'}]
+
+
+def test_appends_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'chat.jsonl')
+    journal = HistoryJournal(path, ConversationStore())
+    for i in range(3):
+        journal.append('alice', _exchange(i))
+    journal.append('bob', _exchange(9))
+    journal.close()
+
+    store = ConversationStore()
+    assert HistoryJournal(path, store).load() == 4
+    assert store.recent('alice', 10) == [_exchange(0), _exchange(1), _exchange(2)]
+    assert store.recent('bob', 10) == [_exchange(9)]
+
+
+def test_partial_last_line_is_dropped(tmp_path):
+    path = tmp_path / 'chat.jsonl'
+    path.write_text(json.dumps({'session': 's', 'exchange': _exchange(1)}) + '\n{"session": "s", "exch')
+
+    store = ConversationStore()
+    journal = HistoryJournal(str(path), store)
+    assert journal.load() == 1
+    journal.append('s', _exchange(2))
+    journal.close()
+
+    store = ConversationStore()
+    assert HistoryJournal(str(path), store).load() == 2
+    assert store.recent('s', 10) == [_exchange(1), _exchange(2)]
+
+
+def test_compaction_keeps_only_what_the_store_would_hold(tmp_path):
+    path = tmp_path / 'chat.jsonl'
+    journal = HistoryJournal(str(path), ConversationStore(max_exchanges=2, max_sessions=2), compact_after=10**6)
+    for session in ('a', 'b', 'c'):
+        for i in range(5):
+            journal.append(session, _exchange(i))
+    journal.compact()
+
+    assert len(path.read_text().splitlines()) == 4
+    store = ConversationStore()
+    HistoryJournal(str(path), store).load()
+    assert store.snapshot() == {'b': [_exchange(3), _exchange(4)], 'c': [_exchange(3), _exchange(4)]}
+    assert journal.stats()['compactions'] == 1
+    journal.close()
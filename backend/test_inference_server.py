@@ -0,0 +1,137 @@
+import os
+import signal
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from inference_server import InferenceServer, InferenceServerClosed
+from predictor import SleepScorePredictor
+
+
+def test_micro_batched_scores_match_in_thread_predictions():
+    predictor = SleepScorePredictor()
+    assert predictor.load_model()
+    rng = np.random.default_rng(0)
+    possible_values = [sorted(values) for values in predictor.encoder.possible_values()]
+    X = np.array([[rng.choice(values) for values in possible_values] for _ in range(40)])
+
+    server = InferenceServer(model_dir=predictor.model_dir, workers=1, max_batch_size=8, max_wait=0.05)
+    try:
+        futures = [server.submit(X[i:i + 1]) for i in range(30)] + [server.submit(X[30:])]
+        scores = np.concatenate([future.result(timeout=60) for future in futures])
+        stats = server.stats()
+    finally:
+        server.close()
+
+    np.testing.assert_array_equal(scores, predictor.predict_matrix(X))
+    assert stats['rows'] == 40
+    assert stats['batches'] < 31
+    # The 10-row request exceeds max_batch_size and is sent on its own
+    assert stats['mean_batch_size'] <= 10
+
+
+def test_submit_after_close_fails_at_once():
+    server = InferenceServer(workers=1)
+    server.close()
+
+    started = time.perf_counter()
+    with pytest.raises(InferenceServerClosed):
+        server.predict(np.zeros((1, 3)), timeout=3)
+    assert time.perf_counter() - started < 1
+
+
+def test_pool_is_restarted_after_a_worker_dies():
+    predictor = SleepScorePredictor()
+    assert predictor.load_model()
+    X = np.zeros((1, len(predictor.feature_names)))
+
+    server = InferenceServer(model_dir=predictor.model_dir, workers=1, max_wait=0)
+    try:
+        server.warm_up(X.shape[1])
+        os.kill(next(iter(server._executor._processes)), signal.SIGKILL)
+        # Requests sent before the pool notices the death fail; later ones reach a fresh pool
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                scores = server.predict(X, timeout=60)
+                break
+            except BrokenProcessPool:
+                assert time.monotonic() < deadline
+        stats = server.stats()
+    finally:
+        server.close()
+
+    np.testing.assert_array_equal(scores, predictor.predict_matrix(X))
+    assert stats['restarts'] == 1
+
+
+def test_request_on_a_broken_pool_scores_in_thread(app_module, monkeypatch):
+    def broken(X, timeout=None):
+        raise BrokenProcessPool('A process in the process pool was terminated abruptly')
+
+    predictor = app_module.model_registry.predictor
+    answers = app_module.model_registry.canary_answers[0]
+    monkeypatch.setattr(app_module, 'get_inference_server', lambda predictor: SimpleNamespace(predict=broken))
+
+    assert app_module.score_answers(predictor, answers) == predictor.predict_sleep_score(answers)
+
+
+class FakeInferenceServer:
+    """Stands in for the process pool: scores with a loaded predictor, refuses work once closed"""
+
+    instances = []
+
+    def __init__(self, model_dir=None, **kwargs):
+        self.model_dir = model_dir
+        self.closed = threading.Event()
+        self.predictor = SleepScorePredictor(model_dir=model_dir)
+        assert self.predictor.load_model()
+        FakeInferenceServer.instances.append(self)
+
+    def warm_up(self, n_features):
+        pass
+
+    def predict(self, X, timeout=None):
+        if self.closed.is_set():
+            raise InferenceServerClosed('Inference server is closed')
+        return self.predictor.predict_matrix(X)
+
+    def close(self):
+        self.closed.set()
+
+
+def test_hot_swap_with_a_request_in_flight(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'InferenceServer', FakeInferenceServer)
+    monkeypatch.setattr(app_module, 'INFERENCE_WORKERS', 1)
+    monkeypatch.setattr(app_module, '_inference_server', None)
+    monkeypatch.setattr(app_module, '_inference_server_model', None)
+    FakeInferenceServer.instances = []
+    registry = app_module.model_registry
+    old = registry.predictor
+    answers = registry.canary_answers[1]
+
+    in_flight = app_module.get_inference_server(old)
+    # The swap happens while that request is still between picking the pool and submitting to it
+    new = SleepScorePredictor(model_dir=old.model_dir)
+    assert new.load_model()
+    new.model_version = 'swapped'
+    monkeypatch.setattr(registry, '_predictor', new)
+
+    current = app_module.get_inference_server(new)
+    assert current is not in_flight
+    assert in_flight.closed.wait(5)
+
+    # Requests still holding the old predictor score in-thread instead of rebuilding its pool
+    assert app_module.get_inference_server(old) is None
+    assert app_module.get_inference_server(new) is current
+    assert len(FakeInferenceServer.instances) == 2
+
+    # The in-flight request falls back to scoring in-thread rather than waiting on the closed pool
+    monkeypatch.setattr(app_module, 'get_inference_server', lambda predictor: in_flight)
+    started = time.perf_counter()
+    assert app_module.score_answers(old, answers) == old.predict_sleep_score(answers)
+    assert time.perf_counter() - started < 1
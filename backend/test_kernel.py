@@ -0,0 +1,41 @@
+import numpy as np
+
+from app import SleepScorePredictor
+from inference import FlatForest
+
+
+def _loaded_predictor():
+    predictor = SleepScorePredictor()
+    assert predictor.load_model()
+    assert predictor.kernel is not None
+    return predictor
+
+
+def test_every_split_matches_sklearn_over_answer_space():
+    # A split only looks at one feature, so checking each split against every
+    # value its feature can take covers every combination of answers.
+    predictor = _loaded_predictor()
+    scaler = predictor.scaler
+    possible_values = predictor.encoder.possible_values()
+
+    for tree in predictor.model.estimators_:
+        tree_ = tree.tree_
+        compiled = FlatForest.from_estimator(tree, scaler)
+        splits = tree_.children_left != -1
+        for f, values in enumerate(possible_values):
+            nodes = splits & (tree_.feature == f)
+            for value in values:
+                scaled = np.float32((value - scaler.mean_[f]) / scaler.scale_[f])
+                expected = np.float64(scaled) <= tree_.threshold[nodes]
+                np.testing.assert_array_equal(value <= compiled.threshold[nodes], expected)
+
+
+def test_kernel_predictions_match_sklearn():
+    predictor = _loaded_predictor()
+    rng = np.random.default_rng(0)
+    possible_values = [sorted(values) for values in predictor.encoder.possible_values()]
+    X = np.array([[rng.choice(values) for values in possible_values] for _ in range(5000)])
+
+    expected = predictor.model.predict(predictor.scaler.transform(X))
+    np.testing.assert_array_equal(predictor.kernel.predict(X), expected)
+    np.testing.assert_array_equal(predictor.kernel.predict(X[:1]), expected[:1])
@@ -0,0 +1,47 @@
+import pytest
+
+from bot.bot_backend import is_sleep_related, prompt_variant
+from bot.keywords import KeywordMatcher, sleep_matcher
+
+
+@pytest.mark.parametrize('text', [
+    "I can't sleep", 'SLEEPING badly', 'Is napping bad?', 'restless nights', 'my bedtime routine',
+    'feeling tired.', 'stressful week', 'I woke up at 4', 'sleep-deprived', 'insomnia', 'dreams',
+    # Endings the substring match accepted
+    'relaxation techniques', 'sleeplessness', 'meditating helps', 'I napped', 'snoring partner', 'restfulness',
+    'a light sleeper',
+    'drowsiness', 'stresses', 'calmer evenings', 'sleepily', 'the energies', 'I wake at 4am',
+    # Non-ASCII text is split on its punctuation too
+    'je n’arrive pas à sleep…', 'Café, then bedtime',
+])
+def test_whole_words_and_inflections_match(text):
+    assert is_sleep_related(text)
+
+
+@pytest.mark.parametrize('text', [
+    'I have no interest in this', 'embedded systems', 'a walk in the forest', 'take a snapshot',
+    'the knight', 'hello there', '', 'Bedford is a town', 'a restaurant', 'the nation', 'wakanda',
+    'napes', 'the bedouin', 'calmar', 'ñapping',
+])
+def test_keywords_inside_other_words_do_not_match(text):
+    assert not is_sleep_related(text)
+
+
+def test_prompt_variant_follows_the_matcher():
+    assert prompt_variant('how much sleep do I need') == 'sleep'
+    assert prompt_variant('what is an interest rate') == 'general'
+
+
+def test_weighted_scores_and_best_category():
+    assert sleep_matcher.scores('Tired every morning, tired at night') == \
+        {'fatigue': 1.2, 'time_of_day': 0.6}
+    assert sleep_matcher.best_category('stressed, anxious and calm, then asleep') == 'wellbeing'
+    assert sleep_matcher.best_category('nothing here') is None
+    assert list(sleep_matcher.find('Bedtime in the bedroom')) == [('bedtime', 'sleep'), ('bedroom', 'sleep')]
+    assert list(sleep_matcher.find('meditating, not sleeplessness')) == [('meditate', 'wellbeing'),
+                                                                         ('sleep', 'sleep')]
+
+
+def test_keywords_belong_to_one_category():
+    with pytest.raises(ValueError):
+        KeywordMatcher({'a': (1.0, ['rest']), 'b': (0.5, ['Rest'])})
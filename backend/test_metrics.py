@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from bot import ollama_client as ollama_module
+from bot.ollama_client import OllamaClient
+from metrics import MetricsRegistry, RequestProfiler, finish_request, stage, start_request
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry(namespace='test')
+    latency = registry.histogram('latency_seconds', 'Latency', labels=('route',), buckets=(0.1, 1.0))
+    latency.observe(0.05, '/a')
+    latency.observe(0.5, '/a')
+    latency.observe(5.0, '/a')
+    registry.register_stats('cache', lambda: {'hits': 3, 'persistent': True, 'name': 'x'})
+
+    lines = registry.render().splitlines()
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{route="/a"} 3' in lines
+    assert 'test_cache_hits 3' in lines
+    assert not any(line.startswith(('test_cache_persistent', 'test_cache_name')) for line in lines)
+
+
+def test_stages_are_only_collected_inside_a_request():
+    with stage('outside'):
+        pass
+    start_request()
+    with stage('encode_features'):
+        pass
+    assert [name for name, _ in finish_request()] == ['encode_features']
+    assert finish_request() == []
+
+
+def test_profiler_reports_slow_sampled_requests_only():
+    profiler = RequestProfiler(sample_rate=0.5, slow_seconds=0.01, rng=iter([0.9, 0.1, 0.1]).__next__)
+    assert profiler.start() is None
+
+    running = profiler.start()
+    assert profiler.finish(running, 'GET /fast', 0.001) is None
+    running = profiler.start()
+    assert 'function calls' in profiler.finish(running, 'GET /slow', 0.5)
+    assert profiler.stats()['reports'] == 1
+
+
+def test_ollama_token_counts_are_recorded():
+    def fake_chat(**kwargs):
+        if kwargs.get('stream'):
+            return iter([{'message': {'content': 'Hi'}}, {'message': {'content': ''}, 'done': True,
+                                                          'prompt_eval_count': 12, 'eval_count': 3}])
+        return {'message': {'content': 'Hi'}, 'prompt_eval_count': 10, 'eval_count': 2}
+
+    completion_before = ollama_module.token_count.value('completion')
+    client = OllamaClient(client=SimpleNamespace(chat=fake_chat))
+    client.chat(model='m', messages=[])
+    list(client.chat(model='m', messages=[], stream=True))
+
+    stats = client.stats()
+    assert (stats['prompt_tokens'], stats['completion_tokens']) == (22, 5)
+    assert ollama_module.token_count.value('completion') - completion_before == 5
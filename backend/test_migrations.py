@@ -0,0 +1,48 @@
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from migrations import compact_quiz_results
+from questions import QUESTIONS
+from recommendations import get_sleep_recommendations
+
+
+def test_compaction_keeps_api_output_and_leaves_unknown_rows_alone(app_module, client):
+    db, QuizResult = app_module.db, app_module.QuizResult
+    known = {q['question']: q['options'][-1] for q in QUESTIONS}
+    unknown = dict(known, **{QUESTIONS[0]['question']: 'Something else'})
+    rows = [
+        (known, get_sleep_recommendations('31+ (adults & seniors)', 44.0, 75.3)),
+        (known, 'Custom advice written by a clinician'),
+        (unknown, get_sleep_recommendations('13–18 (adolescents)', 25.0, 12.9)),
+        (unknown, 'Custom advice written by a clinician'),
+    ]
+    with app_module.app.app_context():
+        user = app_module.User(name='A', email='a@example.com', password_hash='-')
+        db.session.add(user)
+        db.session.flush()
+        for i, (answers, recommendations) in enumerate(rows):
+            # Stored the way versions before the compact encoding wrote results
+            db.session.add(QuizResult(user_id=user.id, timestamp=datetime(2024, 1, 1) + timedelta(hours=i),
+                                      answers=json.dumps(answers), recommendations=recommendations,
+                                      sleep_score=30.0, effectiveness_percentage=50.0))
+        db.session.commit()
+
+    before = client.get('/api/results/a@example.com').get_data()
+    with app_module.app.app_context():
+        assert compact_quiz_results(db, QuizResult, batch_size=3) == (3, 1)
+        stored = db.session.execute(
+            select(QuizResult.answers, QuizResult.answers_packed, QuizResult.recommendations,
+                   QuizResult.recommendation_template).order_by(QuizResult.id)).all()
+    assert client.get('/api/results/a@example.com').get_data() == before
+
+    packed = [(answers_packed is not None, template is not None) for _, answers_packed, _, template in stored]
+    assert packed == [(True, True), (True, False), (False, True), (False, False)]
+    # The row nothing could be packed for is exactly as it was
+    assert stored[3] == (json.dumps(unknown), None, 'Custom advice written by a clinician', None)
+    assert stored[1].recommendations == 'Custom advice written by a clinician'
+    assert stored[2].answers == json.dumps(unknown)
+
+    with app_module.app.app_context():
+        assert compact_quiz_results(db, QuizResult) == (0, 3)
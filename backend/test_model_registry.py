@@ -0,0 +1,85 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from app import MODEL_DIR, MODEL_FILES, ORDINAL_MAPPINGS, BINARY_MAPPINGS, SleepScorePredictor
+from model_registry import ModelRegistry, build_canary_answers
+
+
+def _registry(score_range=(0, 100)):
+    registry = ModelRegistry(
+        lambda model_dir: SleepScorePredictor(model_dir=model_dir),
+        canary_answers=build_canary_answers(ORDINAL_MAPPINGS, BINARY_MAPPINGS),
+        score_range=score_range,
+    )
+    assert registry.predictor.load_model()
+    return registry
+
+
+def test_reload_swaps_in_validated_model(tmp_path):
+    for name in MODEL_FILES:
+        shutil.copy(os.path.join(MODEL_DIR, name), tmp_path)
+    registry = _registry()
+    previous = registry.predictor
+
+    entry = registry.reload(str(tmp_path))
+
+    assert registry.predictor is not previous
+    assert registry.predictor.model_dir == str(tmp_path)
+    assert entry['version'] == previous.model_version
+    assert len(entry['canary_scores']) == 4
+    # The old predictor still serves requests that already hold it
+    assert previous.predict_sleep_score({}) == registry.predictor.predict_sleep_score({})
+
+
+def test_rejected_model_keeps_serving_previous(tmp_path):
+    registry = _registry(score_range=(0, 1))
+    previous = registry.predictor
+
+    with pytest.raises(ValueError):
+        registry.reload()
+    with pytest.raises(ValueError):
+        registry.reload(str(tmp_path))
+
+    assert registry.predictor is previous
+    assert registry.last_error
+    assert registry.history == []
+
+
+def test_concurrent_async_reloads_start_one_load():
+    registry = _registry()
+    release = threading.Event()
+    loads = []
+    factory = registry._predictor_factory
+
+    def slow_factory(model_dir):
+        loads.append(model_dir)
+        release.wait(5)
+        return factory(model_dir)
+
+    registry._predictor_factory = slow_factory
+    barrier = threading.Barrier(8)
+    started = []
+
+    def request_reload():
+        barrier.wait()
+        started.append(registry.reload_async())
+
+    threads = [threading.Thread(target=request_reload) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert started.count(True) == 1
+    assert registry.is_reloading
+
+    release.set()
+    deadline = time.monotonic() + 30
+    while registry.is_reloading:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert len(loads) == 1 and len(registry.history) == 1
+    assert registry.reload_async()
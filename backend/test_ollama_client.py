@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from bot import bot_backend
+from bot.bot import bot_bp
+from bot.ollama_client import FairLimiter, OllamaClient, QueueFull, QueueTimeout
+from stub_ollama import StubOllamaServer
+
+MESSAGES = [{'role': 'user', 'content': 'hi'}]
+
+
+def test_chat_and_stream_against_stub_server():
+    with StubOllamaServer(reply='Sleep well tonight') as stub:
+        client = OllamaClient(host=stub.url)
+
+        response = client.chat(model='gemma:2b', messages=MESSAGES)
+        tokens = [chunk['message']['content'] for chunk in client.chat(model='gemma:2b', messages=MESSAGES, stream=True)]
+
+    assert response['message']['content'] == 'Sleep well tonight'
+    assert ''.join(tokens) == 'Sleep well tonight'
+    assert client.stats()['completed'] == 2
+    assert client.stats()['active'] == 0
+
+
+def test_concurrency_is_capped_at_the_server():
+    with StubOllamaServer(first_token_delay=0.05) as stub:
+        client = OllamaClient(host=stub.url, max_concurrent=2, max_queue=10)
+        threads = [threading.Thread(target=client.chat, kwargs={'model': 'm', 'messages': MESSAGES})
+                   for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert stub.max_active == 2
+    assert client.stats()['completed'] == 6
+    assert client.stats()['max_queue_wait_ms'] > 0
+
+
+def test_waiters_are_admitted_in_arrival_order():
+    limiter = FairLimiter(max_concurrent=1, max_queue=10, timeout=5)
+    limiter.acquire()
+    order = []
+
+    def waiter(i):
+        limiter.acquire()
+        order.append(i)
+        limiter.release()
+
+    threads = []
+    for i in range(5):
+        threads.append(threading.Thread(target=waiter, args=(i,)))
+        threads[-1].start()
+        while limiter.queued < i + 1:
+            time.sleep(0.001)
+    limiter.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_full_queue_and_timeout_are_refused():
+    limiter = FairLimiter(max_concurrent=1, max_queue=0, timeout=0.01)
+    limiter.acquire()
+    with pytest.raises(QueueFull):
+        limiter.acquire()
+
+    limiter.max_queue = 1
+    with pytest.raises(QueueTimeout):
+        limiter.acquire()
+    assert limiter.queued == 0
+
+
+def test_saturated_chat_endpoint_returns_429(monkeypatch, tmp_path):
+    with StubOllamaServer(first_token_delay=0.3) as stub:
+        client = OllamaClient(host=stub.url, max_concurrent=1, max_queue=0)
+        monkeypatch.setattr(bot_backend, 'ollama_client', client)
+        monkeypatch.setattr(bot_backend, 'response_cache', bot_backend.ResponseCache(max_entries=0))
+        monkeypatch.setattr(bot_backend, 'history_journal',
+                            bot_backend.HistoryJournal(str(tmp_path / 'chat.jsonl'), bot_backend.conversation_store))
+        app = Flask(__name__)
+        app.register_blueprint(bot_bp)
+
+        busy = threading.Thread(target=app.test_client().post, args=('/api/chat',), kwargs={'json': {'message': 'a'}})
+        busy.start()
+        while client.stats()['active'] == 0:
+            time.sleep(0.001)
+        response = app.test_client().post('/api/chat', json={'message': 'b', 'stream': True})
+        busy.join()
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '5'
+    assert client.stats()['rejected'] == 1
@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+
+from persistence import TTLCache, WriteBehindQueue
+
+
+def test_items_are_written_in_batches():
+    batches = []
+    writer = WriteBehindQueue(batches.append, max_batch=4, max_delay=0.5)
+    futures = [writer.submit(i) for i in range(10)]
+    writer.flush()
+
+    assert all(future.done() for future in futures)
+    assert [item for batch in batches for item in batch] == list(range(10))
+    assert max(len(batch) for batch in batches) == 4
+    writer.close()
+
+
+def test_partial_batch_is_written_after_max_delay():
+    written = threading.Event()
+    writer = WriteBehindQueue(lambda batch: written.set(), max_batch=100, max_delay=0.01)
+    writer.submit('row').result(timeout=5)
+
+    assert written.is_set()
+    writer.close()
+
+
+def test_close_writes_pending_items():
+    batches = []
+    writer = WriteBehindQueue(batches.append, max_batch=100, max_delay=60)
+    writer.submit('a')
+    writer.submit('b')
+    writer.close(timeout=5)
+
+    assert batches == [['a', 'b']]
+    with pytest.raises(RuntimeError):
+        writer.submit('c')
+
+
+def test_write_errors_reach_every_future_in_the_batch():
+    def fail(batch):
+        raise ValueError('disk full')
+
+    writer = WriteBehindQueue(fail, max_batch=2, max_delay=60)
+    futures = [writer.submit(i) for i in range(2)]
+
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+    assert writer.stats()['failed'] == 2
+    writer.close()
+
+
+def test_failed_batch_is_retried_row_by_row():
+    written = []
+
+    def write(batch):
+        if 'bad' in batch:
+            raise ValueError('constraint failed')
+        written.extend(batch)
+
+    writer = WriteBehindQueue(write, max_batch=3, max_delay=60)
+    futures = [writer.submit(item) for item in ('a', 'bad', 'c')]
+
+    assert futures[0].result(timeout=5) is None and futures[2].result(timeout=5) is None
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=5)
+    assert written == ['a', 'c']
+    assert writer.stats()['failed'] == 1
+    writer.close()
+
+
+def test_submits_racing_close_are_written_or_refused():
+    written = []
+    writer = WriteBehindQueue(written.extend, max_batch=10, max_delay=0)
+    accepted = []
+
+    def submit_until_closed():
+        while True:
+            try:
+                accepted.append(writer.submit(object()))
+            except RuntimeError:
+                return
+
+    threads = [threading.Thread(target=submit_until_closed) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    writer.close(timeout=5)
+    for thread in threads:
+        thread.join()
+
+    assert all(future.done() for future in accepted)
+    assert len(written) == len(accepted)
+
+
+def test_ttl_cache_expires_and_evicts():
+    now = [0.0]
+    cache = TTLCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    now[0] = 11
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 1
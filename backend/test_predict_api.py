@@ -0,0 +1,156 @@
+import os
+import random
+import shutil
+import threading
+
+import pytest
+
+from predictor import BINARY_MAPPINGS, ORDINAL_MAPPINGS, QUESTION_MAPPING, map_frontend_answers
+from recommendations import get_sleep_recommendations
+
+
+def _answers(rng):
+    """One quiz submission as the frontend sends it"""
+    answers = {}
+    for question, column in QUESTION_MAPPING.items():
+        mapping = ORDINAL_MAPPINGS.get(column) or BINARY_MAPPINGS.get(column)
+        answers[question] = rng.choice(list(mapping)).title()
+    return answers
+
+
+def test_predict_batch_keeps_order_and_reports_invalid_rows(app_module):
+    predictor = app_module.model_registry.predictor
+    rng = random.Random(3)
+    records = [map_frontend_answers(_answers(rng)) for _ in range(5)]
+    records[1:1] = ['not an answer set']
+    records.append(None)
+
+    results = predictor.predict_batch(records, chunk_size=2)
+    invalid = 'Answers must be an object'
+    assert [result['error'] for result in results] == [None, invalid, None, None, None, None, invalid]
+    for record, result in zip(records, results):
+        if isinstance(record, dict):
+            assert result['sleep_score'] == predictor.predict_sleep_score(record)
+
+
+def test_predict_batch_reports_errors_on_the_rows_that_cause_them(app_module, monkeypatch):
+    predictor = app_module.model_registry.predictor
+    rng = random.Random(4)
+    records = [map_frontend_answers(_answers(rng)) for _ in range(5)]
+    records[1] = {'not a question': 'yes'}
+    records[3] = {**records[3], 'poison': True}
+    encoder = predictor.answer_encoder()
+    encode_into = encoder.encode_into
+
+    def failing_encode_into(input_data, row):
+        if 'poison' in input_data:
+            raise ValueError('bad answer')
+        return encode_into(input_data, row)
+
+    monkeypatch.setattr(encoder, 'encode_into', failing_encode_into)
+    results = predictor.predict_batch(records, chunk_size=4)
+
+    assert [result['error'] for result in results] == [
+        None, 'No recognized questions in answers', None, 'bad answer', None]
+    for i in (0, 2, 4):
+        assert results[i]['sleep_score'] == predictor.predict_sleep_score(records[i])
+
+
+def test_batch_endpoint_matches_single_predictions(app_module, client):
+    client.post('/api/signup', json={'name': 'A', 'email': 'a@example.com', 'password': 'hunter22'})
+    rng = random.Random(5)
+    answer_sets = [_answers(rng) for _ in range(6)]
+    answer_sets.insert(2, 'oops')
+    answer_sets.insert(5, ['also', 'bad'])
+
+    response = client.post('/api/predict/batch', json={'answers': answer_sets})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['index'] for result in results] == list(range(len(answer_sets)))
+
+    for answers, result in zip(answer_sets, results):
+        if not isinstance(answers, dict):
+            assert result['error'] == 'Answers must be an object'
+            assert result['sleep_score'] is None and result['effectiveness_percentage'] is None
+            continue
+        single = client.post('/api/predict', json={'email': 'a@example.com', 'answers': answers}).get_json()
+        assert result['error'] is None
+        assert result['sleep_score'] == single['sleep_score']
+        assert result['effectiveness_percentage'] == single['effectiveness_percentage']
+
+
+@pytest.mark.parametrize('rows, status', [(3, 200), (4, 400)])
+def test_batch_size_limit(app_module, client, monkeypatch, rows, status):
+    monkeypatch.setattr(app_module, 'PREDICT_BATCH_MAX_ROWS', 3)
+    answers = _answers(random.Random(1))
+
+    response = client.post('/api/predict/batch', json={'answers': [answers] * rows})
+    assert response.status_code == status
+    if status == 400:
+        assert response.get_json()['error'] == 'At most 3 answer sets per batch'
+
+
+def _use_predictor(app_module, monkeypatch, predictor):
+    monkeypatch.setattr(app_module.model_registry, '_predictor', predictor)
+    monkeypatch.setattr(app_module, 'MODEL_READY_TIMEOUT', 0.2)
+
+
+def test_predict_waits_for_a_loading_model_then_recovers(app_module, client, monkeypatch):
+    from predictor import SleepScorePredictor
+
+    client.post('/api/signup', json={'name': 'A', 'email': 'a@example.com', 'password': 'hunter22'})
+    predictor = SleepScorePredictor()
+    release = threading.Event()
+    load_model = predictor.load_model
+    monkeypatch.setattr(predictor, 'load_model', lambda mmap_mode=None: release.wait() and load_model(mmap_mode))
+    _use_predictor(app_module, monkeypatch, predictor)
+    payload = {'email': 'a@example.com', 'answers': _answers(random.Random(2))}
+
+    response = client.post('/api/predict', json=payload)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert response.get_json()['error'] == 'Model is still loading, please retry shortly'
+    assert client.get('/api/health').get_json()['status'] == 'loading'
+
+    release.set()
+    assert predictor.wait_until_ready(30)
+    assert client.post('/api/predict', json=payload).status_code == 200
+    assert client.get('/api/health').status_code == 200
+
+
+def test_failed_load_is_reported_and_retried(app_module, client, monkeypatch, tmp_path):
+    from predictor import MODEL_DIR, MODEL_FILES, SleepScorePredictor
+
+    client.post('/api/signup', json={'name': 'A', 'email': 'a@example.com', 'password': 'hunter22'})
+    predictor = SleepScorePredictor(model_dir=str(tmp_path))
+    _use_predictor(app_module, monkeypatch, predictor)
+    payload = {'email': 'a@example.com', 'answers': _answers(random.Random(2))}
+
+    response = client.post('/api/predict', json=payload)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert response.get_json()['error'].startswith('Model unavailable: ')
+    assert client.get('/api/health').get_json()['status'] == 'unavailable'
+
+    # The next request starts another load, which now finds the files
+    for name in MODEL_FILES:
+        shutil.copy(os.path.join(MODEL_DIR, name), tmp_path / name)
+    assert predictor.wait_until_ready(30)
+    assert client.post('/api/predict', json=payload).status_code == 200
+
+
+@pytest.mark.parametrize('query, kind', [('', str), ('?format=structured', dict)])
+def test_predict_renders_recommendations_once_in_the_requested_format(app_module, client, monkeypatch, query, kind):
+    client.post('/api/signup', json={'name': 'A', 'email': 'a@example.com', 'password': 'hunter22'})
+    calls = []
+
+    def counting(*args, **kwargs):
+        calls.append(kwargs)
+        return get_sleep_recommendations(*args, **kwargs)
+
+    monkeypatch.setattr(app_module, 'get_sleep_recommendations', counting)
+    response = client.post(f'/api/predict{query}', json={'email': 'a@example.com',
+                                                           'answers': _answers(random.Random(6))})
+
+    assert isinstance(response.get_json()['recommendations'], kind)
+    assert len(calls) == 1
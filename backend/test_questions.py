@@ -0,0 +1,26 @@
+from questions import QUESTIONS, UNANSWERED, pack_answers, unpack_answers
+
+
+def test_pack_round_trip():
+    answers = {q['question']: q['options'][i % len(q['options'])] for i, q in enumerate(QUESTIONS)}
+    packed = pack_answers(answers)
+
+    assert len(packed) == len(QUESTIONS)
+    assert unpack_answers(packed) == answers
+
+
+def test_unanswered_questions_stay_missing():
+    first, last = QUESTIONS[0], QUESTIONS[-1]
+    answers = {last['question']: last['options'][0], first['question']: first['options'][-1]}
+    packed = pack_answers(answers)
+
+    assert packed.count(UNANSWERED) == len(QUESTIONS) - 2
+    assert unpack_answers(packed) == answers
+
+
+def test_unknown_answers_are_not_packed():
+    question = QUESTIONS[0]
+    assert pack_answers({question['question']: 'Something else'}) is None
+    assert pack_answers({question['question'].upper(): question['options'][0]}) is None
+    assert pack_answers({question['question']: 1}) is None
+    assert pack_answers(['not', 'a', 'dict']) is None
@@ -0,0 +1,53 @@
+from recommendations import (
+    NO_RECOMMENDATIONS, RECOMMENDATIONS, get_sleep_recommendations, parse_recommendations,
+    recommendation_template, render_recommendations,
+)
+
+
+def test_text_fills_effectiveness_into_band_template():
+    text = get_sleep_recommendations('13–18 (adolescents)', 40.0, 62.349)
+
+    assert text.startswith('\n' + '=' * 60 + '\n🎓 Sleep Recommendations for Adolescents')
+    assert '⚠️ Priority Level: MODERATE - Your sleep effectiveness is 62.3%\n' in text
+    assert '8. 👥 Social Balance' in text
+    assert text.endswith('• Remember that sleep improvement takes time and consistency\n' + '=' * 60 + '\n')
+
+
+def test_band_boundaries():
+    assert 'HIGH' in get_sleep_recommendations('0–12 (children)', 30, 49.99)
+    assert 'MODERATE' in get_sleep_recommendations('0–12 (children)', 30, 50)
+    assert 'MAINTENANCE' in get_sleep_recommendations('0–12 (children)', 30, 75)
+
+
+def test_structured_matches_text():
+    for age_group, rec in RECOMMENDATIONS.items():
+        structured = get_sleep_recommendations(age_group, 30, 12.34, structured=True)
+        text = get_sleep_recommendations(age_group, 30, 12.34)
+
+        assert structured['title'] == rec['title'] and structured['title'] in text
+        assert structured['priority'] == 'HIGH'
+        assert structured['effectiveness'] == 12.3
+        assert list(structured['remedies']) == rec['remedies']
+        assert all(remedy in text for remedy in structured['remedies'])
+
+
+def test_unknown_age_group():
+    assert get_sleep_recommendations('unknown', 30, 50) == NO_RECOMMENDATIONS
+    assert get_sleep_recommendations('unknown', 30, 50, structured=True) is None
+
+
+def test_template_round_trip():
+    for age_group in list(RECOMMENDATIONS) + ['unknown']:
+        for effectiveness in (0, 12.34, 49.96, 50, 74.95, 99.99, 100):
+            text = get_sleep_recommendations(age_group, 30, effectiveness)
+            stored = recommendation_template(age_group, effectiveness)
+
+            assert render_recommendations(*stored) == text
+            assert parse_recommendations(text) == stored
+
+
+def test_parse_rejects_edited_text():
+    text = get_sleep_recommendations('0–12 (children)', 30, 42.0)
+
+    assert parse_recommendations(text.replace('42.0', '42')) is None
+    assert parse_recommendations(text + 'extra') is None
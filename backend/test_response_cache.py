@@ -0,0 +1,37 @@
+from bot.response_cache import ResponseCache, normalize_message
+
+
+def test_normalization_ignores_case_spacing_and_trailing_punctuation():
+    assert normalize_message('  Is   napping BAD?! ') == normalize_message('is napping bad') == 'is napping bad'
+
+
+def test_variants_are_cached_separately():
+    cache = ResponseCache()
+    cache.set('sleep', 'hello', 'sleep reply')
+
+    assert cache.get('sleep', 'Hello!') == 'sleep reply'
+    assert cache.get('general', 'hello') is None
+
+
+def test_ttl_and_lru_eviction():
+    now = [0.0]
+    cache = ResponseCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    cache.set('sleep', 'a', '1')
+    cache.set('sleep', 'b', '2')
+    cache.get('sleep', 'a')
+    cache.set('sleep', 'c', '3')
+
+    assert cache.get('sleep', 'b') is None
+    now[0] = 11
+    assert cache.get('sleep', 'a') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_persisted_replies_survive_restart_within_namespace(tmp_path):
+    path = str(tmp_path / 'replies.sqlite')
+    cache = ResponseCache(path=path, namespace='v1')
+    cache.set('sleep', 'is napping bad', 'Short naps are fine.')
+    cache.close()
+
+    assert ResponseCache(path=path, namespace='v1').get('sleep', 'Is napping bad?') == 'Short naps are fine.'
+    assert ResponseCache(path=path, namespace='v2').get('sleep', 'Is napping bad?') is None
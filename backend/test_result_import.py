@@ -0,0 +1,95 @@
+import json
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from questions import QUESTIONS
+from recommendations import get_sleep_recommendations
+from result_import import import_quiz_results, parse_timestamp
+
+
+@pytest.fixture
+def models(app_module):
+    db, User = app_module.db, app_module.User
+    with app_module.app.app_context():
+        db.session.add_all([User(name='A', email='a@example.com', password_hash='-'),
+                            User(name='B', email='b@example.com', password_hash='-')])
+        db.session.commit()
+        yield db, User, app_module.QuizResult
+
+
+def _index_sql(db):
+    """CREATE INDEX statements on quiz_result, which unlike the inspector include column order"""
+    return db.session.execute(text(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'quiz_result'")).all()
+
+
+def _write_records(path, count):
+    answers = {q['question']: q['options'][0] for q in QUESTIONS}
+    with open(path, 'w') as file:
+        for i in range(count):
+            record = {'email': 'a@example.com' if i % 2 else 'b@example.com',
+                      'timestamp': f'2024-01-01T00:00:{i % 60:02d}Z',
+                      'sleep_score': 40.0, 'effectiveness_percentage': 53.6, 'answers': answers,
+                      'recommendations': get_sleep_recommendations('19–30 (young adults)', 40.0, 53.6)}
+            file.write(json.dumps(record) + '\n')
+        file.write(json.dumps({'email': 'nobody@example.com', 'timestamp': '2024-01-01T00:00:00'}) + '\n')
+        file.write('{"email": "a@example.com", "timestamp": "not a date"}\n')
+
+
+def test_imports_compact_rows_and_rebuilds_indexes(models, tmp_path):
+    db, User, QuizResult = models
+    path = str(tmp_path / 'results.jsonl')
+    _write_records(path, 25)
+    indexes_before = _index_sql(db)
+
+    stats = import_quiz_results(db, User, QuizResult, path, batch_size=10, drop_indexes=True, progress=False)
+
+    assert (stats['inserted'], stats['unknown_user'], stats['invalid']) == (25, 1, 1)
+    rows = QuizResult.query.all()
+    assert len(rows) == 25
+    assert all(row.answers_packed is not None and row.recommendation_template for row in rows)
+    assert {row.recommendation_effectiveness for row in rows} == {536}
+    indexes = _index_sql(db)
+    assert 'ix_quiz_result_user_timestamp' in {name for name, _ in indexes}
+    assert sorted(indexes, key=str) == sorted(indexes_before, key=str)
+
+
+def test_resumes_after_the_last_committed_batch(models, tmp_path, monkeypatch):
+    db, User, QuizResult = models
+    path = str(tmp_path / 'results.jsonl')
+    _write_records(path, 25)
+
+    import result_import
+    real_row = result_import.result_row
+    calls = []
+
+    def failing_row(record, user_id):
+        calls.append(record)
+        if len(calls) == 15:
+            raise RuntimeError('interrupted')
+        return real_row(record, user_id)
+
+    monkeypatch.setattr(result_import, 'result_row', failing_row)
+    with pytest.raises(RuntimeError):
+        import_quiz_results(db, User, QuizResult, path, batch_size=10, progress=False)
+    assert QuizResult.query.count() == 10
+
+    monkeypatch.setattr(result_import, 'result_row', real_row)
+    stats = import_quiz_results(db, User, QuizResult, path, batch_size=10, progress=False)
+    assert stats['inserted'] == 15
+    assert QuizResult.query.count() == 25
+
+    assert import_quiz_results(db, User, QuizResult, path, progress=False)['inserted'] == 0
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-01-01T08:30:00', datetime(2024, 1, 1, 8, 30)),
+    ('2024-01-01T08:30:00Z', datetime(2024, 1, 1, 8, 30)),
+    ('2024-01-01T08:30:00+05:30', datetime(2024, 1, 1, 3, 0)),
+    ('2024-01-01T02:00:00-04:00', datetime(2024, 1, 1, 6, 0)),
+])
+def test_timestamps_are_stored_as_utc(value, expected):
+    assert parse_timestamp(value) == expected
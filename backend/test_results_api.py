@@ -0,0 +1,85 @@
+import json
+from datetime import datetime, timedelta
+
+from flask import jsonify
+
+from questions import QUESTIONS
+
+
+def _seed(app_module, timestamps, email='a@example.com'):
+    """A user with one quiz result per timestamp, inserted in the given order"""
+    db, QuizResult = app_module.db, app_module.QuizResult
+    answers = {q['question']: q['options'][0] for q in QUESTIONS}
+    with app_module.app.app_context():
+        user = app_module.User(name='A', email=email, password_hash='-')
+        db.session.add(user)
+        db.session.flush()
+        for i, timestamp in enumerate(timestamps):
+            result = QuizResult(user_id=user.id, timestamp=timestamp, sleep_score=30.0 + i,
+                                effectiveness_percentage=40.0 + i, model_version='v1')
+            result.set_answers(answers)
+            result.set_recommendations('19–30 (young adults)', 40.0 + i)
+            db.session.add(result)
+        db.session.commit()
+
+
+def test_cursor_pages_cover_every_result_once_with_ties_broken_by_id(app_module, client):
+    base = datetime(2024, 1, 1)
+    # Five results share one timestamp, so pages split inside the tie
+    timestamps = [base + timedelta(minutes=i) for i in range(4)] + [base + timedelta(hours=1)] * 5
+    _seed(app_module, timestamps)
+
+    full = client.get('/api/results/a@example.com').get_json()['results']
+    assert [(r['timestamp'], r['id']) for r in full] == sorted(((r['timestamp'], r['id']) for r in full),
+                                                               reverse=True)
+
+    pages, before = [], None
+    while True:
+        query = '?limit=3' + (f'&before={before}' if before else '')
+        page = client.get(f'/api/results/a@example.com{query}').get_json()
+        pages.append([result['id'] for result in page['results']])
+        before = page['next_before']
+        if before is None:
+            break
+    assert pages == [[r['id'] for r in full[i:i + 3]] for i in range(0, 9, 3)]
+
+
+def test_limit_is_clamped_and_bad_parameters_are_rejected(app_module, client):
+    _seed(app_module, [datetime(2024, 1, 1) + timedelta(minutes=i) for i in range(105)])
+
+    assert len(client.get('/api/results/a@example.com?limit=500').get_json()['results']) == 100
+    page = client.get('/api/results/a@example.com?limit=0').get_json()
+    assert len(page['results']) == 1 and page['next_before']
+    assert client.get('/api/results/a@example.com?limit=ten').status_code == 400
+
+    assert client.get('/api/results/a@example.com?before=yesterday').status_code == 400
+    assert client.get('/api/results/a@example.com?before=2024-01-01T00:01:00,x').status_code == 400
+    response = client.get('/api/results/a@example.com?fields=id,mood')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Unknown fields: mood'
+
+    # A plain ISO timestamp works as a cursor too
+    older = client.get('/api/results/a@example.com?before=2024-01-01T00:03:00').get_json()['results']
+    assert [result['timestamp'] for result in older] == ['2024-01-01T00:02:00', '2024-01-01T00:01:00',
+                                                         '2024-01-01T00:00:00']
+
+
+def test_fields_projection_returns_only_those_fields(app_module, client):
+    _seed(app_module, [datetime(2024, 1, 1)])
+
+    results = client.get('/api/results/a@example.com?fields=id,sleep_score').get_json()['results']
+    assert results == [{'id': 1, 'sleep_score': 30.0}]
+
+
+def test_unpaged_response_matches_the_pre_pagination_output(app_module, client):
+    _seed(app_module, [datetime(2024, 1, 1) + timedelta(minutes=i) for i in (3, 1, 4, 2)])
+
+    response = client.get('/api/results/a@example.com')
+    with app_module.app.app_context():
+        user = app_module.User.query.filter_by(email='a@example.com').one()
+        # What /api/results computed before paging: every result, sorted in Python
+        results = [result.to_dict() for result in user.quiz_results]
+        results.sort(key=lambda r: r['timestamp'], reverse=True)
+        expected = jsonify({'success': True, 'results': results}).get_data()
+    assert response.get_data() == expected
+    assert 'next_before' not in json.loads(response.get_data())
@@ -0,0 +1,53 @@
+import numpy as np
+
+from inference import ScoreCache
+
+
+def _sum_model(calls):
+    def predict(X):
+        calls.append(len(X))
+        return X.sum(axis=1)
+    return predict
+
+
+def test_repeated_rows_are_served_from_cache():
+    calls = []
+    cache = ScoreCache(n_features=3, max_entries=10)
+    X = np.array([[0, 1, 2], [3, 3, 3]], dtype=float)
+
+    np.testing.assert_array_equal(cache.predict(X, _sum_model(calls)), [3, 9])
+    np.testing.assert_array_equal(cache.predict(X, _sum_model(calls)), [3, 9])
+
+    assert calls == [2]
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 2
+
+
+def test_unpackable_rows_bypass_cache():
+    calls = []
+    cache = ScoreCache(n_features=2, max_entries=10)
+    X = np.array([[-1, 0], [0.5, 1], [4, 0]], dtype=float)
+
+    cache.predict(X, _sum_model(calls))
+    cache.predict(X, _sum_model(calls))
+
+    assert calls == [3, 3]
+    assert cache.stats()['entries'] == 0
+
+
+def test_lru_eviction_and_invalidation():
+    calls = []
+    cache = ScoreCache(n_features=1, max_entries=2)
+    for value in (0, 1, 0, 2):
+        cache.predict(np.array([[value]], dtype=float), _sum_model(calls))
+
+    # 1 was least recently used when 2 arrived
+    assert cache.stats()['evictions'] == 1
+    cache.predict(np.array([[0], [2]], dtype=float), _sum_model(calls))
+    assert calls == [1, 1, 1]
+
+    cache.bind('model-a')
+    assert cache.stats()['entries'] == 0
+    cache.predict(np.array([[0]], dtype=float), _sum_model(calls))
+    cache.bind('model-a')
+    assert cache.stats()['entries'] == 1
@@ -0,0 +1,186 @@
+import json
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, Date, DateTime, Float, Integer, MetaData, Table, create_engine, delete, insert, select
+
+from summaries import rebuild_summaries, record_result, summary_response, week_start
+
+def _aggregate_columns():
+    return [Column(f'{prefix}_{kind}', Float, nullable=False)
+            for prefix in ('sleep_score', 'effectiveness') for kind in ('sum', 'min', 'max')]
+
+
+@pytest.fixture
+def tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'summaries.db'}")
+    metadata = MetaData()
+    results = Table('quiz_result', metadata,
+                    Column('id', Integer, primary_key=True), Column('user_id', Integer, nullable=False),
+                    Column('timestamp', DateTime), Column('sleep_score', Float),
+                    Column('effectiveness_percentage', Float))
+    summary = Table('result_summary', metadata,
+                    Column('user_id', Integer, primary_key=True, autoincrement=False),
+                    Column('count', Integer, nullable=False), Column('latest_timestamp', DateTime),
+                    Column('latest_sleep_score', Float), Column('latest_effectiveness', Float),
+                    *_aggregate_columns())
+    weekly = Table('weekly_result_summary', metadata,
+                   Column('user_id', Integer, primary_key=True, autoincrement=False),
+                   Column('week_start', Date, primary_key=True), Column('count', Integer, nullable=False),
+                   *_aggregate_columns())
+    metadata.create_all(engine)
+    return engine, results, summary, weekly
+
+
+def _rows(engine, table):
+    with engine.connect() as connection:
+        return sorted(tuple(row) for row in connection.execute(select(table)))
+
+
+def test_incremental_updates_match_a_rebuild(tables):
+    engine, results, summary, weekly = tables
+    rng = random.Random(7)
+    # Halves add up exactly, so summing in another order gives the same totals
+    start = datetime(2024, 3, 1)
+    rows = [{'user_id': rng.randint(1, 4), 'timestamp': start + timedelta(hours=rng.randint(0, 24 * 60)),
+             'sleep_score': rng.randint(40, 110) / 2, 'effectiveness_percentage': rng.randint(0, 200) / 2}
+            for _ in range(200)]
+    with engine.begin() as connection:
+        # Out of timestamp order, as imports and concurrent writers produce them
+        for row in rows:
+            connection.execute(insert(results).values(**row))
+            record_result(connection, summary, weekly, row)
+    incremental = _rows(engine, summary), _rows(engine, weekly)
+
+    with engine.begin() as connection:
+        assert rebuild_summaries(connection, results, summary, weekly, batch_size=2) == (4, 200)
+    assert (_rows(engine, summary), _rows(engine, weekly)) == incremental
+
+    user_rows = [row for row in rows if row['user_id'] == 1]
+    latest = max(user_rows, key=lambda row: row['timestamp'])
+    with engine.connect() as connection:
+        stored = connection.execute(select(summary).where(summary.c.user_id == 1)).mappings().one()
+    assert stored['count'] == len(user_rows)
+    assert stored['latest_timestamp'] == latest['timestamp']
+    assert stored['latest_sleep_score'] == latest['sleep_score']
+    assert stored['sleep_score_min'] == min(row['sleep_score'] for row in user_rows)
+    assert stored['effectiveness_max'] == max(row['effectiveness_percentage'] for row in user_rows)
+
+
+def test_summary_response_rolling_window_and_weekly_order():
+    def week(start, count, score):
+        return {'week_start': start, 'count': count,
+                'sleep_score_sum': score * count, 'sleep_score_min': score, 'sleep_score_max': score,
+                'effectiveness_sum': 50.0 * count, 'effectiveness_min': 50.0, 'effectiveness_max': 50.0}
+
+    weekly = [week(date(2024, 4, 29), 1, 40.0), week(date(2024, 4, 15), 3, 30.0), week(date(2024, 3, 4), 2, 20.0)]
+    summary = {'count': 6, 'latest_timestamp': datetime(2024, 5, 2, 8, 30), 'latest_sleep_score': 40.0,
+               'latest_effectiveness': 50.0, 'sleep_score_sum': 170.0, 'sleep_score_min': 20.0,
+               'sleep_score_max': 40.0, 'effectiveness_sum': 300.0, 'effectiveness_min': 50.0,
+               'effectiveness_max': 50.0}
+
+    response = summary_response(summary, weekly, weeks=2, rolling_weeks=4)
+    assert response['all_time']['sleep_score'] == {'mean': 28.33, 'min': 20.0, 'max': 40.0}
+    assert response['rolling']['from'] == '2024-04-08'
+    assert response['rolling']['count'] == 4
+    assert response['rolling']['sleep_score'] == {'mean': 32.5, 'min': 30.0, 'max': 40.0}
+    assert [bucket['week_start'] for bucket in response['weekly']] == ['2024-04-15', '2024-04-29']
+
+    assert summary_response(None, [], weeks=12, rolling_weeks=4)['count'] == 0
+    assert week_start(datetime(2024, 5, 5, 23, 59)) == date(2024, 4, 29)
+
+
+class _Clock(datetime):
+    """datetime whose utcnow() walks through preset times, one per saved result"""
+
+    times = []
+
+    @classmethod
+    def utcnow(cls):
+        return cls.times.pop(0)
+
+
+def _expected_summary(rows, weeks=12):
+    def stats(group):
+        # The database sums in its own order, which can move a mean across a rounding boundary
+        return {column: {'mean': pytest.approx(sum(row[column] for row in group) / len(group), abs=0.01),
+                         'min': min(row[column] for row in group), 'max': max(row[column] for row in group)}
+                for column in ('sleep_score', 'effectiveness_percentage')}
+
+    latest = max(rows, key=lambda row: row['timestamp'])
+    by_week = {}
+    for row in rows:
+        by_week.setdefault(week_start(row['timestamp']), []).append(row)
+    window_start = week_start(latest['timestamp']) - timedelta(weeks=3)
+    window = [row for row in rows if week_start(row['timestamp']) >= window_start]
+    return {
+        'success': True,
+        'count': len(rows),
+        'latest': {'timestamp': latest['timestamp'].isoformat(), 'sleep_score': latest['sleep_score'],
+                   'effectiveness_percentage': latest['effectiveness_percentage']},
+        'all_time': stats(rows),
+        'rolling': {'weeks': 4, 'from': window_start.isoformat(), 'count': len(window), **stats(window)},
+        'weekly': [{'week_start': week.isoformat(), 'count': len(group), **stats(group)}
+                   for week, group in sorted(by_week.items())][-weeks:],
+    }
+
+
+@pytest.mark.parametrize('durability', ['sync', 'async'])
+def test_summary_endpoint_matches_the_saved_results(app_module, client, monkeypatch, durability):
+    from persistence import WriteBehindQueue
+    from predictor import BINARY_MAPPINGS, ORDINAL_MAPPINGS, QUESTION_MAPPING
+
+    if durability == 'async':
+        writer = WriteBehindQueue(app_module.write_quiz_results, max_batch=4, max_delay=0.05)
+        monkeypatch.setattr(app_module, 'result_writer', writer)
+        monkeypatch.setattr(app_module, 'RESULTS_DURABILITY', durability)
+    rng = random.Random(11)
+    # Spread over 16 weeks, so the response holds only the last 12 buckets
+    _Clock.times = sorted(datetime(2024, 1, 3) + timedelta(hours=rng.randint(0, 16 * 7 * 24)) for _ in range(40))
+    monkeypatch.setattr(app_module, 'datetime', _Clock)
+
+    client.post('/api/signup', json={'name': 'A', 'email': 'a@example.com', 'password': 'hunter22'})
+    client.post('/api/signup', json={'name': 'B', 'email': 'b@example.com', 'password': 'hunter22'})
+    for i in range(40):
+        answers = {question: rng.choice(list(ORDINAL_MAPPINGS.get(column) or BINARY_MAPPINGS[column])).title()
+                   for question, column in QUESTION_MAPPING.items()}
+        email = 'b@example.com' if i % 5 == 0 else 'a@example.com'
+        assert client.post('/api/predict', json={'email': email, 'answers': answers}).status_code == 200
+
+    summary = client.get('/api/results/a@example.com/summary').get_json()
+    if durability == 'async':
+        writer.close()
+    with app_module.app.app_context():
+        QuizResult = app_module.QuizResult
+        rows = [{'timestamp': result.timestamp, 'sleep_score': result.sleep_score,
+                 'effectiveness_percentage': result.effectiveness_percentage}
+                for result in QuizResult.query.filter_by(user_id=1)]
+    assert len(rows) == 32
+    assert summary == _expected_summary(rows)
+    assert client.get('/api/results/nobody@example.com/summary').status_code == 404
+
+
+def test_resumed_import_rebuilds_summaries(app_module, tmp_path):
+    path = tmp_path / 'results.jsonl'
+    with open(path, 'w') as file:
+        for i in range(3):
+            file.write(json.dumps({'email': 'a@example.com', 'timestamp': f'2024-01-0{i + 1}T08:00:00',
+                                   'sleep_score': 30.0 + i, 'effectiveness_percentage': 50.0,
+                                   'age_group': '19–30 (young adults)'}) + '\n')
+    with app_module.app.app_context():
+        app_module.db.session.add(app_module.User(name='A', email='a@example.com', password_hash='-'))
+        app_module.db.session.commit()
+    runner = app_module.app.test_cli_runner()
+    assert runner.invoke(args=['import-results', str(path)]).exit_code == 0
+
+    # As if the first run had stopped between its last batch and the rebuild
+    with app_module.app.app_context():
+        app_module.db.session.execute(delete(app_module.ResultSummary.__table__))
+        app_module.db.session.commit()
+    result = runner.invoke(args=['import-results', str(path)])
+    assert 'Imported 0 quiz results' in result.output
+
+    with app_module.app.app_context():
+        summary = app_module.db.session.get(app_module.ResultSummary, 1)
+    assert summary.count == 3 and summary.latest_sleep_score == 32.0
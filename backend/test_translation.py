@@ -0,0 +1,93 @@
+import sqlite3
+
+from flask import Flask
+
+from bot import bot_backend
+from bot.bot import bot_bp
+from bot.translation import Translator, static_texts
+from questions import QUESTIONS
+
+
+class FakeBackend:
+    """Prefixes each text with the language, recording every call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, lang):
+        self.calls.append((list(texts), lang))
+        return [f'{lang}:{text}' for text in texts]
+
+
+def test_backend_only_sees_cache_misses_once():
+    backend = FakeBackend()
+    translator = Translator(backend=backend)
+
+    assert translator.translate('Good night', 'hi') == 'hi:Good night'
+    assert translator.translate_many(['Good night', 'Sleep well', 'Sleep well'], 'hi') == \
+        ['hi:Good night', 'hi:Sleep well', 'hi:Sleep well']
+    assert translator.translate('Good night', 'es') == 'es:Good night'
+    assert backend.calls == [(['Good night'], 'hi'), (['Sleep well'], 'hi'), (['Good night'], 'es')]
+    assert translator.stats()['hits'] == 1
+
+
+def test_translations_persist_across_restarts(tmp_path):
+    path = str(tmp_path / 'translations.sqlite')
+    translator = Translator(backend=FakeBackend(), path=path)
+    translator.translate('Good night', 'hi')
+    translator.close()
+
+    backend = FakeBackend()
+    assert Translator(backend=backend, path=path).translate('Good night', 'hi') == 'hi:Good night'
+    assert backend.calls == []
+
+
+def test_cache_file_keeps_the_newest_entries(tmp_path):
+    path = str(tmp_path / 'translations.sqlite')
+    translator = Translator(backend=FakeBackend(), path=path, max_entries=3)
+    translator.translate_many(['one', 'two'], 'hi')
+    translator.translate_many(['three', 'four', 'five'], 'hi')
+    translator.close()
+
+    with sqlite3.connect(path) as db:
+        assert [text for text, in db.execute('SELECT text FROM translations ORDER BY rowid')] == \
+            ['three', 'four', 'five']
+
+
+def test_missing_translations_are_not_cached(tmp_path):
+    def backend(texts, lang):
+        return [None if text == 'Zzz' else f'{lang}:{text}' for text in texts]
+
+    translator = Translator(backend=backend, path=str(tmp_path / 'translations.sqlite'))
+
+    assert translator.translate_many(['Zzz', 'Sleep well'], 'hi') == ['Zzz', 'hi:Sleep well']
+    assert translator.translate('Zzz', 'hi') == 'Zzz'
+    assert translator.stats()['entries'] == 1
+
+
+def test_warm_covers_questions_and_recommendations():
+    backend = FakeBackend()
+    translator = Translator(backend=backend)
+    texts = static_texts()
+
+    assert translator.warm(texts, ['hi'], batch_size=40) == len(texts)
+    assert QUESTIONS[0]['question'] in texts
+    translator.translate_many([QUESTIONS[0]['question']] + QUESTIONS[0]['options'], 'hi')
+    assert sum(len(batch) for batch, _ in backend.calls) == len(texts)
+
+
+def test_translate_endpoints(monkeypatch):
+    backend = FakeBackend()
+    monkeypatch.setattr(bot_backend, 'translator', Translator(backend=backend))
+    app = Flask(__name__)
+    app.register_blueprint(bot_bp)
+    client = app.test_client()
+
+    response = client.post('/api/translate', json={'message': 'Good night', 'lang': 'hi'})
+    assert response.get_json() == {'translated_text': 'hi:Good night'}
+
+    response = client.post('/api/translate/batch', json={'messages': ['Good night', 'Sleep well'], 'lang': 'hi'})
+    assert response.get_json() == {'translations': ['hi:Good night', 'hi:Sleep well']}
+    assert backend.calls == [(['Good night'], 'hi'), (['Sleep well'], 'hi')]
+
+    assert client.post('/api/translate/batch', json={'messages': 'Good night', 'lang': 'hi'}).status_code == 400
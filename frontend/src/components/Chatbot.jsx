@@ -51,6 +51,8 @@ const Chatbot = () => {
   const [error, setError] = useState(null);
   const chatRef = useRef(null);
   const endOfMessagesRef = useRef(null);
+  // Chat session the backend keeps our history under; set from the first reply
+  const sessionIdRef = useRef(null);
   const navigate = useNavigate();
   // Typing status animation
   const [typingStatus, setTypingStatus] = useState('Thinking...');
@@ -115,10 +117,11 @@ const Chatbot = () => {
       const res = await fetch(`${API_BASE}/chat`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ message: userMsg.text }),
+        body: JSON.stringify({ message: userMsg.text, session_id: sessionIdRef.current }),
       });
       if (!res.ok) throw new Error('Failed to fetch bot response');
       const data = await res.json();
+      sessionIdRef.current = data.session_id || sessionIdRef.current;
       const botMsg = {
         id: Date.now() + 1,
         type: 'bot',
@@ -149,6 +152,7 @@ const Chatbot = () => {
     if (window.confirm('Are you sure you want to delete all the chats?')) {
       setMessages([]);
       setShowHeader(true);
+      sessionIdRef.current = null;
     }
   };
 
@@ -19,7 +19,9 @@ const Dashboard = () => {
 
     const fetchQuizHistory = async () => {
       try {
-        const response = await fetch(`http://localhost:5000/api/results/${currentUser.email}`);
+        const response = await fetch(`http://localhost:5000/api/results/${currentUser.email}`, {
+          headers: currentUser.token ? { Authorization: `Bearer ${currentUser.token}` } : {},
+        });
         if (!response.ok) {
           throw new Error('Failed to fetch results');
         }
@@ -30,7 +30,7 @@ const Login = () => {
       const data = await response.json();
 
       if (response.ok) {
-        localStorage.setItem('currentUser', JSON.stringify(data.user));
+        localStorage.setItem('currentUser', JSON.stringify({ ...data.user, token: data.token }));
         navigate('/dashboard');
       } else {
         setError(data.error || 'Login failed. Please check your credentials.');
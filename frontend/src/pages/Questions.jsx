@@ -156,6 +156,7 @@ const Questions = () => {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          ...(currentUser.token && { Authorization: `Bearer ${currentUser.token}` }),
         },
         body: JSON.stringify({
           email: currentUser.email,
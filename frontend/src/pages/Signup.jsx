@@ -32,7 +32,7 @@ const Signup = () => {
 
       if (response.ok) {
         // Automatically log the user in by saving their info
-        localStorage.setItem('currentUser', JSON.stringify(data.user));
+        localStorage.setItem('currentUser', JSON.stringify({ ...data.user, token: data.token }));
         navigate('/dashboard');
       } else {
         setError(data.error || 'Signup failed. Please try again.');